@@ -1,7 +1,11 @@
 from argparse import ArgumentParser, ArgumentTypeError
-import importlib
+import logging
+import sys
 from os.path import isdir
 
+from ldbc_snb_grblas.logger import enable_spans, enable_spans_from_env
+from ldbc_snb_grblas.runner import QueryNotFoundError, import_query, read_params_file, report_error, run, run_batch
+
 
 def dir_path(path):
     if isdir(path):
@@ -10,26 +14,121 @@ def dir_path(path):
         raise ArgumentTypeError("'%s' is not a valid path" % path)
 
 
-def execute():
+SPANS_HELP = ("Append the timing of the load and compute stages to this file, as CSV if its name ends with '.csv', "
+              "as JSON lines otherwise. Defaults to the LDBC_SNB_GRBLAS_SPANS environment variable.")
+
+
+def _enable_spans(spans_file):
+    if spans_file:
+        enable_spans(spans_file)
+    else:
+        enable_spans_from_env()
+
+
+def serve(argv):
+    from ldbc_snb_grblas.server import QueryServer
+
+    parser = ArgumentParser(
+        prog='ldbc_snb_grblas serve',
+        description="Load the data once and answer LDBC SNB BI queries read line by line "
+                    "('<queryid> <params...>') from stdin or from a TCP socket."
+    )
+
+    parser.add_argument("datadir", type=dir_path, help="Folder containing input date.")
+    parser.add_argument("--port", type=int, help="Listen on this TCP port instead of reading stdin.")
+    parser.add_argument("--host", default='127.0.0.1', help="Address to listen on when --port is given.")
+    parser.add_argument("--preload", type=int, nargs='*', default=[], metavar='QUERYID',
+                        help="Load the data of these queries at startup instead of at their first request.")
+    parser.add_argument("--cache-dir", help="Directory of the binary cache of loaded vertices and edges.")
+    parser.add_argument("--binary-dir", type=dir_path,
+                        help="Dataset converted by 'ldbc_snb_grblas convert', the edges are imported from there.")
+    parser.add_argument("--spans", metavar='FILE', help=SPANS_HELP)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    _enable_spans(args.spans)
+
+    server = QueryServer(args.datadir, cache_dir=args.cache_dir, binary_dir=args.binary_dir)
+
+    try:
+        server.preload(args.preload)
+    except QueryNotFoundError as e:
+        report_error(e)
+        return 1
+
+    if args.port is None:
+        server.serve_stream(sys.stdin, sys.stdout)
+    else:
+        server.serve_socket(args.host, args.port)
+
+
+def convert(argv):
+    from ldbc_snb_grblas.convert import convert as convert_dataset
+
+    parser = ArgumentParser(
+        prog='ldbc_snb_grblas convert',
+        description="Convert the edge files of a dataset to CSR arrays, which are memory-mapped and imported "
+                    "without parsing when the directory is passed with --binary-dir."
+    )
+
+    parser.add_argument("datadir", type=dir_path, help="Folder containing input date.")
+    parser.add_argument("outdir", help="Output folder, an earlier conversion in it is replaced.")
+    parser.add_argument("--workers", type=int, help="Number of worker processes for parsing.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    convert_dataset(args.datadir, args.outdir, workers=args.workers)
+
+
+COMMANDS = {
+    'serve': serve,
+    'convert': convert,
+}
+
+
+def execute(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
     parser = ArgumentParser(
         prog='ldbc_snb_grblas',
-        description="Calculate LDBC SNB BI queries using GraphBLAS."
+        description="Calculate LDBC SNB BI queries using GraphBLAS. "
+                    "Use 'ldbc_snb_grblas serve -h' for the resident server mode and "
+                    "'ldbc_snb_grblas convert -h' for converting a dataset to the binary format."
     )
 
     parser.add_argument("queryid", type=int, help="Number of desired query to run.")
     parser.add_argument("datadir", type=dir_path, help="Folder containing input date.")
     parser.add_argument("params", nargs='*', help="Other query specific parameters.")
-    args = parser.parse_args()
+    parser.add_argument("--params-file",
+                        help="Calculate the query for every parameter binding of this file ('|' separated values "
+                             "with a header line, like the LDBC substitution parameters) with a single load.")
+    parser.add_argument("--cache-dir", help="Directory of the binary cache of loaded vertices and edges.")
+    parser.add_argument("--binary-dir", type=dir_path,
+                        help="Dataset converted by 'ldbc_snb_grblas convert', the edges are imported from there.")
+    parser.add_argument("--spans", metavar='FILE', help=SPANS_HELP)
+    args = parser.parse_args(argv)
+
+    _enable_spans(args.spans)
+
+    if args.params_file and args.params:
+        parser.error("query parameters and --params-file cannot be used together")
 
     try:
-        query = importlib.import_module('.queries.q%d' % args.queryid, 'ldbc_snb_grblas')
-    except ModuleNotFoundError:
-        # todo
-        print("given query id (%d) not found." % args.queryid)
-        return
+        query = import_query(args.queryid)
+    except QueryNotFoundError as e:
+        report_error(e)
+        return 1
+
+    if args.params_file:
+        return run_batch(query, args.datadir, read_params_file(args.params_file), cache_dir=args.cache_dir,
+                         binary_dir=args.binary_dir)
 
-    query.calc(args.datadir, *args.params)
+    return run(query, args.datadir, args.params, cache_dir=args.cache_dir, binary_dir=args.binary_dir)
 
 
 if __name__ == '__main__':
-    execute()
+    sys.exit(execute())
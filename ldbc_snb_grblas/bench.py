@@ -0,0 +1,218 @@
+"""
+Benchmark of the BI queries.
+
+Usage: python -m ldbc_snb_grblas.bench <datadir> [<datadir> ...] [--queries 9 19] [--warmup 1] [--repeat 5]
+                                       [--output results.json] [--baseline baseline.json] [--threshold 0.1]
+
+For every dataset (e.g. one for each scale factor) and query, the data of the query is loaded and the query is
+calculated for every binding of its parameter file, 'warmup' times without measuring, then 'repeat' times measured.
+Load and compute are measured separately with the phases of the Logger: a load sample is one load of the query's
+data, a compute sample is the calculation of one binding.
+
+The parameter file of query N is bi_N_param.txt (the name of the LDBC substitution parameter files) in the
+parameter directory, the 'substitution_parameters' folder of the dataset by default. Queries without a parameter
+file are skipped.
+
+With --baseline, the medians are compared to a result file written earlier with --output, and the command fails if
+any of them got slower by more than the threshold.
+"""
+
+import json
+import logging
+import sys
+from argparse import ArgumentParser
+from os import path
+
+import numpy as np
+
+from ldbc_snb_grblas.loader import Loader
+from ldbc_snb_grblas.logger import Logger
+from ldbc_snb_grblas.runner import import_query, load, parse_params, read_params_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERIES = [3, 4, 5, 7, 9, 11, 18, 19, 114]
+PARAMS_DIR = 'substitution_parameters'
+PERCENTILES = (50, 90, 99)
+PHASES = ('load', 'compute')
+
+
+def params_file_name(query_id):
+    return f'bi_{query_id}_param.txt'
+
+
+def dataset_name(data_dir):
+    return path.basename(path.normpath(data_dir))
+
+
+def summarize(samples):
+    """
+    :param samples: list of durations in seconds.
+    :return: dict of their statistics: count, min, mean, median and percentiles (p50, p90...).
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+
+    stats = {
+        'count': len(samples),
+        'min': float(samples.min()),
+        'mean': float(samples.mean()),
+        'median': float(np.median(samples)),
+    }
+    for percentile in PERCENTILES:
+        stats[f'p{percentile}'] = float(np.percentile(samples, percentile))
+
+    return stats
+
+
+def bench_query(query_id, data_dir, params_list, *, warmup=1, repeat=5, cache_dir=None, binary_dir=None):
+    """
+    Measures the load and compute time of a query.
+
+    :param query_id: number of the query.
+    :param data_dir: folder containing the input data.
+    :param params_list: list of (string) parameter lists.
+    :param warmup: number of runs before the measured ones.
+    :param repeat: number of measured runs.
+    :return: dict of the statistics of the 'load' and 'compute' samples (see summarize), without 'compute' if
+             there are no bindings.
+    """
+    query = import_query(query_id)
+    params_list = [parse_params(query, params) for params in params_list]
+
+    samples = {phase: [] for phase in PHASES}
+    for run in range(warmup + repeat):
+        timer = Logger(file=None)
+
+        graph = load(query, Loader(data_dir, cache_dir=cache_dir, binary_dir=binary_dir))
+        timer.loading_finished()
+
+        compute_times = []
+        for params in params_list:
+            query.compute(graph, *params)
+            timer.calculation_finished()
+            compute_times.append(timer.phases['CALCULATED'])
+
+        if run >= warmup:
+            samples['load'].append(timer.phases['LOADED'])
+            samples['compute'].extend(compute_times)
+
+        del graph
+
+    return {phase: summarize(values) for phase, values in samples.items() if values}
+
+
+def run_benchmark(data_dirs, query_ids, *, params_dir=None, warmup=1, repeat=5, cache_dir=None, binary_dir=None):
+    """
+    Benchmarks queries on several datasets.
+    :return: dict of the results: dataset name -> 'q<query id>' -> phase -> statistics.
+    """
+    results = {}
+    for data_dir in data_dirs:
+        dataset_results = results.setdefault(dataset_name(data_dir), {})
+
+        for query_id in query_ids:
+            params_file = path.join(params_dir or path.join(data_dir, PARAMS_DIR), params_file_name(query_id))
+            if not path.isfile(params_file):
+                logger.warning("Skipping query %d on %s, '%s' not found." % (query_id, data_dir, params_file))
+                continue
+
+            logger.info("Query %d on %s" % (query_id, data_dir))
+            dataset_results[f'q{query_id}'] = bench_query(query_id, data_dir, read_params_file(params_file),
+                                                          warmup=warmup, repeat=repeat, cache_dir=cache_dir,
+                                                          binary_dir=binary_dir)
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares the medians of the results to a baseline.
+
+    :param results: results of run_benchmark.
+    :param baseline: results of an earlier run_benchmark.
+    :param threshold: allowed relative slowdown, e.g. 0.1 for 10%.
+    :return: list of (dataset, query, phase, baseline median, median) tuples of the regressions.
+    """
+    regressions = []
+    for dataset, queries in results.items():
+        for query, phases in queries.items():
+            for phase, stats in phases.items():
+                try:
+                    baseline_median = baseline[dataset][query][phase]['median']
+                except KeyError:
+                    continue
+
+                if stats['median'] > baseline_median * (1 + threshold):
+                    regressions.append((dataset, query, phase, baseline_median, stats['median']))
+
+    return regressions
+
+
+def print_report(results, baseline=None, file=None):
+    print("dataset;query;phase;count;median;p90;p99;baseline_median;change", file=file)
+
+    for dataset, queries in results.items():
+        for query, phases in queries.items():
+            for phase, stats in phases.items():
+                baseline_median = (baseline or {}).get(dataset, {}).get(query, {}).get(phase, {}).get('median')
+                change = f"{stats['median'] / baseline_median - 1:+.1%}" if baseline_median else ''
+
+                print(f"{dataset};{query};{phase};{stats['count']};{stats['median']:.6f};{stats['p90']:.6f};"
+                      f"{stats['p99']:.6f};{'' if baseline_median is None else f'{baseline_median:.6f}'};{change}",
+                      file=file)
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        prog='python -m ldbc_snb_grblas.bench',
+        description="Benchmark the load and compute time of the BI queries on one or more datasets."
+    )
+
+    parser.add_argument("datadirs", nargs='+', help="Folders containing input data, e.g. one for each scale factor.")
+    parser.add_argument("--queries", type=int, nargs='+', default=DEFAULT_QUERIES, metavar='QUERYID',
+                        help="Queries to run, all of them by default.")
+    parser.add_argument("--params-dir",
+                        help="Folder of the bi_<queryid>_param.txt parameter files, "
+                             f"'{PARAMS_DIR}' in the data folder by default.")
+    parser.add_argument("--warmup", type=int, default=1, help="Number of runs before the measured ones.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of measured runs.")
+    parser.add_argument("--cache-dir", help="Directory of the binary cache of loaded vertices and edges.")
+    parser.add_argument("--binary-dir", help="Dataset converted by 'ldbc_snb_grblas convert'.")
+    parser.add_argument("--output", help="Write the results to this JSON file, it can be used as baseline later.")
+    parser.add_argument("--baseline", help="Compare the results to this JSON file written by --output.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown of a median reported as regression, 0.1 (10%%) by default.")
+    args = parser.parse_args(argv)
+
+    if args.repeat < 1 or args.warmup < 0:
+        parser.error("--repeat must be positive and --warmup can't be negative")
+
+    logging.basicConfig(level=logging.INFO)
+
+    results = run_benchmark(args.datadirs, args.queries, params_dir=args.params_dir, warmup=args.warmup,
+                            repeat=args.repeat, cache_dir=args.cache_dir, binary_dir=args.binary_dir)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'warmup': args.warmup, 'repeat': args.repeat, 'results': results}, f, indent=1)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    print_report(results, baseline)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for dataset, query, phase, baseline_median, median in regressions:
+            print(f"REGRESSION;{dataset};{query};{phase};{baseline_median:.6f};{median:.6f}", file=sys.stderr)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
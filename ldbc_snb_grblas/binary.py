@@ -0,0 +1,157 @@
+"""
+Prebuilt binary graph format written by the convert command (see ldbc_snb_grblas.convert).
+
+Layout of the output directory:
+  - manifest.json: format version, number of vertices of each type and the description of each edge type.
+  - ids/<vertex type>.npy: int64 array of the original ids of a vertex type, in index order. The ids of the vertex
+                           file come first in file order, the ids found only in edge files follow them.
+  - <dynamic|static>/<edge prefix>/indptr.npy, col_indices.npy: the adjacency matrix of an edge file (e.g.
+                           dynamic/person_knows_person) in CSR format, with sorted uint64 column indices.
+
+The arrays are memory-mapped when read back, so a load is bounded by the page cache instead of csv parsing.
+"""
+
+import errno
+import json
+import logging
+import os
+import shutil
+import tempfile
+from os import path
+
+import numpy as np
+
+from ldbc_snb_grblas.cache import _source_signature
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = 'manifest.json'
+IDS_DIR = 'ids'
+
+# bump this if the layout changes, so old conversions are not used anymore
+FORMAT_VERSION = 1
+
+
+def _edge_key(prefix, is_dynamic):
+    return '%s/%s' % ('dynamic' if is_dynamic else 'static', prefix)
+
+
+def _load_array(file_path):
+    return np.load(file_path, mmap_mode='r', allow_pickle=False)
+
+
+class BinaryGraph:
+    """
+    Read side of a converted dataset.
+
+    :param binary_dir: output directory of the convert command.
+    """
+
+    def __init__(self, binary_dir):
+        with open(path.join(binary_dir, MANIFEST_FILENAME)) as f:
+            manifest = json.load(f)
+
+        if manifest.get('version') != FORMAT_VERSION:
+            raise ValueError("'%s' was converted with an incompatible version (%s), please convert it again."
+                             % (binary_dir, manifest.get('version')))
+
+        self.binary_dir = binary_dir
+        self.vertices = manifest['vertices']  # vertex type name -> number of vertices
+        self.edges = manifest['edges']  # edge key -> description
+
+        self._ids = {}
+
+    def vertex_ids(self, vertex_type_name):
+        """
+        :return: memory-mapped int64 array of the ids of a vertex type in index order, None if it is unknown.
+        """
+        if vertex_type_name not in self.vertices:
+            return None
+
+        if vertex_type_name not in self._ids:
+            self._ids[vertex_type_name] = _load_array(path.join(self.binary_dir, IDS_DIR, f'{vertex_type_name}.npy'))
+
+        return self._ids[vertex_type_name]
+
+    def edge(self, prefix, is_dynamic, file_paths):
+        """
+        Returns the converted adjacency matrix of an edge file.
+
+        :param prefix: edge prefix, e.g. 'person_knows_person'.
+        :param is_dynamic: True if the edge file is in the 'dynamic' subdirectory.
+        :param file_paths: part files the matrix should be built from. If they differ from the converted ones, or
+                           any of them changed since the conversion, the edge is treated as missing.
+        :return: (meta, arrays) tuple where arrays has the memory-mapped 'indptr' and 'col_indices', or None.
+        """
+        key = _edge_key(prefix, is_dynamic)
+        meta = self.edges.get(key)
+        if meta is None:
+            return None
+
+        if meta['files'] != [path.abspath(file_path) for file_path in file_paths] or \
+                meta['source'] != _source_signature(file_paths):
+            logger.info("Converted edge '%s' is outdated." % key)
+            return None
+
+        edge_dir = path.join(self.binary_dir, key)
+        arrays = {name: _load_array(path.join(edge_dir, f'{name}.npy')) for name in ('indptr', 'col_indices')}
+
+        return meta, arrays
+
+
+class BinaryGraphWriter:
+    """
+    Write side of a converted dataset. The output is written to a temporary directory first and moved in place by
+    'close', so an interrupted conversion never leaves a partial dataset behind.
+
+    :param binary_dir: output directory. If it already exists, it must be empty or a previously converted dataset,
+                       which is replaced.
+    """
+
+    def __init__(self, binary_dir):
+        binary_dir = path.abspath(binary_dir)
+        if path.isdir(binary_dir) and os.listdir(binary_dir) and \
+                not path.isfile(path.join(binary_dir, MANIFEST_FILENAME)):
+            raise FileExistsError(errno.EEXIST, "Directory is not empty and not a converted dataset", binary_dir)
+
+        os.makedirs(path.dirname(binary_dir), exist_ok=True)
+
+        self.binary_dir = binary_dir
+        self._tmp_dir = tempfile.mkdtemp(prefix=f'.{path.basename(binary_dir)}-', dir=path.dirname(binary_dir))
+        self._vertices = {}
+        self._edges = {}
+
+    def write_edge(self, prefix, is_dynamic, file_paths, indptr, col_indices):
+        """
+        Stores the CSR arrays of an edge file. The number of rows and columns is the final number of vertices of
+        the vertex types, 'indptr' may be shorter than that if the vertex type got more ids after the edge was
+        converted, as those rows are empty.
+        """
+        key = _edge_key(prefix, is_dynamic)
+        edge_dir = path.join(self._tmp_dir, key)
+        os.makedirs(edge_dir)
+
+        np.save(path.join(edge_dir, 'indptr.npy'), np.asarray(indptr, dtype=np.uint64), allow_pickle=False)
+        np.save(path.join(edge_dir, 'col_indices.npy'), np.asarray(col_indices, dtype=np.uint64), allow_pickle=False)
+
+        self._edges[key] = {
+            'files': [path.abspath(file_path) for file_path in file_paths],
+            'source': _source_signature(file_paths),
+            'nvals': len(col_indices),
+        }
+
+    def write_vertex_ids(self, vertex_type_name, ids):
+        os.makedirs(path.join(self._tmp_dir, IDS_DIR), exist_ok=True)
+        np.save(path.join(self._tmp_dir, IDS_DIR, f'{vertex_type_name}.npy'), np.asarray(ids, dtype=np.int64),
+                allow_pickle=False)
+        self._vertices[vertex_type_name] = len(ids)
+
+    def close(self):
+        with open(path.join(self._tmp_dir, MANIFEST_FILENAME), 'w') as f:
+            json.dump({'version': FORMAT_VERSION, 'vertices': self._vertices, 'edges': self._edges}, f, indent=1)
+
+        shutil.rmtree(self.binary_dir, ignore_errors=True)
+        os.rename(self._tmp_dir, self.binary_dir)
+
+    def abort(self):
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
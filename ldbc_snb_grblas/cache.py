@@ -0,0 +1,121 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from os import path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+META_FILENAME = 'meta.json'
+
+# bump this if the layout of the cache entries changes, so old entries are not used anymore
+CACHE_VERSION = 3
+
+
+def fingerprint(array):
+    """Returns a short hash of the content of a numpy array."""
+    array = np.ascontiguousarray(array)
+    return hashlib.blake2b(array.tobytes(), digest_size=16).hexdigest()
+
+
+def _source_paths(file_paths):
+    return [file_paths] if isinstance(file_paths, str) else list(file_paths)
+
+
+def _source_signature(file_paths):
+    signature = []
+    for file_path in _source_paths(file_paths):
+        stat = os.stat(file_path)
+        signature.append({'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size})
+
+    return signature
+
+
+class GraphCache:
+    """
+    Binary on-disk cache of loaded vertex mappings and adjacency matrices.
+
+    Every entry is a directory named after a hash of the source csv path and all the load options. It contains
+    the arrays as .npy files, which are memory-mapped when read back, and a meta.json holding the scalars and
+    the size/modification time of the source file. If the source file changes, the entry is treated as missing
+    and will be overwritten by the next store.
+    """
+
+    def __init__(self, cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+
+    def key(self, file_paths, **options):
+        """
+        Creates the key of a cache entry.
+
+        :param file_paths: path of the source csv file, or list of paths if it has several parts.
+        :param options: any json serializable load option that changes the result of the load.
+        :return: key string
+        """
+        description = json.dumps({
+            'version': CACHE_VERSION,
+            'path': [path.abspath(file_path) for file_path in _source_paths(file_paths)],
+            'options': options,
+        }, sort_keys=True)
+
+        return hashlib.blake2b(description.encode(), digest_size=20).hexdigest()
+
+    def load(self, key, file_paths):
+        """
+        Returns the cached entry for the given key if it is valid.
+
+        :param key: key created by 'key'.
+        :param file_paths: path(s) of the source csv file, used for validating the entry.
+        :return: (meta, arrays) tuple where arrays is a dict of memory-mapped numpy arrays, or None.
+        """
+        entry_dir = path.join(self.cache_dir, key)
+        meta_path = path.join(entry_dir, META_FILENAME)
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if meta.get('source') != _source_signature(file_paths):
+            logger.info("Cache entry of '%s' is outdated." % file_paths)
+            return None
+
+        arrays = {
+            name: np.load(path.join(entry_dir, f'{name}.npy'), mmap_mode='r', allow_pickle=False)
+            for name in meta['arrays']
+        }
+
+        return meta, arrays
+
+    def store(self, key, file_paths, arrays, **meta):
+        """
+        Stores an entry in the cache. The entry is written to a temporary directory first and then moved in
+        place, so concurrent readers never see a partial entry.
+
+        :param key: key created by 'key'.
+        :param file_paths: path(s) of the source csv file.
+        :param arrays: dict of numpy arrays to store.
+        :param meta: additional json serializable values stored with the entry.
+        """
+        meta = dict(meta, source=_source_signature(file_paths), arrays=sorted(arrays))
+
+        tmp_dir = tempfile.mkdtemp(prefix=f'.{key}-', dir=self.cache_dir)
+        try:
+            for name, array in arrays.items():
+                np.save(path.join(tmp_dir, f'{name}.npy'), array, allow_pickle=False)
+
+            with open(path.join(tmp_dir, META_FILENAME), 'w') as f:
+                json.dump(meta, f)
+
+            entry_dir = path.join(self.cache_dir, key)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.rename(tmp_dir, entry_dir)
+        except OSError as e:
+            logger.warning("Could not store cache entry for '%s': %s" % (file_paths, e))
+            shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,133 @@
+import numpy as np
+from grblas import dtypes
+
+from ldbc_snb_grblas.grutil import mask_matrix
+from ldbc_snb_grblas.loader import IdMapping, LoadError, VertexType
+
+# vertex types stored in the 'dynamic' subdirectory, every other one is in 'static'
+DYNAMIC_VERTEX_TYPES = {'comment', 'forum', 'message', 'person', 'post'}
+
+
+def _hashable(header_override):
+    """Header overrides can be dicts by the parts of composite vertex types, see Loader.load_edge."""
+    return tuple(sorted(header_override.items())) if isinstance(header_override, dict) else header_override
+
+
+class Catalog:
+    """
+    Process-wide store of loaded vertices and edges on top of a Loader.
+
+    It has the same load_vertex/load_empty_vertex/load_edge interface as Loader, so the 'load' step of the queries
+    can use either of them, but every vertex and edge file is read at most once, no matter how many queries need
+    it. All vertex types of the same name share one id -> index mapping, which is created from the vertex file,
+    so the index of a vertex is the same in every matrix handed out.
+
+    Masks (lmask, rmask) are applied in memory on the cached matrix, the cached matrices must not be modified.
+
+    As the mappings are shared, a later load may extend the mapping of a vertex type that a graph loaded earlier
+    holds, so graphs should be loaded with load_query, which gives them vertex types of fixed length.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self._mappings = {}  # vertex type name -> IdMapping
+        self._vertices = {}  # (vertex type name, column names, date column names) -> VertexType
+        self._edges = {}  # edge key -> Matrix
+
+    def _mapping(self, vertex_type_name):
+        if vertex_type_name not in self._mappings:
+            try:
+                vertex_type = self.loader.load_vertex(vertex_type_name,
+                                                      is_dynamic=vertex_type_name in DYNAMIC_VERTEX_TYPES)
+                mapping = vertex_type.mapping
+            except FileNotFoundError:
+                # without a vertex file the mapping is created from the edges
+                mapping = IdMapping()
+
+            self._mappings[vertex_type_name] = mapping
+
+        return self._mappings[vertex_type_name]
+
+    def load_query(self, query):
+        """
+        Loads the data of a query module. The vertex types of the graph are snapshots, so their lengths keep matching
+        the matrices of the graph when later loads extend the shared mappings.
+        """
+        graph = query.load(self)
+
+        for name, value in vars(graph).items():
+            if isinstance(value, VertexType):
+                setattr(graph, name, value.snapshot())
+
+        return graph
+
+    def load_vertex(self, vertex_type_name: str, column_names=None, *, is_dynamic, id_mask=None,
+                    date_column_names=None, where=None):
+        if id_mask is not None or where:
+            raise ValueError("id_mask and where are not supported by the catalog, "
+                             "apply masks on the loaded matrices instead.")
+
+        key = (vertex_type_name, tuple(column_names or []), tuple(date_column_names or []))
+
+        if key not in self._vertices:
+            mapping = self._mapping(vertex_type_name)
+
+            if not key[1] and not key[2]:
+                vertex_type = VertexType(vertex_type_name, mapping=mapping)
+            else:
+                loaded = self.loader.load_vertex(vertex_type_name, list(key[1]), is_dynamic=is_dynamic,
+                                                 date_column_names=list(key[2]))
+
+                # the file is the same, so the ids should be in the same order as in the shared mapping
+                if not np.array_equal(loaded.mapping.ids, mapping.ids[:loaded.length]):
+                    raise LoadError(f"Id mapping of {vertex_type_name} vertex doesn't match the shared mapping.")
+
+                vertex_type = VertexType(vertex_type_name, data=loaded.data, mapping=mapping, dates=loaded.dates)
+
+            self._vertices[key] = vertex_type
+
+        return self._vertices[key]
+
+    def load_empty_vertex(self, vertex_type_name: str):
+        return self.load_vertex(vertex_type_name, is_dynamic=vertex_type_name in DYNAMIC_VERTEX_TYPES)
+
+    def load_many(self, specs, *, workers=None):
+        """Same as Loader.load_many, but the loads are done one after another, most of them are cached anyway."""
+        for spec in specs:
+            spec.load(self)
+
+        # every mapping is final now, the edges are returned again by load_edge, resized copies if needed
+        return [spec.load(self) for spec in specs]
+
+    def load_edge(self, from_vertex_type: VertexType, edge_name: str, to_vertex_type: VertexType,
+                  *, is_dynamic: bool, dtype=dtypes.INT32, lmask=None, rmask=None, undirected=False,
+                  from_id_header_override=None, to_id_header_override=None, where=None):
+        if where:
+            raise ValueError("where is not supported by the catalog, apply masks on the loaded matrices instead.")
+
+        for vertex_type in (from_vertex_type, to_vertex_type):
+            if vertex_type.mapping is not self._mappings.get(vertex_type.name):
+                raise ValueError(f"{vertex_type.name} vertex type was not created by this catalog.")
+
+        key = (from_vertex_type.name, edge_name, to_vertex_type.name, dtype.name, undirected,
+               _hashable(from_id_header_override), _hashable(to_id_header_override))
+
+        if key not in self._edges:
+            self._edges[key] = self.loader.load_edge(from_vertex_type, edge_name, to_vertex_type,
+                                                     is_dynamic=is_dynamic, dtype=dtype, undirected=undirected,
+                                                     from_id_header_override=from_id_header_override,
+                                                     to_id_header_override=to_id_header_override)
+
+        m = self._edges[key]
+
+        # mappings may have been extended by later loads, the dimensions should always follow them. The matrix may
+        # be held by a graph loaded earlier, so a resized copy replaces it in the cache instead of resizing it.
+        if m.nrows != from_vertex_type.length or m.ncols != to_vertex_type.length:
+            m = m.dup()
+            m.resize(from_vertex_type.length, to_vertex_type.length)
+            self._edges[key] = m
+
+        if lmask is not None or rmask is not None:
+            m = mask_matrix(m, rows=lmask, cols=rmask)
+
+        return m
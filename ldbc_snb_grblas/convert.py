@@ -0,0 +1,90 @@
+"""
+Converts a csv dataset to the binary graph format (see ldbc_snb_grblas.binary), which can be loaded without
+parsing by passing its directory to the Loader as 'binary_dir'.
+
+Usage: python -m ldbc_snb_grblas convert <datadir> <outdir>
+"""
+
+import csv
+import logging
+import os
+import re
+from os import path
+
+from ldbc_snb_grblas.binary import BinaryGraphWriter
+from ldbc_snb_grblas.loader import DEFAULT_DELIMITER, DEFAULT_QUOTE, Loader
+
+logger = logging.getLogger(__name__)
+
+SUBDIRS = (('static', False), ('dynamic', True))
+
+_PART_PATTERN = re.compile(r'(.+)_(\d+)_(\d+)\.csv$')
+
+
+def _find_prefixes(data_dir, subdir):
+    """:return: sorted list of the vertex and edge prefixes of the part files in a subdirectory."""
+    directory = path.join(data_dir, subdir)
+    if not path.isdir(directory):
+        return []
+
+    return sorted({match.group(1) for match in map(_PART_PATTERN.match, os.listdir(directory)) if match})
+
+
+def _id_columns(file_path):
+    """:return: names of the first two columns of an edge file, the ids of the source and the target vertices."""
+    with open(file_path) as csvfile:
+        header = next(csv.reader(csvfile, delimiter=DEFAULT_DELIMITER, quotechar=DEFAULT_QUOTE))
+
+    return [name.split(':')[0] for name in header[:2]]
+
+
+def convert(data_dir, out_dir, *, workers=None):
+    """
+    Converts every edge file of a dataset to CSR arrays.
+
+    The vertex files are read first, so the index of a vertex is its position in the vertex file, like with a
+    Loader reading the csv files. The ids found only in edge files get the next indexes in the order of the edge
+    files. The edge files are read with their first two columns as source and target ids.
+
+    :param data_dir: folder containing the input data.
+    :param out_dir: output folder, created if it doesn't exist.
+    :param workers: number of worker processes for parsing, see Loader.
+    """
+    loader = Loader(data_dir, workers=workers)
+    writer = BinaryGraphWriter(out_dir)
+
+    try:
+        vertex_types = {}
+        edges = []
+        for subdir, is_dynamic in SUBDIRS:
+            for prefix in _find_prefixes(data_dir, subdir):
+                parts = prefix.split('_')
+                if len(parts) == 1:
+                    vertex_types[prefix] = loader.load_vertex(prefix, is_dynamic=is_dynamic)
+                elif len(parts) == 3:
+                    edges.append((parts, is_dynamic))
+                else:
+                    logger.warning("Skipping '%s' files, they are neither vertex nor edge files." % prefix)
+
+        for (from_name, edge_name, to_name), is_dynamic in edges:
+            prefix = '_'.join((from_name, edge_name, to_name))
+            file_paths = loader._find_files(prefix, is_dynamic)
+
+            from_vertex_type = vertex_types.setdefault(from_name, loader.load_empty_vertex(from_name))
+            to_vertex_type = vertex_types.setdefault(to_name, loader.load_empty_vertex(to_name))
+            from_column, to_column = _id_columns(file_paths[0])
+
+            m = loader.load_edge(from_vertex_type, edge_name, to_vertex_type, is_dynamic=is_dynamic,
+                                 from_id_header_override=from_column, to_id_header_override=to_column)
+            csr = m.ss.export('csr', sort=True)
+
+            writer.write_edge(prefix, is_dynamic, file_paths, csr['indptr'], csr['col_indices'])
+            logger.info("Converted %s (%d edges)" % (prefix, m.nvals))
+
+        for vertex_type in vertex_types.values():
+            writer.write_vertex_ids(vertex_type.name, vertex_type.mapping.ids)
+    except BaseException:
+        writer.abort()
+        raise
+
+    writer.close()
@@ -0,0 +1,370 @@
+"""
+Synthetic dataset with the file layout of the LDBC SNB datagen csv output, for tests and for measuring how the load
+and the queries scale without the datagen.
+
+Usage: python -m ldbc_snb_grblas.generator <outdir> [--edges 100000] [--seed 0] [--parts 1] [--bindings 5]
+
+Every vertex and edge file read by the queries is written to the 'static' and 'dynamic' folders, pipe-delimited
+with the headers the queries expect. The number of persons is derived from the requested number of edges (about
+EDGES_PER_PERSON per person), every other vertex and edge count is proportional to it. The degrees follow power laws:
+the endpoints of the edges are drawn with Zipf-like weights, so a few persons, forums, tags and messages get most of
+the edges, like in the real datasets.
+
+A parameter file (see ldbc_snb_grblas.bench) is written for each query as well, with bindings which have results
+in the generated data.
+"""
+
+import logging
+import os
+import sys
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+from os import path
+
+import numpy as np
+import pandas as pd
+
+from ldbc_snb_grblas.bench import DEFAULT_QUERIES, PARAMS_DIR, params_file_name
+from ldbc_snb_grblas.loader import DEFAULT_DELIMITER
+from ldbc_snb_grblas.util import EPOCH, to_epoch_millis
+
+logger = logging.getLogger(__name__)
+
+# exponent of the Zipf-like weights of the edge endpoints, the degree distributions have a power-law tail with
+# exponent 1 + 1 / DEGREE_SKEW
+DEGREE_SKEW = 0.7
+
+KNOWS_PER_PERSON = 10
+INTERESTS_PER_PERSON = 4
+FORUMS_PER_PERSON = 0.2
+MEMBERS_PER_FORUM = 30
+POSTS_PER_PERSON = 8
+COMMENTS_PER_PERSON = 16
+LIKES_PER_PERSON = 20
+EXTRA_TAGS_PER_MESSAGE = 0.5  # every message has a tag, some of them more
+REPLY_TO_POST_RATIO = 0.5
+
+EDGES_PER_PERSON = (
+    KNOWS_PER_PERSON + 1 + INTERESTS_PER_PERSON + LIKES_PER_PERSON  # knows, isLocatedIn, hasInterest, likes
+    + FORUMS_PER_PERSON * (1 + MEMBERS_PER_FORUM)  # hasModerator, hasMember
+    + POSTS_PER_PERSON * (3 + EXTRA_TAGS_PER_MESSAGE)  # containerOf, hasCreator, hasTag
+    + COMMENTS_PER_PERSON * (3 + EXTRA_TAGS_PER_MESSAGE)  # replyOf, hasCreator, hasTag
+)
+MIN_PERSONS = 50
+
+CONTINENTS = ['Africa', 'Asia', 'Europe', 'North_America', 'Oceania', 'South_America']
+COUNTRIES = 111
+MAX_CITIES = 1343
+TAG_CLASSES = 71
+MAX_TAGS = 16080
+
+FIRST_NAMES = ['Ali', 'Anna', 'Bela', 'Carlos', 'Chen', 'Eva', 'Hans', 'Ivan', 'Jan', 'John', 'Karim', 'Lei', 'Maria',
+               'Mehmet', 'Olga', 'Pedro', 'Rahul', 'Sara', 'Wei', 'Yang']
+LAST_NAMES = ['Garcia', 'Kovacs', 'Kumar', 'Li', 'Muller', 'Nagy', 'Nguyen', 'Novak', 'Petrov', 'Silva', 'Smith',
+              'Wang', 'Yilmaz', 'Zhang']
+LOREM = ('About the history of the city, its people and their music. Have you ever seen the mountains in the spring? '
+         'Maybe next year we all go there together, with the children and the dogs. ')
+
+START_DATE = datetime(2010, 1, 1, tzinfo=EPOCH.tzinfo)
+END_DATE = datetime(2013, 1, 1, tzinfo=EPOCH.tzinfo)
+ID_GAP = 8  # ids are increasing, but not contiguous
+WRITE_BLOCK_SIZE = 1000000
+
+PARAM_HEADERS = {
+    3: ['tagClass', 'country'],
+    4: ['country'],
+    5: ['tag'],
+    7: ['tag'],
+    9: ['startDate', 'endDate'],
+    11: ['country'],
+    18: ['person', 'tag'],
+    19: ['city1', 'city2'],
+    114: ['startDate', 'endDate'],
+}
+
+
+def _zipf_cdf(rng, n):
+    """:return: cumulative weights of n elements, the weight of the element with rank r is r^-DEGREE_SKEW."""
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -DEGREE_SKEW
+    return np.cumsum(rng.permutation(weights))
+
+
+def _sample(rng, cdf, size):
+    """:return: 'size' indexes drawn according to the cumulative weights."""
+    indexes = np.searchsorted(cdf, rng.random(size) * cdf[-1], side='right')
+    return np.minimum(indexes, len(cdf) - 1)
+
+
+def _unique_edges(sources, targets, ntargets):
+    """:return: the edges without duplicates, ordered by source and target."""
+    keys = np.unique(sources.astype(np.int64) * ntargets + targets)
+    return keys // ntargets, keys % ntargets
+
+
+def _ids(rng, n, start=1):
+    return start + np.cumsum(rng.integers(1, ID_GAP + 1, n)) - 1
+
+
+def _dates(rng, n):
+    """:return: sorted random epoch millis between START_DATE and END_DATE."""
+    return np.sort(rng.integers(to_epoch_millis(START_DATE), to_epoch_millis(END_DATE), n))
+
+
+def _format_dates(millis):
+    """:return: the dates in the format of the datagen, e.g. 2010-01-01T00:00:00.000+0000."""
+    return np.char.add(millis.astype('datetime64[ms]').astype(str), '+0000')
+
+
+def _names(prefix, n):
+    return np.array([f'{prefix}{i}' for i in range(n)], dtype=object)
+
+
+def _write_csv(directory, prefix, header, columns, parts, date_columns=()):
+    """
+    Writes the rows to 'parts' files named <prefix>_<part>_0.csv, each with the header.
+    :param date_columns: indexes of the columns of epoch millis, which are written as dates block by block.
+    """
+    bounds = np.linspace(0, len(columns[0]), parts + 1).astype(np.int64)
+
+    for part, (part_start, part_end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        with open(path.join(directory, f'{prefix}_{part}_0.csv'), 'w', newline='') as f:
+            f.write(DEFAULT_DELIMITER.join(header) + '\n')
+
+            for start in range(part_start, part_end, WRITE_BLOCK_SIZE):
+                end = min(start + WRITE_BLOCK_SIZE, part_end)
+                frame = pd.DataFrame({i: _format_dates(column[start:end]) if i in date_columns else column[start:end]
+                                      for i, column in enumerate(columns)})
+                frame.to_csv(f, sep=DEFAULT_DELIMITER, header=False, index=False)
+
+
+def _pick(rng, weights, size):
+    """:return: 'size' indexes with positive weight, drawn without replacement if there are enough of them."""
+    weights = np.asarray(weights, dtype=np.float64)
+    replace = np.count_nonzero(weights) < size
+    return rng.choice(len(weights), size, replace=replace, p=weights / weights.sum())
+
+
+def _date_windows(rng, size):
+    """:return: list of [start date, end date] parameters of date range queries."""
+    windows = []
+    for _ in range(size):
+        start = START_DATE + timedelta(days=int(rng.integers(0, (END_DATE - START_DATE).days - 90)))
+        end = start + timedelta(days=int(rng.integers(7, 90)))
+        windows.append([start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')])
+
+    return windows
+
+
+def generate(out_dir, edges=100000, *, seed=0, parts=1, bindings=5):
+    """
+    Writes a synthetic dataset.
+
+    :param out_dir: output folder, created if it doesn't exist.
+    :param edges: approximate total number of edges, the scale of the dataset.
+    :param seed: seed of the random generator, the same seed gives the same files.
+    :param parts: number of part files of every vertex and edge type.
+    :param bindings: number of parameter bindings of each query.
+    :return: dict of the number of rows written: file prefix -> count.
+    """
+    rng = np.random.default_rng(seed)
+    counts = {}
+
+    static_dir = path.join(out_dir, 'static')
+    dynamic_dir = path.join(out_dir, 'dynamic')
+    params_dir = path.join(out_dir, PARAMS_DIR)
+    for directory in (static_dir, dynamic_dir, params_dir):
+        os.makedirs(directory, exist_ok=True)
+
+    def write(is_dynamic, prefix, header, columns):
+        logger.info("Writing %s (%d rows)" % (prefix, len(columns[0])))
+        date_columns = [i for i, name in enumerate(header) if name.endswith('Date')]
+        _write_csv(dynamic_dir if is_dynamic else static_dir, prefix, header, columns, parts, date_columns)
+        counts[prefix] = len(columns[0])
+
+    npersons = max(MIN_PERSONS, int(edges / EDGES_PER_PERSON))
+    nforums = max(1, int(npersons * FORUMS_PER_PERSON))
+    nposts = npersons * POSTS_PER_PERSON
+    ncomments = npersons * COMMENTS_PER_PERSON
+    ncities = min(MAX_CITIES, max(COUNTRIES, npersons // 10))
+    ntags = min(MAX_TAGS, max(100, npersons // 10))
+
+    # static part: places (continents, countries, cities), tags and tag classes, ids are their indexes
+    ncontinents = len(CONTINENTS)
+    country_continent = rng.integers(0, ncontinents, COUNTRIES)
+    # every country has a city, the rest of the cities are distributed by a power law
+    city_country = np.concatenate([np.arange(COUNTRIES), _sample(rng, _zipf_cdf(rng, COUNTRIES), ncities - COUNTRIES)])
+
+    country_ids = ncontinents + np.arange(COUNTRIES)
+    city_ids = ncontinents + COUNTRIES + np.arange(ncities)
+    city_names = _names('City', ncities)
+    country_names = _names('Country', COUNTRIES)
+
+    write(False, 'place', ['id', 'name', 'type'], [
+        np.arange(ncontinents + COUNTRIES + ncities),
+        np.concatenate([np.array(CONTINENTS, dtype=object), country_names, city_names]),
+        np.repeat(np.array(['continent', 'country', 'city'], dtype=object), [ncontinents, COUNTRIES, ncities]),
+    ])
+    write(False, 'place_isPartOf_place', ['Place.id', 'Place.id'], [
+        np.concatenate([country_ids, city_ids]),
+        np.concatenate([country_continent, country_ids[city_country]]),
+    ])
+
+    tag_names = _names('Tag', ntags)
+    tag_class_names = _names('TagClass', TAG_CLASSES)
+    tag_tag_class = _sample(rng, _zipf_cdf(rng, TAG_CLASSES), ntags)
+    write(False, 'tagclass', ['id', 'name'], [np.arange(TAG_CLASSES), tag_class_names])
+    write(False, 'tag', ['id', 'name'], [np.arange(ntags), tag_names])
+    write(False, 'tag_hasType_tagclass', ['Tag.id', 'TagClass.id'], [np.arange(ntags), tag_tag_class])
+
+    # persons
+    person_ids = _ids(rng, npersons)
+    person_cdf = _zipf_cdf(rng, npersons)  # activity: friends, messages, likes...
+    city_cdf = _zipf_cdf(rng, ncities)
+    tag_cdf = _zipf_cdf(rng, ntags)
+
+    person_city = _sample(rng, city_cdf, npersons)
+    write(True, 'person', ['id', 'firstName', 'lastName', 'gender', 'creationDate'], [
+        person_ids,
+        np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), npersons)],
+        np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), npersons)],
+        np.array(['female', 'male'], dtype=object)[rng.integers(0, 2, npersons)],
+        _dates(rng, npersons),
+    ])
+    write(True, 'person_isLocatedIn_place', ['Person.id', 'Place.id'], [person_ids, city_ids[person_city]])
+
+    # undirected, every friendship is written once
+    sources = _sample(rng, person_cdf, npersons * KNOWS_PER_PERSON)
+    targets = _sample(rng, person_cdf, npersons * KNOWS_PER_PERSON)
+    sources, targets = _unique_edges(np.minimum(sources, targets), np.maximum(sources, targets), npersons)
+    sources, targets = sources[sources != targets], targets[sources != targets]
+    knows_degrees = np.bincount(np.concatenate([sources, targets]), minlength=npersons)
+    write(True, 'person_knows_person', ['Person1.id', 'Person2.id', 'creationDate'], [
+        person_ids[sources], person_ids[targets], _dates(rng, len(sources)),
+    ])
+
+    sources, targets = _unique_edges(np.arange(npersons).repeat(INTERESTS_PER_PERSON),
+                                     _sample(rng, tag_cdf, npersons * INTERESTS_PER_PERSON), ntags)
+    interest_counts = np.bincount(targets, minlength=ntags)
+    write(True, 'person_hasInterest_tag', ['Person.id', 'Tag.id'], [person_ids[sources], targets])
+
+    # forums
+    forum_ids = _ids(rng, nforums)
+    forum_cdf = _zipf_cdf(rng, nforums)
+    write(True, 'forum', ['id', 'title', 'creationDate'], [
+        forum_ids, _names('Forum', nforums), _dates(rng, nforums),
+    ])
+    write(True, 'forum_hasModerator_person', ['Forum.id', 'Person.id'], [
+        forum_ids, person_ids[_sample(rng, person_cdf, nforums)],
+    ])
+    sources, targets = _unique_edges(_sample(rng, forum_cdf, nforums * MEMBERS_PER_FORUM),
+                                     _sample(rng, person_cdf, nforums * MEMBERS_PER_FORUM), npersons)
+    write(True, 'forum_hasMember_person', ['Forum.id', 'Person.id', 'joinDate'], [
+        forum_ids[sources], person_ids[targets], _dates(rng, len(sources)),
+    ])
+
+    # messages: posts and comments have distinct ids, in the order of their creation dates
+    post_ids = _ids(rng, nposts)
+    comment_ids = _ids(rng, ncomments, start=post_ids[-1] + 1)
+    lorem = np.array([LOREM[:length] for length in range(len(LOREM) + 1)], dtype=object)
+
+    for name, ids in (('post', post_ids), ('comment', comment_ids)):
+        lengths = rng.integers(10, len(LOREM) + 1, len(ids))
+        write(True, name, ['id', 'creationDate', 'content', 'length'], [
+            ids, _dates(rng, len(ids)), lorem[lengths], lengths,
+        ])
+
+    write(True, 'forum_containerOf_post', ['Forum.id', 'Post.id'], [
+        forum_ids[_sample(rng, forum_cdf, nposts)], post_ids,
+    ])
+
+    post_cdf = _zipf_cdf(rng, nposts)
+    comment_cdf = _zipf_cdf(rng, ncomments)
+
+    # the parent of a comment is a post or an earlier comment, so the reply trees have no cycles
+    replies_to_post = rng.random(ncomments) < REPLY_TO_POST_RATIO
+    replies_to_post[0] = True
+    parent_comments = _sample(rng, comment_cdf, ncomments)
+    later = parent_comments >= np.arange(ncomments)
+    parent_comments[later] = parent_comments[later] * np.flatnonzero(later) // ncomments
+
+    write(True, 'comment_replyOf_post', ['Comment.id', 'ParentPost.id'], [
+        comment_ids[replies_to_post], post_ids[_sample(rng, post_cdf, np.count_nonzero(replies_to_post))],
+    ])
+    write(True, 'comment_replyOf_comment', ['Comment.id', 'ParentComment.id'], [
+        comment_ids[~replies_to_post], comment_ids[parent_comments[~replies_to_post]],
+    ])
+
+    tag_counts = np.zeros(ntags, dtype=np.int64)
+    for name, ids, cdf in (('post', post_ids, post_cdf), ('comment', comment_ids, comment_cdf)):
+        write(True, f'{name}_hasCreator_person', [f'{name.capitalize()}.id', 'Person.id'], [
+            ids, person_ids[_sample(rng, person_cdf, len(ids))],
+        ])
+
+        extra_tags = int(len(ids) * EXTRA_TAGS_PER_MESSAGE)
+        sources, targets = _unique_edges(np.concatenate([np.arange(len(ids)), _sample(rng, cdf, extra_tags)]),
+                                         _sample(rng, tag_cdf, len(ids) + extra_tags), ntags)
+        tag_counts += np.bincount(targets, minlength=ntags)
+        write(True, f'{name}_hasTag_tag', [f'{name.capitalize()}.id', 'Tag.id'], [ids[sources], targets])
+
+        # the likes are divided between posts and comments by their numbers
+        nlikes = npersons * LIKES_PER_PERSON * len(ids) // (nposts + ncomments)
+        sources, targets = _unique_edges(_sample(rng, person_cdf, nlikes), _sample(rng, cdf, nlikes), len(ids))
+        write(True, f'person_likes_{name}', ['Person.id', f'{name.capitalize()}.id', 'creationDate'], [
+            person_ids[sources], ids[targets], _dates(rng, len(sources)),
+        ])
+
+    # parameters: the countries, cities and tags with more persons and messages are picked more likely
+    city_persons = np.bincount(person_city, minlength=ncities)
+    country_persons = np.bincount(city_country, weights=city_persons, minlength=COUNTRIES)
+    tag_class_tags = np.bincount(tag_tag_class, weights=tag_counts, minlength=TAG_CLASSES)
+
+    countries = country_names[_pick(rng, country_persons, bindings)]
+    params = {
+        3: list(zip(tag_class_names[_pick(rng, tag_class_tags, bindings)], countries)),
+        4: [[country] for country in countries],
+        5: [[tag] for tag in tag_names[_pick(rng, tag_counts, bindings)]],
+        7: [[tag] for tag in tag_names[_pick(rng, tag_counts, bindings)]],
+        9: _date_windows(rng, bindings),
+        11: [[country] for country in countries],
+        18: list(zip(person_ids[_pick(rng, knows_degrees, bindings)], tag_names[_pick(rng, interest_counts, bindings)])),
+        19: [city_ids[_pick(rng, city_persons, 2)] for _ in range(bindings)],
+        114: _date_windows(rng, bindings),
+    }
+
+    for query_id in DEFAULT_QUERIES:
+        with open(path.join(params_dir, params_file_name(query_id)), 'w') as f:
+            f.write(DEFAULT_DELIMITER.join(PARAM_HEADERS[query_id]) + '\n')
+            for binding in params[query_id]:
+                f.write(DEFAULT_DELIMITER.join(map(str, binding)) + '\n')
+
+    return counts
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        prog='python -m ldbc_snb_grblas.generator',
+        description="Generate a synthetic dataset with the layout of the LDBC SNB csv files."
+    )
+
+    parser.add_argument("outdir", help="Output folder.")
+    parser.add_argument("--edges", type=int, default=100000,
+                        help=f"Approximate total number of edges (about {EDGES_PER_PERSON:.0f} per person).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator.")
+    parser.add_argument("--parts", type=int, default=1, help="Number of part files of each vertex and edge type.")
+    parser.add_argument("--bindings", type=int, default=5, help="Number of parameter bindings of each query.")
+    args = parser.parse_args(argv)
+
+    if args.edges < 1 or args.parts < 1 or args.bindings < 1:
+        parser.error("--edges, --parts and --bindings must be positive")
+
+    logging.basicConfig(level=logging.INFO)
+
+    counts = generate(args.outdir, args.edges, seed=args.seed, parts=args.parts, bindings=args.bindings)
+    print(f"{sum(count for prefix, count in counts.items() if '_' in prefix)} edges written to "
+          f"'{args.outdir}'")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
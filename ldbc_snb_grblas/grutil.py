@@ -1,4 +1,83 @@
+from os import environ
+
+import numpy as np
+from grblas import binary, dtypes, semiring, unary
+from grblas.mask import StructuralMask, ValueMask
 from grblas.matrix import Matrix
+from grblas.vector import Vector
+
+from ldbc_snb_grblas.logger import traced
+from ldbc_snb_grblas.util import find_roots
+
+TREE_ENGINE_ENV = 'LDBC_SNB_GRBLAS_TREE_ENGINE'
+TREE_ENGINES = ('bfs', 'roots')
+
+
+def _block_sizes(blocks, axis):
+    """
+    :return: list of the heights (axis 0) or widths (axis 1) of the block rows or block columns of 'blocks'.
+    """
+    lines = blocks if axis == 0 else list(zip(*blocks))
+    sizes = []
+    for position, line in enumerate(lines):
+        line_sizes = {(block.nrows if axis == 0 else block.ncols) for block in line if block is not None}
+        if len(line_sizes) != 1:
+            kind = 'row' if axis == 0 else 'column'
+            raise ValueError(f"Blocks of block {kind} {position} must be given and have the same number of "
+                             f"{kind}s: {sorted(line_sizes)}")
+        sizes.append(line_sizes.pop())
+
+    return sizes
+
+
+def _concat_tuples(blocks, dtype):
+    """
+    :return: rows, columns and values of the matrix built from 'blocks' (see concat_blocks) and its dimensions.
+    """
+    if not blocks or len({len(block_row) for block_row in blocks}) != 1 or not blocks[0]:
+        raise ValueError("Blocks must be a non-empty list of block rows of the same length")
+
+    row_offsets = np.cumsum([0] + _block_sizes(blocks, 0))
+    col_offsets = np.cumsum([0] + _block_sizes(blocks, 1))
+
+    rows, cols, values = [], [], []
+    for i, block_row in enumerate(blocks):
+        for j, block in enumerate(block_row):
+            if block is None or block.nvals == 0:
+                continue
+
+            block_rows, block_cols, block_values = block.to_values(dtype=dtype)
+            rows.append(block_rows + np.uint64(row_offsets[i]))
+            cols.append(block_cols + np.uint64(col_offsets[j]))
+            values.append(block_values)
+
+    nrows, ncols = int(row_offsets[-1]), int(col_offsets[-1])
+    if not values:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint64), np.empty(0, dtype=dtype.np_type), \
+            nrows, ncols
+
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(values), nrows, ncols
+
+
+def concat_blocks(blocks, dtype=None):
+    """
+    Creates a matrix from a 2D grid of blocks, e.g. [[a, b], [c, d]], like numpy.block. None is an empty block,
+    but every block row and block column needs at least one matrix to determine its size.
+
+    The tuples of the blocks are offset and built into the result in one step, which is much faster than resizing
+    and assigning submatrices.
+
+    :param blocks: list of block rows, each of them a list of matrices (or None).
+    :param dtype: dtype of the result, by default the common dtype of the blocks.
+    :return:
+    """
+    if dtype is None:
+        for block in (block for block_row in blocks for block in block_row if block is not None):
+            dtype = block.dtype if dtype is None else dtypes.unify(dtype, block.dtype)
+    dtype = dtypes.lookup_dtype(dtype) if dtype is not None else dtypes.BOOL
+
+    rows, cols, values, nrows, ncols = _concat_tuples(blocks, dtype)
+    return Matrix.from_values(rows, cols, values, nrows=nrows, ncols=ncols, dtype=dtype)
 
 
 def merge_matrix(a: Matrix, b: Matrix, *, create_new=False, row_wise=True):
@@ -12,27 +91,268 @@ def merge_matrix(a: Matrix, b: Matrix, *, create_new=False, row_wise=True):
     :param row_wise: if True 'b' matrix will be added as rows to 'a', otherwise as columns.
     :return:
     """
-
-    result = a.dup() if create_new else a
-
     if row_wise:
         if a.ncols != b.ncols:
             raise ValueError(f"Row-wise merge is not possible as a.ncols != b.ncols. "
                              f"{a.ncols} != {b.ncols}")
-
-        a_nrows = a.nrows
-
-        result.resize(a.nrows + b.nrows, a.ncols)
-        result[a_nrows:a_nrows+b.nrows, :] = b
+        blocks = [[a], [b]]
 
     else:
         if a.nrows != b.nrows:
             raise ValueError(f"Row-wise merge is not possible as a.nrows != b.nrows. "
                              f"{a.nrows} != {b.nrows}")
+        blocks = [[a, b]]
 
-        a_ncols = a.ncols
+    rows, cols, values, nrows, ncols = _concat_tuples(blocks, a.dtype)
 
-        result.resize(a.nrows, a.ncols + b.ncols)
-        result[:, a_ncols:a_ncols + b.ncols] = b
+    if create_new:
+        return Matrix.from_values(rows, cols, values, nrows=nrows, ncols=ncols, dtype=a.dtype)
+
+    # the tuples of 'a' are already extracted, so it can be rebuilt in place
+    a.build(rows, cols, values, clear=True, nrows=nrows, ncols=ncols)
+    return a
+
+
+def _index_list(indexes):
+    """
+    Converts indexes (set, list, numpy array, or a boolean numpy array where True marks the indexes) to a sorted
+    array of unique indexes for grblas indexing.
+    """
+    if isinstance(indexes, np.ndarray):
+        if indexes.dtype == np.bool_:
+            return np.flatnonzero(indexes).astype(np.uint64)
+
+        return np.unique(indexes).astype(np.uint64)
+
+    return np.array(sorted({int(i) for i in indexes}), dtype=np.uint64)
+
+
+def mask_matrix(m: Matrix, rows=None, cols=None):
+    """
+    Creates a new matrix with the same dimensions as 'm', which contains only those entries of 'm' whose row index
+    is in 'rows' and column index is in 'cols'.
+
+    This is the in-memory equivalent of loading an edge with 'lmask' and 'rmask', so it can be used when the
+    matrix is already loaded without any mask.
+
+    :param m:
+    :param rows: iterable of row indexes (or boolean array) to keep, or None to keep all rows.
+    :param cols: iterable of column indexes (or boolean array) to keep, or None to keep all columns.
+    :return:
+    """
+    rows = slice(None) if rows is None else _index_list(rows)
+    cols = slice(None) if cols is None else _index_list(cols)
+
+    result = Matrix.new(m.dtype, m.nrows, m.ncols, name=m.name)
+    result[rows, cols] << m[rows, cols].new()
 
     return result
+
+
+def diagonal_matrix(n, value=1, dtype=None):
+    """
+    Creates an n x n matrix which has 'value' in its diagonal, built in a single bulk operation.
+
+    :param n: number of rows and columns.
+    :param value: value of the diagonal entries.
+    :param dtype: grblas dtype of the matrix, by default it is deduced from 'value'.
+    :return:
+    """
+    indexes = np.arange(n, dtype=np.uint64)
+    return Matrix.from_values(indexes, indexes, np.full(n, value), nrows=n, ncols=n, dtype=dtype)
+
+
+def set_diagonal(m: Matrix, value):
+    """
+    Sets every diagonal entry of the square matrix 'm' to 'value' in place (overwriting the existing entries).
+
+    :param m:
+    :param value:
+    :return: 'm'
+    """
+    if m.nrows != m.ncols:
+        raise ValueError(f"Diagonal can be set only for square matrices. {m.nrows} != {m.ncols}")
+
+    m(accum=binary.second) << diagonal_matrix(m.nrows, value, dtype=m.dtype)
+
+    return m
+
+
+def reciprocal(m):
+    """Returns a new matrix (or vector) containing the reciprocal of the entries of 'm' (built-in MINV operator)."""
+    return m.apply(unary.minv).new()
+
+
+def scale(m, factor):
+    """Returns a new matrix (or vector) with the entries of 'm' multiplied by the scalar 'factor'."""
+    return m.apply(binary.times, right=factor).new()
+
+
+# a level of a breadth-first search is pulled instead of pushed when its frontier has more entries than this fraction
+# of the unvisited ones (the usual switching point of direction-optimizing BFS)
+PULL_RATIO = 1 / 14
+
+
+@traced()
+def reachable(frontier: Matrix, adjacency: Matrix, transposed: Matrix = None, *, pull_ratio=PULL_RATIO):
+    """
+    Level-synchronous breadth-first search from several sets of start vertices at once, e.g. the closure of the
+    reply trees below the direct replies of every post.
+
+    Every level is masked by the vertices already visited in the same row, so each vertex is expanded once per row,
+    even if the graph has cycles. A sparse level is pushed along the rows of 'adjacency', a dense one is pulled with
+    dot products against the rows of 'transposed', which is calculated only once, at the first pulled level.
+
+    :param frontier: matrix of the start vertices, one row for each search.
+    :param adjacency: square matrix of the edges, an entry (i, j) for the edge i -> j.
+    :param transposed: transpose of 'adjacency' if it is already available, e.g. the loaded matrix of which
+                       'adjacency' was created as the transpose.
+    :param pull_ratio: see PULL_RATIO.
+    :return: INT64 matrix with 1 for every vertex reached from the start vertices of the row (including them).
+    """
+    visited = frontier.apply(unary.one).new(dtype=dtypes.INT64)
+    frontier = visited.dup()
+    size = visited.nrows * visited.ncols
+
+    while frontier.nvals > 0:
+        if frontier.nvals > pull_ratio * (size - visited.nvals):
+            if transposed is None:
+                transposed = adjacency.T.new()
+            step = frontier.mxm(transposed.T, op=semiring.any_pair)
+        else:
+            step = frontier.mxm(adjacency, op=semiring.any_pair)
+
+        frontier = Matrix.new(visited.dtype, visited.nrows, visited.ncols)
+        frontier(mask=~StructuralMask(visited)) << step
+        visited(accum=binary.plus) << frontier
+
+    return visited
+
+
+def tree_engine(engine=None):
+    """
+    :param engine: 'bfs' or 'roots', see descendant_counts.
+    :return: 'engine' if given, otherwise the value of the LDBC_SNB_GRBLAS_TREE_ENGINE environment variable, 'bfs' by
+             default.
+    """
+    engine = engine or environ.get(TREE_ENGINE_ENV) or TREE_ENGINES[0]
+    if engine not in TREE_ENGINES:
+        raise ValueError(f"Unknown tree engine: '{engine}', it should be one of {', '.join(TREE_ENGINES)}")
+
+    return engine
+
+
+@traced()
+def descendant_counts(child_root: Matrix, child_parent: Matrix, engine=None):
+    """
+    Counts the vertices of the trees hanging from roots, e.g. the comments of the thread of every post, where the
+    comments reply to a post (child_root) or to another comment (child_parent).
+
+    There are two engines, which can be compared by benchmarking them (see tree_engine):
+    - 'bfs': breadth-first search from the children of all roots at once (see reachable), a root x vertex matrix
+      of the visited vertices, which is reduced at the end.
+    - 'roots': the root of every vertex is found by pointer jumping on an array of parent indexes (see find_roots),
+      so the memory use is proportional to the number of vertices, and the counts are calculated in one pass.
+
+    :param child_root: matrix with an entry (i, r) if the parent of vertex i is the root r.
+    :param child_parent: square matrix with an entry (i, j) if the parent of vertex i is vertex j. Every vertex can
+                         have only one parent in the two matrices together.
+    :param engine: 'bfs' or 'roots', see tree_engine.
+    :return: INT64 vector of the number of vertices below each root, the roots without children are not stored.
+    """
+    if tree_engine(engine) == 'bfs':
+        # the transposed edges point from the parents to the children
+        descendants = reachable(child_root.T.new(), child_parent.T.new(), child_parent)
+        return descendants.reduce_rows().new()
+
+    nvertices, nroots = child_root.nrows, child_root.ncols
+
+    # vertices without a parent get the extra element as parent, the roots and the extra element are their own parents
+    parents = np.arange(nvertices + nroots + 1, dtype=np.int64)
+    parents[:nvertices] = nvertices + nroots
+    rows, columns, _ = child_parent.to_values()
+    parents[rows.astype(np.int64)] = columns.astype(np.int64)
+    rows, columns, _ = child_root.to_values()
+    parents[rows.astype(np.int64)] = nvertices + columns.astype(np.int64)
+
+    roots = find_roots(parents)[:nvertices]
+
+    # vertices on a cycle or in a tree without root have a root outside of the root range
+    counts = np.bincount(roots[(roots >= nvertices) & (roots < nvertices + nroots)] - nvertices, minlength=nroots)
+    indexes = np.flatnonzero(counts)
+
+    return Vector.from_values(indexes, counts[indexes], size=nroots, dtype=dtypes.INT64)
+
+
+@traced()
+def shortest_paths(weights: Matrix, sources):
+    """
+    Calculates the shortest paths from several sources at once (batched single-source shortest paths).
+
+    Frontier based Bellman-Ford: in every round only the edges of those vertices are relaxed whose distance changed
+    in the previous round, so later rounds touch only the updated entries instead of the whole distance matrix.
+    Weights must be non-negative.
+
+    :param weights: square matrix of edge weights.
+    :param sources: iterable of source vertex indexes.
+    :return: matrix with a row for each source (in the order of 'sources') containing the distances of the
+             reachable vertices. The distance of a source from itself is 0.
+    """
+    sources = np.fromiter(sources, dtype=np.uint64)
+
+    distances = Matrix.from_values(range(len(sources)), sources, np.zeros(len(sources)),
+                                   nrows=len(sources), ncols=weights.ncols, dtype=weights.dtype)
+    frontier = distances.dup()
+
+    while frontier.nvals > 0:
+        candidates = frontier.mxm(weights, op=semiring.min_plus).new()
+
+        # the next frontier: vertices reached for the first time, or on a shorter path than before
+        improved = candidates.ewise_mult(distances, op=binary.lt).new()
+        frontier = Matrix.new(distances.dtype, distances.nrows, distances.ncols)
+        frontier(mask=~StructuralMask(distances)) << candidates
+        frontier(mask=ValueMask(improved)) << candidates
+
+        distances(accum=binary.min) << frontier
+
+    return distances
+
+
+def degree_ordered_lower_triangle(m: Matrix):
+    """
+    Relabels the vertices of an undirected graph in decreasing order of their degrees, and returns the strictly
+    lower triangular part of the relabeled adjacency matrix. Every edge is kept once, in the row of its endpoint with
+    the lower degree, so no row has more than about sqrt(2 * nvals) entries, even in the rows of the hubs.
+
+    :param m: symmetric adjacency matrix, the values are ignored.
+    :return: INT64 matrix of the same dimensions, with 1 for every edge.
+    """
+    rows, cols, _ = m.to_values()
+    rows, cols = rows.astype(np.int64), cols.astype(np.int64)
+
+    degrees = np.bincount(rows, minlength=m.nrows)
+    rank = np.empty(m.nrows, dtype=np.int64)
+    rank[np.argsort(-degrees, kind='stable')] = np.arange(m.nrows)
+
+    rows, cols = rank[rows], rank[cols]
+    lower = rows > cols
+
+    return Matrix.from_values(rows[lower], cols[lower], np.ones(np.count_nonzero(lower), dtype=np.int64),
+                              nrows=m.nrows, ncols=m.ncols, dtype=dtypes.INT64)
+
+
+@traced()
+def count_triangles(m: Matrix):
+    """
+    Counts the triangles of an undirected graph with the masked dot product method (Sandia/Cohen): with L the degree
+    ordered lower triangle (see degree_ordered_lower_triangle), the masked product (L * L') .* L has the number of
+    common lower neighbours at every edge, so its sum counts each triangle once. The mask is applied during the
+    multiplication, only the entries of L are calculated, so the memory use is proportional to the number of edges.
+
+    :param m: symmetric adjacency matrix, the values are ignored.
+    :return: number of triangles.
+    """
+    lower = degree_ordered_lower_triangle(m)
+    common_neighbours = lower.mxm(lower.T, op=semiring.plus_pair).new(mask=StructuralMask(lower))
+
+    return common_neighbours.reduce_scalar().new().value or 0
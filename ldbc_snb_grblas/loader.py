@@ -1,63 +1,235 @@
 import csv
 import errno
-
+import io
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
 from grblas import dtypes
-from itertools import repeat
 
 import logging
+from os import environ
 from os import strerror
 from os import path
 
 from grblas.matrix import Matrix
 
+from ldbc_snb_grblas.binary import BinaryGraph
+from ldbc_snb_grblas.cache import GraphCache, fingerprint
+from ldbc_snb_grblas.logger import current_span, traced
+from ldbc_snb_grblas.predicates import IsIn
+from ldbc_snb_grblas.properties import PropertyTable, StringColumn
+from ldbc_snb_grblas.util import parse_dates
+
 
 class LoadError(Exception):  # fixme
     pass
 
 
+class IdMapping:
+    """
+    Compact, array-backed mapping between the original (sparse) ids and the logical (dense) indexes of a vertex type.
+
+    The ids are stored in index order in an int64 array, lookups are done with binary search on a sorted copy, so
+    the mapping costs 24 bytes per vertex instead of a Python dict and list entry.
+    """
+
+    def __init__(self, ids=None):
+        ids = np.asarray(ids if ids is not None else [], dtype=np.int64)
+
+        self._ids = ids.copy()  # index -> id, may have extra capacity at the end
+        self.length = len(ids)
+
+        # sorted ids and the corresponding indexes, used for id -> index lookups.
+        # These are built lazily on the first lookup, then kept up to date by extend.
+        self._sorted_ids = None
+        self._sorted_indexes = None
+
+    @property
+    def ids(self):
+        """Array of all ids ordered by index (read-only view)."""
+        view = self._ids[:self.length]
+        view.flags.writeable = False
+        return view
+
+    def _sort(self):
+        if self._sorted_ids is None:
+            self._sorted_indexes = np.argsort(self._ids[:self.length], kind='stable')
+            self._sorted_ids = self._ids[self._sorted_indexes]
+
+    def extend(self, new_ids):
+        """
+        Appends ids to the end of the mapping. The ids must not be present in the mapping yet.
+
+        The lookup arrays are updated by merging the sorted new ids into them, which costs O(n + k log k) for k new
+        ids instead of sorting all n ids again.
+
+        :param new_ids: numpy array of ids.
+        """
+        new_ids = np.asarray(new_ids, dtype=np.int64)
+        start = self.length
+
+        required = start + len(new_ids)
+        if required > len(self._ids):
+            # grow geometrically, so the ids are copied only O(log n) times
+            grown = np.empty(max(required, 2 * len(self._ids)), dtype=np.int64)
+            grown[:start] = self._ids[:start]
+            self._ids = grown
+
+        self._ids[start:required] = new_ids
+        self.length = required
+
+        if self._sorted_ids is not None and len(new_ids):
+            order = np.argsort(new_ids, kind='stable')
+            positions = np.searchsorted(self._sorted_ids, new_ids[order])
+            self._sorted_ids = np.insert(self._sorted_ids, positions, new_ids[order])
+            self._sorted_indexes = np.insert(self._sorted_indexes, positions, start + order)
+
+    def snapshot(self):
+        """
+        Returns a mapping of the current ids, which is not affected by later extends of this one. The arrays are
+        shared, as extend never modifies the ids below the current length nor the sorted arrays in place.
+        """
+        self._sort()
+
+        snapshot = IdMapping()
+        # without spare capacity, extending the snapshot itself copies the ids instead of writing into this mapping
+        snapshot._ids = self._ids[:self.length]
+        snapshot.length = self.length
+        snapshot._sorted_ids = self._sorted_ids
+        snapshot._sorted_indexes = self._sorted_indexes
+
+        return snapshot
+
+    def lookup(self, ids):
+        """
+        Translates ids to indexes without modifying the mapping.
+
+        :param ids: numpy array of ids.
+        :return: numpy int64 array of indexes, -1 for ids not present in the mapping.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        self._sort()
+
+        if not self.length:
+            return np.full(len(ids), -1, dtype=np.int64)
+
+        positions = np.searchsorted(self._sorted_ids, ids)
+        np.minimum(positions, self.length - 1, out=positions)
+
+        return np.where(self._sorted_ids[positions] == ids, self._sorted_indexes[positions], -1)
+
+    def ids_to_indices(self, ids, auto_create=True):
+        """
+        Translates ids to indexes.
+
+        New ids are added to the mapping in the order of their first appearance in 'ids', which is the same order
+        adding them one by one would produce.
+
+        :param ids: numpy array of ids.
+        :param auto_create: if False, unknown ids are not added to the mapping and their index will be -1.
+        :return: numpy int64 array of indexes with the same length as 'ids'.
+        """
+        indexes = self.lookup(ids)
+
+        if auto_create:
+            missing = np.flatnonzero(indexes < 0)
+
+            if len(missing):
+                missing_ids = np.asarray(ids, dtype=np.int64)[missing]
+                unique_ids, first_positions, inverse = np.unique(missing_ids, return_index=True,
+                                                                 return_inverse=True)
+
+                # rank of each unique id by first appearance is its offset after the current last index
+                order = np.argsort(first_positions, kind='stable')
+                ranks = np.empty_like(order)
+                ranks[order] = np.arange(len(order))
+
+                indexes[missing] = self.length + ranks[inverse]
+                self.extend(unique_ids[order])
+
+        return indexes
+
+    def indices_to_ids(self, indexes):
+        """
+        Translates indexes to ids.
+
+        :param indexes: numpy array of indexes. All of them should already be present in the mapping.
+        :return: numpy int64 array of ids.
+        """
+        return self._ids[:self.length][np.asarray(indexes, dtype=np.int64)]
+
+
 class VertexType:
-    def __init__(self, name, index2id=None, id2index=None, data=None, length=0):
+    def __init__(self, name, ids=None, data=None, *, mapping=None, dates=None):
         self.name = name
-        self._index2id = index2id or []
-        self._id2index = id2index or {}
-        self.data = data or []
-        self.length = length
-        self.index_data_dict = None
+        self.mapping = mapping if mapping is not None else IdMapping(ids)
+        self.data = data or []  # PropertyTable of the loaded property columns, the rows by index
+        self.dates = dates or {}  # date column name -> int64 array of epoch milliseconds, by index
+
+    @property
+    def length(self):
+        return self.mapping.length
+
+    def snapshot(self):
+        """Returns this vertex type with a snapshot of its mapping (see IdMapping.snapshot), the data is shared."""
+        return VertexType(self.name, data=self.data, mapping=self.mapping.snapshot(), dates=self.dates)
+
+    @property
+    def parts(self):
+        """Names of the vertex types making up a composite type (see COMPOSITE_VERTEX_TYPES), or the type itself."""
+        return COMPOSITE_VERTEX_TYPES.get(self.name, (self.name,))
 
     def index2id(self, index):
         # the index should already be present in the mapping, if not, it was not loaded or used before,
         # so it doesn't make any sense to translate it to an id.
-        return self._index2id[index]
+        if not 0 <= index < self.length:
+            raise IndexError(f"Index {index} is not present in the mapping of {self.name} vertex.")
+
+        return int(self.mapping.indices_to_ids([index])[0])
 
     def id2index(self, oid, auto_create=True):
         # if an id wasn't loaded, let's create the mapping on-the-fly
         # this is useful when edges are used without needing any property for the corresponding vertices
-        if oid not in self._id2index:
-            if auto_create:
-                self._id2index[oid] = self.length
-                self._index2id.append(oid)
-                self.length += 1
-            else:
-                return None
+        index = int(self.mapping.ids_to_indices([oid], auto_create=auto_create)[0])
 
-        return self._id2index[oid]
+        return index if index >= 0 else None
 
-    def get_index_data_dict(self):
+    def ids_to_indices(self, ids, auto_create=True):
+        """
+        Bulk version of 'id2index'. Translates a numpy array of ids to an array of indexes.
+
+        :param ids: numpy array of (original) ids.
+        :param auto_create: if False, unknown ids are not added to the mapping and their index will be -1.
+        :return: numpy int64 array of indexes with the same length as 'ids'.
+        """
+        return self.mapping.ids_to_indices(ids, auto_create=auto_create)
+
+    def indices_to_ids(self, indexes):
+        """
+        Bulk version of 'index2id'. Translates a numpy array of indexes to an array of ids.
+
+        :param indexes: numpy array of indexes.
+        :return: numpy int64 array of ids.
         """
+        return self.mapping.indices_to_ids(indexes)
 
+    def get_index_data_dict(self):
+        """
+        Returns the property rows by index. The values are decoded only when a row is accessed, so nothing is
+        copied, it is the same as 'data'.
         :return:
         """
 
         if not self.data:
             raise ValueError(f"Cannot return dictiory for {self.name} vertex, because there's no data elements loaded.")
 
-        if self.index_data_dict is None:
-            result = dict()
-            for i in range(self.length):
-                result[i] = self.data[i]
-            self.index_data_dict = result
-
-        return self.index_data_dict
+        return self.data
 
 
 logger = logging.getLogger(__name__)
@@ -65,94 +237,549 @@ logger = logging.getLogger(__name__)
 DEFAULT_DELIMITER = '|'
 DEFAULT_QUOTE = '"'
 
+# number of rows parsed at once by the columnar reader
+DEFAULT_BLOCK_SIZE = 1 << 20
+
 ID_NAME = 'id'
 
+# vertex types whose vertices are the union of the vertices of other types, with one index space. The vertex files
+# and the edge files of the parts are read together, e.g. 'message' vertices are read from the comment and the post
+# files, and message-hasCreator-person edges from the comment-hasCreator-person and post-hasCreator-person files.
+# The ids of the parts must be distinct, like the ids of comments and posts in the LDBC datasets.
+COMPOSITE_VERTEX_TYPES = {
+    'message': ('comment', 'post'),
+}
+
+# target id headers of the replyOf edges of the message parts, for the to_id_header_override of message-replyOf-message
+REPLY_OF_HEADERS = {'comment': 'ParentComment.id', 'post': 'ParentPost.id'}
+
+CACHE_DIR_ENV = 'LDBC_SNB_GRBLAS_CACHE'
+BINARY_DIR_ENV = 'LDBC_SNB_GRBLAS_BINARY'
+
+# files with only numeric (id) columns larger than this are parsed in chunks by several worker processes
+PARALLEL_SCAN_MIN_SIZE = 64 << 20
+
+
+def _mask_to_array(mask):
+    """
+    Converts an index mask (any iterable of indexes, e.g. set, list or tuple, or a boolean numpy array where
+    True marks the indexes) to a numpy array of indexes.
+    """
+    if isinstance(mask, np.ndarray) and mask.dtype == np.bool_:
+        return np.flatnonzero(mask)
+
+    if not isinstance(mask, (np.ndarray, list, tuple)):
+        mask = list(mask)
+
+    return np.asarray(mask, dtype=np.int64)
+
+
+def _id_header(vertex_type_name, override):
+    """
+    :param override: header name of the id column, or dict of them by the parts of a composite vertex type.
+    :return: header name of the id column of a vertex type in an edge file, '<vertex type>.id' by default.
+    """
+    if isinstance(override, dict):
+        override = override.get(vertex_type_name)
+
+    return override or f'{vertex_type_name}.id'
+
+
+def _mask_fingerprint(mask):
+    """Hash of an index mask for cache keys. The order and multiplicity of the indexes don't matter."""
+    return None if mask is None else fingerprint(np.unique(_mask_to_array(mask)))
+
+
+def _parse_header(header, column_names):
+    """
+    Gets index for columns based on the header.
+    :param header: list of header string values.
+    :param column_names: list of string values that are needed.
+    :return: list of indexes of needed values in header.
+    """
+    columns = []
+
+    # make sure all header elements are lowercase
+    header = [x.split(':')[0].lower() for x in header]
+
+    for name in column_names:
+        # make sure column name is lowercase as well
+        name = name.lower()
+
+        try:
+            index = header.index(name)
+            columns.append(index)
+
+            # Delete content for this header as it should not be found again.
+            # The possibility for finding it again exists, as e.g. comment<-replyOf-comment relation has
+            # Comment.id twice in the header.
+            header[index] = ''
+        except (AttributeError, ValueError):
+            logger.error("Column '%s' not found! Possible values are: %s" % (
+                name, ', '.join(header)))
+            raise LoadError()
+
+    return columns
+
+
+def _chunk_ranges(file_path, chunks):
+    """
+    Splits the rows of a csv file (after the header) into at most 'chunks' byte ranges of about the same size.
+    Every range starts at the beginning of a line, so each of them can be parsed independently.
+    :return: list of (start, end) byte offsets.
+    """
+    size = path.getsize(file_path)
+
+    with open(file_path, 'rb') as f:
+        bounds = [len(f.readline())]
+
+        for i in range(1, chunks):
+            f.seek(max(bounds[0] + (size - bounds[0]) * i // chunks - 1, bounds[-1]))
+            f.readline()  # move to the start of the next line
+            bounds.append(max(f.tell(), bounds[-1]))
+
+    bounds.append(size)
+
+    return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if start < end]
+
+
+def _read_columns(file_path, column_names, column_dtypes, where=(), byte_range=None):
+    """
+    Reads the given columns of a csv file into numpy arrays.
+
+    The file is parsed block by block by the C parser of pandas, only the needed columns are converted, so
+    no Python object is created per row (except for the values of string columns). The predicates in 'where'
+    are evaluated on each block, and only the qualifying rows are kept.
+    :param file_path: path of the csv file.
+    :param column_names: list of header names of the columns.
+    :param column_dtypes: numpy type of each column, np.int64 for ids and object for strings. The columns of
+                          StringColumn type are returned as StringColumn objects instead of object arrays, each block
+                          is encoded as soon as it is parsed.
+    :param where: list of predicates.
+    :param byte_range: (start, end) byte offsets of the rows to read (see _chunk_ranges), all rows by default.
+    :return: list of numpy arrays (or StringColumn objects), one for each element of 'column_names'.
+    """
+    with open(file_path) as csvfile:
+        header = next(csv.reader(csvfile, delimiter=DEFAULT_DELIMITER, quotechar=DEFAULT_QUOTE))
+
+    columns = _parse_header(header, column_names)
+    predicate_columns = _parse_header(header, [predicate.column for predicate in where])
+
+    dtype = {}
+    for column, predicate in zip(predicate_columns, where):
+        dtype[column] = predicate.dtype
+    for column, column_dtype in zip(columns, column_dtypes):
+        dtype[column] = column_dtype
+
+    # strings are kept as they are, empty values are not converted to NaN
+    dtype = {column: str if column_dtype in (object, StringColumn) else column_dtype
+             for column, column_dtype in dtype.items()}
+
+    source, skiprows = file_path, 1
+    if byte_range is not None:
+        start, end = byte_range
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            source, skiprows = io.BytesIO(f.read(end - start)), 0
+
+    blocks = pd.read_csv(source, sep=DEFAULT_DELIMITER, quotechar=DEFAULT_QUOTE, header=None, skiprows=skiprows,
+                         names=range(len(header)), usecols=sorted(dtype), dtype=dtype, na_filter=False,
+                         chunksize=DEFAULT_BLOCK_SIZE)
+
+    parts = [[] for _ in columns]
+    for block in blocks:
+        keep = None
+        for predicate, column in zip(where, predicate_columns):
+            matches = predicate.evaluate(block[column].to_numpy())
+            keep = matches if keep is None else keep & matches
+
+        for part, column, column_dtype in zip(parts, columns, column_dtypes):
+            values = block[column].to_numpy()
+            if keep is not None:
+                values = values[keep]
+            part.append(StringColumn.from_values(values) if column_dtype is StringColumn else values)
+
+    return [_concat_column(part, column_dtype) for part, column_dtype in zip(parts, column_dtypes)]
+
+
+def _concat_column(values, column_dtype):
+    """Concatenates the parts of a column (list of numpy arrays or StringColumn objects), in order."""
+    if column_dtype is StringColumn:
+        return StringColumn.concat(values)
+
+    return np.concatenate(values) if values else np.empty(0, dtype=column_dtype)
+
+
+def _concat_parts(parts, column_dtypes):
+    """Concatenates the columns read from several files or byte ranges (list of lists of arrays), in order."""
+    if len(parts) == 1:
+        return parts[0]
+
+    return [_concat_column([part[i] for part in parts], column_dtype) for i, column_dtype in enumerate(column_dtypes)]
+
+
+def _read_pieces(pieces, column_names, column_dtypes, where=()):
+    """
+    Reads the columns of several files, or byte ranges of files, one after another (see _read_columns).
+    :param pieces: list of (file path, byte range or None) tuples.
+    :return: list of numpy arrays, one for each element of 'column_names', the rows in the order of 'pieces'.
+    """
+    return _concat_parts([_read_columns(file_path, column_names, column_dtypes, where, byte_range)
+                          for file_path, byte_range in pieces], column_dtypes)
+
+
+def _scan_key(file_paths, column_names, column_dtypes, where):
+    return tuple(file_paths), tuple(column_names), json.dumps([predicate.key() for predicate in where])
+
+
+def _read_columns_shared(pieces, column_names, column_dtypes, where):
+    """
+    Worker side of parallel loads: reads the columns like _read_pieces, but the numeric arrays are returned in
+    shared memory blocks instead of being pickled. String columns are returned as they are.
+    :return: list of numpy arrays, StringColumn objects or (shared memory name, shape, dtype) tuples.
+    """
+    result = []
+    for values in _read_pieces(pieces, column_names, column_dtypes, where):
+        if isinstance(values, StringColumn) or values.dtype == object or values.nbytes == 0:
+            result.append(values)
+            continue
+
+        shm = SharedMemory(create=True, size=values.nbytes)
+        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+        result.append((shm.name, values.shape, values.dtype.str))
+        shm.close()
+
+        # the block is owned (and freed) by the main process from now on
+        resource_tracker.unregister(shm._name, 'shared_memory')
+
+    return result
+
+
+def _from_shared(result):
+    """Main process side of Loader.load_many: copies the arrays out of the shared memory blocks and frees them."""
+    arrays = []
+    for item in result:
+        if not isinstance(item, tuple):
+            arrays.append(item)
+            continue
+
+        name, shape, dtype = item
+        shm = SharedMemory(name=name)
+        try:
+            arrays.append(np.ndarray(shape, dtype=dtype, buffer=shm.buf).copy())
+        finally:
+            shm.close()
+            shm.unlink()
+
+    return arrays
+
+
+class VertexSpec:
+    """Arguments of a Loader.load_vertex call, for Loader.load_many."""
+
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+    def scans(self, loader):
+        return [loader._vertex_scan(*self.args, **self.kwargs)]
+
+    def load(self, loader):
+        return loader.load_vertex(*self.args, **self.kwargs)
+
+
+class EdgeSpec:
+    """Arguments of a Loader.load_edge call, for Loader.load_many."""
+
+    def __init__(self, from_vertex_type, edge_name, to_vertex_type, **kwargs):
+        self.args = (from_vertex_type, edge_name, to_vertex_type)
+        self.kwargs = kwargs
+
+    def scans(self, loader):
+        return loader._edge_scans(*self.args, **self.kwargs)
+
+    def load(self, loader):
+        return loader.load_edge(*self.args, **self.kwargs)
+
+    def fit(self, m):
+        """Resizes 'm' loaded by this spec to the current lengths of the mappings, which later loads may extend."""
+        from_vertex_type, _, to_vertex_type = self.args
+        if m.nrows != from_vertex_type.length or m.ncols != to_vertex_type.length:
+            m.resize(from_vertex_type.length, to_vertex_type.length)
+
+        return m
+
 
 class Loader:
-    def __init__(self, data_dir, filename_suffix="_0_0.csv"):
+    def __init__(self, data_dir, filename_suffix=None, *, cache_dir=None, binary_dir=None, workers=None):
         """
 
         :param data_dir:
+        :param filename_suffix: if given, only the file with this suffix is read for each vertex and edge type
+                                (e.g. '_0_0.csv'). By default every part file written by the data generator
+                                (comment_0_0.csv, comment_1_0.csv, ...) is read, in the order of the partitions.
+        :param cache_dir: if given, loaded vertices and edges are stored in a binary cache in this directory, and
+                          later loads of the same (unchanged) file with the same options are read from there.
+                          Defaults to the LDBC_SNB_GRBLAS_CACHE environment variable.
+        :param binary_dir: if given, the edges are imported from this dataset converted by the convert command
+                           (see ldbc_snb_grblas.convert) instead of parsing the csv files, whenever it is possible.
+                           Defaults to the LDBC_SNB_GRBLAS_BINARY environment variable.
+        :param workers: number of worker processes for parallel parsing (see load_many and _read_columns),
+                        the number of CPUs by default. 1 disables parallel parsing.
         """
         if not path.isdir(data_dir):
             raise FileNotFoundError(errno.ENOENT, strerror(errno.ENOENT), data_dir)
 
         self.data_dir = data_dir
         self.filename_suffix = filename_suffix
+        self.workers = workers or os.cpu_count() or 1
+
+        cache_dir = cache_dir or environ.get(CACHE_DIR_ENV)
+        self.cache = GraphCache(cache_dir) if cache_dir else None
+
+        binary_dir = binary_dir or environ.get(BINARY_DIR_ENV)
+        self.binary = BinaryGraph(binary_dir) if binary_dir else None
+
+        # scans started by load_many: scan key -> future of the result of _read_columns_shared
+        self._prefetched = {}
 
-    def _parse_header(self, header, column_names):
+    def _read_columns(self, file_paths, column_names, column_dtypes, where):
         """
-        Gets index for columns based on the header.
-        :param header: list of header string values.
-        :param column_names: list of string values that are needed.
-        :return: list of indexes of needed values in header.
+        Reads columns of the part files of a vertex or edge type (see _read_columns), or takes the result of the
+        scan started by load_many.
+
+        If the files are large, they are parsed by worker processes: each part file separately, and the ones with
+        only numeric columns (i.e. edge files) are also split into byte ranges at line boundaries. The results are
+        concatenated in file order, so they are the same as reading the files one after another.
         """
-        columns = []
+        future = self._prefetched.pop(_scan_key(file_paths, column_names, column_dtypes, where), None)
+        if future is not None:
+            return _from_shared(future.result())
+
+        sizes = [path.getsize(file_path) for file_path in file_paths]
+        total_size = sum(sizes)
+        parallel = self.workers > 1 and total_size >= PARALLEL_SCAN_MIN_SIZE
+
+        pieces = []
+        for file_path, size in zip(file_paths, sizes):
+            # string columns are not split, as quoted values could contain line breaks
+            if parallel and object not in column_dtypes and StringColumn not in column_dtypes:
+                chunks = max(1, self.workers * size // total_size)
+                pieces.extend((file_path, byte_range) for byte_range in _chunk_ranges(file_path, chunks))
+            else:
+                pieces.append((file_path, None))
 
-        # make sure all header elements are lowercase
-        header = [x.split(':')[0].lower() for x in header]
+        if parallel and len(pieces) > 1:
+            return self._read_pieces_parallel(pieces, column_names, column_dtypes, where)
 
-        for name in column_names:
-            # make sure column name is lowercase as well
-            name = name.lower()
+        return _read_pieces(pieces, column_names, column_dtypes, where)
 
-            try:
-                index = header.index(name)
-                columns.append(index)
+    def _read_pieces_parallel(self, pieces, column_names, column_dtypes, where):
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(_read_columns_shared, [piece], column_names, column_dtypes, where)
+                       for piece in pieces]
 
-                # Delete content for this header as it should not be found again.
-                # The possibility for finding it again exists, as e.g. comment<-replyOf-comment relation has
-                # Comment.id twice in the header.
-                header[index] = ''
-            except (AttributeError, ValueError):
-                logger.error("Column '%s' not found! Possible values are: %s" % (
-                    name, ', '.join(header)))
-                raise LoadError()
+            # every result has to be collected, so that all shared memory blocks are freed
+            parts = []
+            for future in futures:
+                try:
+                    parts.append(_from_shared(future.result()))
+                except Exception as e:
+                    parts.append(e)
 
-        return columns
+        for part in parts:
+            if isinstance(part, Exception):
+                raise part
 
-    def load_vertex(self, vertex_type_name: str, column_names=None, *, is_dynamic, id_mask=None):
+        return _concat_parts(parts, column_dtypes)
+
+    def load_many(self, specs, *, workers=None):
+        """
+        Loads several independent vertex and edge files at once.
+
+        The csv files are parsed concurrently in a process pool, and the parsed id arrays are passed back through
+        shared memory. The id -> index mappings and the matrices are created in the main process, in the order of
+        'specs', so the result is exactly the same as calling the load methods one after another, except that the
+        matrices are sized to the final lengths of the mappings.
+        The loads must not depend on each other, e.g. masks or predicates can't use a mapping extended by
+        another load of the same call.
+
+        :param specs: list of VertexSpec and EdgeSpec objects.
+        :param workers: number of worker processes, 'workers' of the loader by default.
+        :return: list of the loaded vertex types and matrices, in the order of 'specs'.
         """
+        scans = [scan for spec in specs for scan in spec.scans(self)]
 
-        :param vertex_type_name:
-        :param column_names:
-        :param is_dynamic:
-        :return:
+        with ProcessPoolExecutor(max_workers=workers or self.workers) as executor:
+            for file_paths, column_names, column_dtypes, where in scans:
+                key = _scan_key(file_paths, column_names, column_dtypes, where)
+                # missing files are reported by the load methods
+                if key not in self._prefetched and file_paths:
+                    self._prefetched[key] = executor.submit(_read_columns_shared,
+                                                            [(file_path, None) for file_path in file_paths],
+                                                            column_names, column_dtypes, where)
+
+            try:
+                results = [spec.load(self) for spec in specs]
+            finally:
+                # release the results which were not needed, e.g. because the load was read from the cache
+                futures, self._prefetched = list(self._prefetched.values()), {}
+                for future in futures:
+                    if not future.cancel() and future.exception() is None:
+                        _from_shared(future.result())
+
+        # the matrices were created by this call, so the ones whose mappings were extended later can be resized
+        return [spec.fit(result) if isinstance(spec, EdgeSpec) else result for spec, result in zip(specs, results)]
+
+    def _find_files(self, prefix, is_dynamic):
+        """
+        Finds the part files of a vertex or edge type, e.g. for prefix 'comment': comment_0_0.csv, comment_1_0.csv...
+        :return: list of file paths in the order of the partitions, empty if there is no such file.
         """
-        filename = "%s%s" % (vertex_type_name, self.filename_suffix)
         subdir = 'dynamic' if is_dynamic else 'static'
-        file_path = path.join(self.data_dir, subdir, filename)
+        directory = path.join(self.data_dir, subdir)
 
-        column_names = column_names or []
+        if self.filename_suffix is not None:
+            file_path = path.join(directory, prefix + self.filename_suffix)
+            return [file_path] if path.isfile(file_path) else []
+
+        if not path.isdir(directory):
+            return []
+
+        pattern = re.compile(re.escape(prefix) + r'_(\d+)_(\d+)\.csv$')
 
-        with open(file_path) as csvfile:
-            reader = csv.reader(csvfile, delimiter=DEFAULT_DELIMITER, quotechar=DEFAULT_QUOTE)
+        parts = []
+        for filename in os.listdir(directory):
+            match = pattern.match(filename)
+            if match:
+                parts.append(((int(match.group(1)), int(match.group(2))), path.join(directory, filename)))
+
+        return [file_path for _, file_path in sorted(parts)]
+
+    def _vertex_scan(self, vertex_type_name, column_names=None, *, is_dynamic, id_mask=None,
+                     date_column_names=None, where=None):
+        """
+        Arguments of the file scan of a load_vertex call.
+        :return: (file paths, column names, column dtypes, predicates)
+        """
+        column_names = column_names or []
+        date_column_names = date_column_names or []
 
-            header = next(reader)
+        where = list(where or [])
+        if id_mask is not None:
+            where.append(IsIn(ID_NAME, id_mask))
 
-            # determine index of all needed fields, and add index as well
-            column_names.insert(0, ID_NAME)
-            columns = self._parse_header(header, column_names)
+        # a column can be both a data and a date column, but it is read only once. The data columns are encoded
+        # to a StringColumn while they are read, unless their values are needed for parsing the dates.
+        read_names = [ID_NAME] + column_names + [name for name in date_column_names if name not in column_names]
+        read_dtypes = [np.int64] + [object if name in date_column_names else StringColumn for name in read_names[1:]]
 
-            mapping = []  # logical (dense) id -> original (sparse) id
-            reverse_mapping = {}  # original id -> logical id
-            data = []  # any additional data based on 'column_names'
+        # the files of a composite type are read one part after the other, all of them have to be present
+        file_paths = []
+        for part in COMPOSITE_VERTEX_TYPES.get(vertex_type_name, (vertex_type_name,)):
+            part_file_paths = self._find_files(part, is_dynamic)
+            if not part_file_paths:
+                return [], read_names, read_dtypes, where
+            file_paths.extend(part_file_paths)
 
-            for i, row in enumerate(reader):
-                row_data = [row[i] for i in columns]
-                row_id = int(row_data.pop(0))
+        return file_paths, read_names, read_dtypes, where
 
-                if id_mask is not None and row_id not in id_mask:
+    def _edge_scans(self, from_vertex_type, edge_name, to_vertex_type, *, is_dynamic, from_id_header_override=None,
+                    to_id_header_override=None, where=None, **_options):
+        """
+        Arguments of the file scans of a load_edge call, one for every pair of the parts of the vertex types which
+        has an edge file (see COMPOSITE_VERTEX_TYPES), a single one if neither of them is composite.
+        :return: list of (file paths, column names, column dtypes, predicates)
+        """
+        scans = []
+        for from_part in from_vertex_type.parts:
+            for to_part in to_vertex_type.parts:
+                file_paths = self._find_files("%s_%s_%s" % (from_part, edge_name, to_part), is_dynamic)
+                if not file_paths:
                     continue
 
-                mapping.append(row_id)
-                reverse_mapping[row_id] = i
+                # get id columns
+                # todo: if attributes are needed, column_names should be a function parameter and
+                # todo: these values should be inserted into that
+                column_names = [
+                    _id_header(from_part, from_id_header_override),
+                    _id_header(to_part, to_id_header_override),
+                ]
+                scans.append((file_paths, column_names, [np.int64, np.int64], list(where or [])))
+
+        return scans
+
+    @traced('load_vertex')
+    def load_vertex(self, vertex_type_name: str, column_names=None, *, is_dynamic, id_mask=None,
+                    date_column_names=None, where=None):
+        """
+
+        :param vertex_type_name: name of the vertex type. The vertices of a composite type (see
+                                 COMPOSITE_VERTEX_TYPES) are read from the files of its parts, in the order of the
+                                 parts, e.g. for 'message' the comments get the first indexes, then the posts.
+        :param column_names:
+        :param is_dynamic:
+        :param id_mask: if given, only the vertices with these (original) ids are loaded.
+        :param date_column_names: columns (e.g. 'creationDate') which are parsed to int64 epoch milliseconds
+                                  at load time, and stored in the 'dates' dictionary of the vertex type.
+        :param where: list of predicates (see ldbc_snb_grblas.predicates), only the vertices satisfying all of
+                      them are loaded.
+        :return:
+        """
+        file_paths, read_names, read_dtypes, where = self._vertex_scan(
+            vertex_type_name, column_names, is_dynamic=is_dynamic, id_mask=id_mask,
+            date_column_names=date_column_names, where=where)
 
-                # if there's anything else to store
-                if row_data:
-                    data.append(row_data)
+        if not file_paths:
+            missing = [part for part in COMPOSITE_VERTEX_TYPES.get(vertex_type_name, (vertex_type_name,))
+                       if not self._find_files(part, is_dynamic)]
+            filename = missing[0] + (self.filename_suffix or '_*_*.csv')
+            subdir = 'dynamic' if is_dynamic else 'static'
+            raise FileNotFoundError(errno.ENOENT, strerror(errno.ENOENT), path.join(self.data_dir, subdir, filename))
 
-            return VertexType(vertex_type_name, mapping, reverse_mapping, data, len(mapping))
+        current_span().set(vertex=vertex_type_name, source='csv')
+
+        column_names = column_names or []
+        date_column_names = date_column_names or []
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(file_paths, kind='vertex', column_names=column_names,
+                                       date_column_names=date_column_names,
+                                       where=[predicate.key() for predicate in where])
+            cached = self.cache.load(cache_key, file_paths)
+            if cached is not None:
+                current_span().set(source='cache')
+                _, arrays = cached
+                data = PropertyTable(column_names, [
+                    StringColumn(arrays[f'data_{i}_buffer'], arrays[f'data_{i}_offsets'])
+                    for i in range(len(column_names))
+                ]) if column_names else None
+                dates = {name: arrays['date_' + name] for name in date_column_names}
+                return VertexType(vertex_type_name, arrays['ids'], data, dates=dates)
+
+        values = dict(zip(read_names, self._read_columns(file_paths, read_names, read_dtypes, where)))
+
+        # any additional data based on 'column_names'
+        data = PropertyTable(column_names, [
+            values[name] if isinstance(values[name], StringColumn) else StringColumn.from_values(values[name])
+            for name in column_names
+        ]) if column_names else None
+        dates = {name: parse_dates(values[name]) for name in date_column_names}
+
+        vertex_type = VertexType(vertex_type_name, values[ID_NAME], data, dates=dates)
+
+        if cache_key is not None:
+            arrays = {'ids': vertex_type.mapping.ids}
+            if data:
+                for i, column in enumerate(data.columns):
+                    arrays[f'data_{i}_buffer'] = column.buffer
+                    arrays[f'data_{i}_offsets'] = column.offsets
+            for name, dates_array in dates.items():
+                arrays['date_' + name] = dates_array
+            self.cache.store(cache_key, file_paths, arrays)
+
+        return vertex_type
 
     @staticmethod
     def load_empty_vertex(vertex_type_name: str):
@@ -164,9 +791,10 @@ class Loader:
         """
         return VertexType(vertex_type_name)
 
+    @traced('load_edge')
     def load_edge(self, from_vertex_type: VertexType, edge_name: str, to_vertex_type: VertexType,
                   *, is_dynamic: bool, dtype=dtypes.INT32, lmask=None, rmask=None, undirected=False,
-                  from_id_header_override=None, to_id_header_override=None):
+                  from_id_header_override=None, to_id_header_override=None, where=None):
         """
         Loads edges between of type 'edge_name' between 'from_vertex_type' and 'to_vertex_type'. These parameters
         also define the csv file that will be loaded.
@@ -177,83 +805,175 @@ class Loader:
         instead of the number of all elements. i.e. if only 1 entry matches the lmask out of a 1000, the matrix will
         only have 1 row instead of 1000.
 
+        If a vertex type is composite (see COMPOSITE_VERTEX_TYPES), the edge files of all of its parts are read into
+        one matrix, e.g. message-hasTag-tag from comment-hasTag-tag and post-hasTag-tag.
+
         TODO: add parsing of properties of a relation.
         :param edge_name:
         :param from_vertex_type:
         :param to_vertex_type:
         :param is_dynamic:
+        :param from_id_header_override: header of the source id column instead of '<from vertex type>.id', or a dict
+                                        of them by the parts of a composite vertex type (e.g. REPLY_OF_HEADERS).
+        :param to_id_header_override: same for the target id column.
+        :param where: list of predicates (see ldbc_snb_grblas.predicates) on the columns of the edge file, only
+                      the edges satisfying all of them are loaded.
         :return: adjacency matrix
         """
-
-        # concat full filename for input file
-        filename = "%s_%s_%s%s" % (from_vertex_type.name, edge_name, to_vertex_type.name, self.filename_suffix)
-
-        # concat file path
-        subdir = 'dynamic' if is_dynamic else 'static'
-        file_path = path.join(self.data_dir, subdir, filename)
-
-        if not path.isfile(file_path):
+        scans = self._edge_scans(
+            from_vertex_type, edge_name, to_vertex_type, is_dynamic=is_dynamic,
+            from_id_header_override=from_id_header_override, to_id_header_override=to_id_header_override,
+            where=where)
+        file_paths = [file_path for scan in scans for file_path in scan[0]]
+        where = list(where or [])
+
+        if not file_paths:
             raise LoadError("(%s)-[:%s]-(%s) connection doesn't exist." % (from_vertex_type.name, edge_name, to_vertex_type.name))
 
-        with open(file_path) as csvfile:
-            reader = csv.reader(csvfile, delimiter=DEFAULT_DELIMITER, quotechar=DEFAULT_QUOTE)
-
-            # get id columns
-            # todo: if attributes are needed, column_names should be a function parameter and
-            # todo: these values should be inserted into that
-            column_names = [
-                from_id_header_override or f'{from_vertex_type.name}.id',
-                to_id_header_override or f'{to_vertex_type.name}.id',
-            ]
-
-            header = next(reader)
-            columns = self._parse_header(header, column_names)
-
-            from_indexes = []
-            to_indexes = []
-
-            for i, row in enumerate(reader):
-                row_data = [row[i] for i in columns]
-                id_from = int(row_data.pop(0))
-                id_to = int(row_data.pop(0))
-
-                from_index = None
-                if lmask is not None:
-                    # if a mask is present auto creation of mapping doesn't make sense, because the mask already
-                    # assumes an index-id mapping
-                    from_index = from_vertex_type.id2index(id_from, auto_create=False)
-                    if from_index is None or from_index not in lmask:
-                        continue
-
-                to_index = None
-                if rmask is not None:
-                    # if a mask is present auto creation of mapping doesn't make sense, because the mask already
-                    # assumes an index-id mapping
-                    to_index = to_vertex_type.id2index(id_to, auto_create=False)
-                    if to_index is None or to_index not in rmask:
-                        continue
-
-                # because of the auto_create=False, at this point to_index and/or from_index may be None.
-                # let's make sure they are valid.
-                to_index = to_index or to_vertex_type.id2index(id_to, auto_create=True)
-                from_index = from_index or from_vertex_type.id2index(id_from, auto_create=True)
-
-                from_indexes.append(from_index)
-                to_indexes.append(to_index)
-
-                # if there's anything else to store
-                if row_data:
-                    # todo: save additional properties connected to the edge.
-                    pass
+        name = "%s_%s_%s" % (from_vertex_type.name, edge_name, to_vertex_type.name)
+        current_span().set(edge=name, source='csv')
+
+        if self.binary is not None and lmask is None and rmask is None and not where:
+            m = self._load_binary_edge(name, is_dynamic, file_paths, from_vertex_type, to_vertex_type, dtype)
+            if m is not None:
+                current_span().set(source='binary')
+                if undirected:
+                    m << m.ewise_add(m.T)
+                return m
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(file_paths, kind='edge', dtype=dtype.name, undirected=undirected,
+                                       lmask=_mask_fingerprint(lmask), rmask=_mask_fingerprint(rmask),
+                                       from_id_header_override=from_id_header_override,
+                                       to_id_header_override=to_id_header_override,
+                                       where=[predicate.key() for predicate in where],
+                                       from_ids=fingerprint(from_vertex_type.mapping.ids),
+                                       to_ids=fingerprint(to_vertex_type.mapping.ids))
+            m = self._load_cached_edge(cache_key, file_paths, from_vertex_type, to_vertex_type, dtype, name)
+            if m is not None:
+                current_span().set(source='cache')
+                return m
+
+        # mapping lengths before the load, to know which ids were added by this load
+        from_length = from_vertex_type.length
+        to_length = to_vertex_type.length
+
+        # the edges of the part pairs of composite vertex types are concatenated
+        id_columns = [self._read_columns(*scan) for scan in scans]
+        if len(id_columns) == 1:
+            from_ids, to_ids = id_columns[0]
+        else:
+            from_ids = np.concatenate([from_part_ids for from_part_ids, _ in id_columns])
+            to_ids = np.concatenate([to_part_ids for _, to_part_ids in id_columns])
+
+        keep = np.ones(len(from_ids), dtype=bool)
+        if lmask is not None:
+            # if a mask is present auto creation of mapping doesn't make sense, because the mask already
+            # assumes an index-id mapping
+            from_indexes = from_vertex_type.ids_to_indices(from_ids, auto_create=False)
+            keep &= np.isin(from_indexes, _mask_to_array(lmask))
+
+        if rmask is not None:
+            to_indexes = to_vertex_type.ids_to_indices(to_ids, auto_create=False)
+            keep &= np.isin(to_indexes, _mask_to_array(rmask))
+
+        from_ids = from_ids[keep]
+        to_ids = to_ids[keep]
+
+        # create the missing mappings for the remaining edges. If both ends share the mapping, the ids
+        # are translated together, so new indexes are assigned in the order the ids appear in the file.
+        if from_vertex_type.mapping is to_vertex_type.mapping:
+            indexes = from_vertex_type.ids_to_indices(np.column_stack((to_ids, from_ids)).ravel())
+            to_indexes, from_indexes = indexes[0::2], indexes[1::2]
+        else:
+            to_indexes = to_vertex_type.ids_to_indices(to_ids)
+            from_indexes = from_vertex_type.ids_to_indices(from_ids)
 
         m = Matrix.from_values(from_indexes, to_indexes,
-                               repeat(1, len(from_indexes)),  # 1 for all value
+                               np.ones(len(from_indexes), dtype=dtype.np_type),  # 1 for all value
                                nrows=from_vertex_type.length,
                                ncols=to_vertex_type.length,
                                dtype=dtype,
-                               name="%s_%s_%s" % (from_vertex_type.name, edge_name, to_vertex_type.name))
+                               name=name)
 
         if undirected:
             m << m.ewise_add(m.T)
 
+        if cache_key is not None:
+            self._store_cached_edge(cache_key, file_paths, m, from_vertex_type.mapping.ids[from_length:],
+                                    to_vertex_type.mapping.ids[to_length:])
+
         return m
+
+    def _load_binary_edge(self, name, is_dynamic, file_paths, from_vertex_type, to_vertex_type, dtype):
+        """
+        Imports an adjacency matrix from the converted dataset. The vertex mappings are extended to all ids of the
+        converted vertex types, so the indexes are the same as the ones the matrix was converted with.
+
+        The edge files are converted with their first two columns as source and target ids, so the header
+        overrides don't need to be checked.
+        :return: the matrix or None if the converted one can't be used: the edge is not converted, or the mapping
+                 of a vertex type is not a prefix of the converted one (e.g. the vertices were filtered).
+        """
+        converted = self.binary.edge(name, is_dynamic, file_paths)
+        if converted is None:
+            return None
+
+        meta, arrays = converted
+
+        vertex_ids = []
+        for vertex_type in (from_vertex_type, to_vertex_type):
+            ids = self.binary.vertex_ids(vertex_type.name)
+            if ids is None or not np.array_equal(vertex_type.mapping.ids, ids[:vertex_type.length]):
+                logger.info("The mapping of %s vertices differs from the converted one, parsing %s."
+                            % (vertex_type.name, name))
+                return None
+            vertex_ids.append(ids)
+
+        from_vertex_type.mapping.extend(vertex_ids[0][from_vertex_type.length:])
+        to_vertex_type.mapping.extend(vertex_ids[1][to_vertex_type.length:])
+
+        # rows of vertices which got their index after the edge was converted are empty
+        indptr = arrays['indptr']
+        nrows = from_vertex_type.length
+        if len(indptr) < nrows + 1:
+            indptr = np.concatenate((indptr, np.full(nrows + 1 - len(indptr), indptr[-1], dtype=np.uint64)))
+
+        # the memory-mapped arrays are copied once by the import, the values are handed over without copying
+        return Matrix.ss.import_csr(nrows=nrows, ncols=to_vertex_type.length,
+                                    indptr=indptr, col_indices=arrays['col_indices'],
+                                    values=np.ones(meta['nvals'], dtype=dtype.np_type), sorted_index=True,
+                                    take_ownership=True, dtype=dtype, name=name)
+
+    def _load_cached_edge(self, cache_key, file_paths, from_vertex_type, to_vertex_type, dtype, name):
+        """
+        Reads an adjacency matrix from the cache, and extends the vertex mappings with the ids the original load
+        added to them.
+        :return: the matrix or None if it is not cached.
+        """
+        cached = self.cache.load(cache_key, file_paths)
+        if cached is None:
+            return None
+
+        meta, arrays = cached
+
+        from_vertex_type.mapping.extend(arrays['from_new_ids'])
+        if to_vertex_type.mapping is not from_vertex_type.mapping:
+            to_vertex_type.mapping.extend(arrays['to_new_ids'])
+
+        return Matrix.ss.import_csr(nrows=meta['nrows'], ncols=meta['ncols'],
+                                    indptr=arrays['indptr'], col_indices=arrays['col_indices'],
+                                    values=arrays['values'], sorted_index=True, dtype=dtype, name=name)
+
+    def _store_cached_edge(self, cache_key, file_paths, m, from_new_ids, to_new_ids):
+        csr = m.ss.export('csr', sort=True)
+
+        arrays = {
+            'indptr': csr['indptr'],
+            'col_indices': csr['col_indices'],
+            'values': csr['values'],
+            'from_new_ids': from_new_ids,
+            'to_new_ids': to_new_ids,
+        }
+        self.cache.store(cache_key, file_paths, arrays, nrows=m.nrows, ncols=m.ncols)
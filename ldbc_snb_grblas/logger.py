@@ -1,15 +1,55 @@
+"""
+Timing output of the queries.
+
+Logger prints the LOADED and CALCULATED lines of a query run to stderr. For finding out which stage of a query is
+slow, spans can be recorded as well (see enable_spans): every span is written as a JSON line or a CSV row with its
+wall time, CPU time, peak RSS growth and the size of the matrix or vector it produced.
+
+    with span('replies') as s:
+        replies = ...
+        s.record(replies)
+
+Spans can also be created by decorating a function with @traced(), and within a span, lap() closes a stage which
+started at the previous lap (or the start of the span). When spans are not enabled, all of these are no-ops.
+"""
+
+import csv
+import json
+import sys
+from contextlib import contextmanager
+from functools import wraps
+from os import environ
 from sys import stderr
+from time import perf_counter, process_time
 
 from ldbc_snb_grblas.timer import Timer
 
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+SPANS_ENV = 'LDBC_SNB_GRBLAS_SPANS'
+
+CSV_FIELDS = ['span', 'parent', 'wall_s', 'cpu_s', 'peak_rss_delta_kb', 'nvals', 'nrows', 'ncols', 'attributes']
+
 
 class Logger:
-    def __init__(self):
+    def __init__(self, file=stderr):
+        """
+        :param file: output of the phase lines, nothing is printed if None. The durations of the phases are
+                     available in 'phases' (phase name -> seconds) either way.
+        """
         self.timer = Timer()
+        self.file = file
+        self.phases = {}
 
     def _print(self, message):
         time = self.timer.get_delta()
-        print(f"{message};{time:.20f}", file=stderr)
+        self.phases[message] = time
+
+        if self.file is not None:
+            print(f"{message};{time:.20f}", file=self.file)
 
     def loading_finished(self):
         self._print("LOADED")
@@ -18,4 +58,205 @@ class Logger:
         self._print("CALCULATED")
 
     def get_total_time(self):
-        self.timer.get_total_time()
+        return self.timer.get_total_time()
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class SpanRecorder:
+    """
+    Writes finished spans to a file.
+
+    :param file: text file object.
+    :param output_format: 'json' for JSON lines, or 'csv' for CSV rows with a header (CSV_FIELDS, the attributes
+                          other than the size of the result are in the 'attributes' column as JSON).
+    """
+
+    def __init__(self, file, output_format='json'):
+        if output_format not in ('json', 'csv'):
+            raise ValueError(f"Unknown span output format: '{output_format}'")
+
+        self.file = file
+        self.output_format = output_format
+        self._csv_writer = None
+
+    def write(self, record):
+        if self.output_format == 'json':
+            self.file.write(json.dumps(record) + '\n')
+        else:
+            if self._csv_writer is None:
+                self._csv_writer = csv.DictWriter(self.file, CSV_FIELDS)
+                self._csv_writer.writeheader()
+
+            row = {field: record.get(field) for field in CSV_FIELDS[:-1]}
+            attributes = {key: value for key, value in record.items() if key not in row}
+            row['attributes'] = json.dumps(attributes) if attributes else ''
+            self._csv_writer.writerow(row)
+
+        self.file.flush()
+
+
+class Span:
+    """A measured stage. Use span() to create one."""
+
+    def __init__(self, name, parent, attributes):
+        self.name = name
+        self.parent = parent
+        self.attributes = dict(attributes)
+        self._start()
+
+    def _start(self):
+        self._wall = perf_counter()
+        self._cpu = process_time()
+        self._peak_rss = _peak_rss_kb()
+        self._lap = (self._wall, self._cpu, self._peak_rss)
+
+    def _lap_start(self):
+        """:return: the measurements at the previous lap, and starts the next one."""
+        previous = self._lap
+        self._lap = (perf_counter(), process_time(), _peak_rss_kb())
+        return previous
+
+    def set(self, **attributes):
+        """Adds attributes to the output of the span."""
+        self.attributes.update(attributes)
+
+    def record(self, result):
+        """
+        Adds the size of the result of the span: nvals, nrows and ncols of a matrix, nvals and size of a vector,
+        or the length of a vertex type.
+        """
+        for attribute in ('nvals', 'nrows', 'ncols', 'size', 'length'):
+            value = getattr(result, attribute, None)
+            if isinstance(value, int):
+                self.attributes[attribute] = value
+
+    def _finish(self):
+        """:return: the record of the span."""
+        peak_rss = _peak_rss_kb()
+
+        record = {
+            'span': self.name,
+            'parent': self.parent,
+            'wall_s': perf_counter() - self._wall,
+            'cpu_s': process_time() - self._cpu,
+            # ru_maxrss is the peak of the whole process, so this is only positive if the span set a new peak
+            'peak_rss_delta_kb': peak_rss - self._peak_rss if peak_rss is not None else None,
+        }
+        record.update(self.attributes)
+
+        return record
+
+
+class _NullSpan:
+    def set(self, **attributes):
+        pass
+
+    def record(self, result):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+_recorder = None
+_stack = []  # active spans, innermost last
+
+
+def enable_spans(file, output_format=None):
+    """
+    Starts recording spans.
+    :param file: path of the output file (appended to), or a text file object.
+    :param output_format: 'json' or 'csv', see SpanRecorder. By default 'csv' if the path ends with '.csv',
+                          'json' otherwise.
+    """
+    global _recorder
+
+    if isinstance(file, str):
+        output_format = output_format or ('csv' if file.endswith('.csv') else 'json')
+        file = open(file, 'a', newline='')
+
+    _recorder = SpanRecorder(file, output_format or 'json')
+
+
+def enable_spans_from_env():
+    """Starts recording spans if the LDBC_SNB_GRBLAS_SPANS environment variable is set to an output file."""
+    spans_file = environ.get(SPANS_ENV)
+    if spans_file and _recorder is None:
+        enable_spans(spans_file)
+
+
+def disable_spans():
+    global _recorder
+    _recorder = None
+
+
+def spans_enabled():
+    return _recorder is not None
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Context manager measuring the code in its block, it yields the Span, so the result can be recorded.
+    Nested spans have the name of the enclosing one as parent, e.g. 'compute' for a stage of a query.
+    """
+    if _recorder is None:
+        yield _NULL_SPAN
+        return
+
+    current = Span(name, _stack[-1].name if _stack else None, attributes)
+    _stack.append(current)
+    try:
+        yield current
+    finally:
+        _stack.pop()
+        _recorder.write(current._finish())
+
+
+def traced(name=None):
+    """Decorator recording every call of the function as a span, with the size of its result (see Span.record)."""
+    def decorator(function):
+        span_name = name or function.__name__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return function(*args, **kwargs)
+
+            with span(span_name) as current:
+                result = function(*args, **kwargs)
+                current.record(result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def current_span():
+    """:return: the innermost active span, which can be used to add attributes to it."""
+    return _stack[-1] if _recorder is not None and _stack else _NULL_SPAN
+
+
+def lap(name, result=None):
+    """
+    Records the stage of the innermost active span since the previous lap (or the start of the span) as a span
+    named 'name', with the size of 'result' if given.
+    """
+    if _recorder is None or not _stack:
+        return
+
+    current = _stack[-1]
+    stage = Span(name, current.name, {})
+    stage._wall, stage._cpu, stage._peak_rss = current._lap_start()
+    if result is not None:
+        stage.record(result)
+
+    _recorder.write(stage._finish())
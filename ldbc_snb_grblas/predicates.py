@@ -0,0 +1,86 @@
+"""
+Column predicates that can be pushed down into the scan of the Loader (see the 'where' parameter of
+Loader.load_vertex and Loader.load_edge).
+
+Every predicate is evaluated in a vectorized way on the parsed blocks of the csv file, so only the qualifying rows
+are materialized.
+"""
+
+import numpy as np
+
+from ldbc_snb_grblas.cache import fingerprint
+from ldbc_snb_grblas.util import parse_dates, to_epoch_millis
+
+
+class Predicate:
+    """
+    Condition on one column of a csv file.
+
+    :param column: header name of the column, e.g. 'creationDate' or 'Person.id'.
+    """
+
+    # numpy type the column is parsed to
+    dtype = object
+
+    def __init__(self, column):
+        self.column = column
+
+    def evaluate(self, values):
+        """
+        :param values: numpy array of the values of the column in a block of rows.
+        :return: numpy bool array, True for the qualifying rows.
+        """
+        raise NotImplementedError
+
+    def key(self):
+        """Json serializable description of the predicate for cache keys."""
+        raise NotImplementedError
+
+
+class Equals(Predicate):
+    """The (string) value of the column equals 'value'."""
+
+    def __init__(self, column, value):
+        super().__init__(column)
+        self.value = value
+
+    def evaluate(self, values):
+        return values == self.value
+
+    def key(self):
+        return ['eq', self.column, self.value]
+
+
+class IsIn(Predicate):
+    """The (id) value of the column is one of 'ids'."""
+
+    dtype = np.int64
+
+    def __init__(self, column, ids):
+        super().__init__(column)
+
+        if not isinstance(ids, (np.ndarray, list, tuple)):
+            ids = list(ids)
+        self.ids = np.unique(np.asarray(ids, dtype=np.int64))
+
+    def evaluate(self, values):
+        return np.isin(values, self.ids)
+
+    def key(self):
+        return ['in', self.column, fingerprint(self.ids)]
+
+
+class DateBetween(Predicate):
+    """The date of the column is between 'start_date' and 'end_date' (timezone aware datetimes, inclusive)."""
+
+    def __init__(self, column, start_date, end_date):
+        super().__init__(column)
+        self.start = to_epoch_millis(start_date)
+        self.end = to_epoch_millis(end_date)
+
+    def evaluate(self, values):
+        dates = parse_dates(values)
+        return (dates >= self.start) & (dates <= self.end)
+
+    def key(self):
+        return ['between', self.column, self.start, self.end]
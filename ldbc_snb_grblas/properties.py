@@ -0,0 +1,137 @@
+"""
+Compact storage of the string property columns of vertex types (see the 'column_names' parameter of
+Loader.load_vertex).
+
+Every column is stored as a single utf-8 buffer and an offset array, so a column costs its raw size plus 8 bytes
+per vertex, instead of a Python string object per value. The values are decoded only when they are accessed,
+typically for the few result rows of a query.
+"""
+
+from collections.abc import Sequence
+from operator import index as to_index
+
+import numpy as np
+
+
+class StringColumn:
+    """
+    Immutable column of strings.
+
+    :param buffer: numpy uint8 array of the utf-8 encoded values, one after another.
+    :param offsets: numpy int64 array, the value i is buffer[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def from_values(cls, values):
+        """Creates a column from a numpy object array (or any sequence) of strings."""
+        text = ''.join(values)
+        data = text.encode()
+
+        if len(data) == len(text):
+            # only ascii characters, so the byte lengths are the string lengths
+            lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+        else:
+            lengths = np.fromiter((len(value.encode()) for value in values), dtype=np.int64, count=len(values))
+
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        return cls(np.frombuffer(data, dtype=np.uint8), offsets)
+
+    @classmethod
+    def concat(cls, columns):
+        """Concatenates columns, in order."""
+        if len(columns) == 1:
+            return columns[0]
+
+        if not columns:
+            return cls.from_values([])
+
+        buffer = np.concatenate([column.buffer for column in columns])
+
+        offsets = [np.zeros(1, dtype=np.int64)]
+        start = 0
+        for column in columns:
+            offsets.append(column.offsets[1:] + start)
+            start += len(column.buffer)
+
+        return cls(buffer, np.concatenate(offsets))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        index = to_index(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"String column index {index} is out of range.")
+
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].tobytes().decode()
+
+    def find(self, value):
+        """:return: numpy array of the indexes where the column equals 'value', in increasing order."""
+        encoded = np.frombuffer(value.encode(), dtype=np.uint8)
+
+        starts = self.offsets[:-1]
+        candidates = np.flatnonzero(np.diff(self.offsets) == len(encoded))
+
+        # compare the candidates byte by byte
+        for position, byte in enumerate(encoded):
+            candidates = candidates[self.buffer[starts[candidates] + position] == byte]
+
+        return candidates
+
+
+class PropertyTable(Sequence):
+    """
+    String property columns of a vertex type. Item i is the list of the property values of the vertex with index i,
+    in the order of the column names, so the table can be used like the former list of rows.
+
+    :param column_names: list of the names of the columns.
+    :param columns: list of StringColumn objects of the same length, one for each name.
+    """
+
+    def __init__(self, column_names, columns):
+        self.column_names = list(column_names)
+        self.columns = list(columns)
+
+    def column(self, name):
+        """:return: the StringColumn of a property."""
+        return self.columns[self.column_names.index(name)]
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def __getitem__(self, index):
+        return [column[index] for column in self.columns]
+
+    def index(self, row, start=0, stop=None):
+        """
+        :param row: list of property values, one for each column.
+        :return: index of the first vertex with these property values.
+        """
+        candidates = None
+        for column, value in zip(self.columns, row):
+            matches = column.find(value)
+            candidates = matches if candidates is None else np.intersect1d(candidates, matches, assume_unique=True)
+
+        if candidates is not None and len(row) == len(self.columns):
+            candidates = candidates[(candidates >= start) & (candidates < (len(self) if stop is None else stop))]
+            if len(candidates):
+                return int(candidates[0])
+
+        raise ValueError(f"{row!r} is not in the property table.")
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+
+        return len(self) == len(other) and all(row == other_row for row, other_row in zip(self, other))
+
+    def __repr__(self):
+        return f'PropertyTable({self.column_names!r}, {len(self)} rows)'
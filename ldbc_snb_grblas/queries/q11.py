@@ -3,55 +3,74 @@ LDBC SNB BI query 11. Friend triangles
 https://ldbc.github.io/ldbc_snb_docs_snapshot/bi-read-11.pdf
 """
 
-from itertools import repeat
+from types import SimpleNamespace
 
-from grblas.matrix import Matrix
+import numpy as np
 from grblas.vector import Vector
 
-from ldbc_snb_grblas.loader import Loader
-from ldbc_snb_grblas.logger import Logger
+from ldbc_snb_grblas.grutil import count_triangles
+from ldbc_snb_grblas.logger import lap
+from ldbc_snb_grblas.runner import run, run_batch
 
 
-def calc(data_dir, country_name):
-    # init timer
-    logger = Logger()
+def parse_params(country_name):
+    return country_name,
 
-    # load vertices
-    loader = Loader(data_dir)
 
+def load(loader, params=None):
     persons = loader.load_empty_vertex('person')
     places = loader.load_vertex('place', is_dynamic=False, column_names=['name', 'type'])
 
-    # print("Vertices persons and places\t%s" % logger.get_total_time(), file=stderr)
+    lap('Vertices persons and places')
 
     # load edges
     person_locatedin_place = loader.load_edge(persons, 'isLocatedIn', places, is_dynamic=True)
     place_ispartof_place = loader.load_edge(places, 'isPartOf', places, is_dynamic=False)
-    # print("Loaded locatedIn and isPartOf edges\t%s" % logger.get_total_time(), file=stderr)
+    lap('Loaded locatedIn and isPartOf edges')
+
+    person_knows_person = loader.load_edge(persons, 'knows', persons, is_dynamic=True, undirected=True,
+                                           from_id_header_override='Person1.id', to_id_header_override='Person2.id')
+
+    return SimpleNamespace(
+        persons=persons,
+        places=places,
+        person_locatedin_place=person_locatedin_place,
+        place_ispartof_place=place_ispartof_place,
+        person_knows_person=person_knows_person,
+    )
+
+
+def compute(graph, country_name):
+    places = graph.places
+    person_locatedin_place = graph.person_locatedin_place
+    place_ispartof_place = graph.place_ispartof_place
 
     # get country index
     country_index = places.data.index([country_name, 'country'])
     country_vector = Vector.from_values([country_index], [True], size=place_ispartof_place.ncols)
 
-    # cities mapped to original ids
-    country_vector_indices, _ = country_vector.vxm(place_ispartof_place.T).new().to_values()
-    country_city_matrix = Matrix.from_values(country_vector_indices, country_vector_indices, repeat(1, len(country_vector_indices)), nrows=places.length, ncols=persons.length)
-    person_mask, _ = person_locatedin_place.mxm(country_city_matrix).new().reduce_rows().new().to_values()
-    person_mask = set(person_mask)
-
-    # print("Created person mask\t%s" % logger.get_total_time(), file=stderr)
+    # cities of the country, then the persons located in them
+    city_indices, _ = country_vector.vxm(place_ispartof_place.T).new().to_values()
+    cities = Vector.from_values(city_indices, np.ones(len(city_indices), dtype=np.bool_),
+                                size=person_locatedin_place.ncols)
+    person_indices, _ = person_locatedin_place.mxv(cities).new().to_values()
 
-    # load person-knows-person for people located in 'country'
-    person_knows_person = loader.load_edge(persons, 'knows', persons, is_dynamic=True, lmask=person_mask, rmask=person_mask, undirected=True)
+    lap('Created person mask')
 
-    logger.loading_finished()
+    # person-knows-person subgraph of the persons located in 'country', indexed by their position in person_indices
+    person_knows_person = graph.person_knows_person[person_indices, person_indices].new()
 
     # calculate triangles
-    r = person_knows_person.mxm(person_knows_person).new()
-    r << r.ewise_mult(person_knows_person)
-    triangle_count = r.reduce_rows().new().reduce().new().value // 6
+    triangle_count = count_triangles(person_knows_person)
+
+    lap('Triangles calculated. All done', person_knows_person)
+
+    return [(triangle_count,)]
+
+
+def calc(data_dir, country_name):
+    return run(__name__, data_dir, (country_name,))
 
-    logger.calculation_finished()
-    # print("Triangles calculated. All done\t%s" % logger.get_total_time(), file=stderr)
 
-    print(triangle_count)
+def calc_batch(data_dir, params_list):
+    return run_batch(__name__, data_dir, params_list)
@@ -6,93 +6,119 @@ Note: in the newer version of LDBC SNB BI this query is omitted.
       That is why the filename is 114 instead of 14.
 """
 
-from itertools import islice
+from types import SimpleNamespace
 
-from ldbc_snb_grblas.loader import Loader
-from ldbc_snb_grblas.logger import Logger
-from ldbc_snb_grblas.util import parse_user_date, get_date_mask
+import numpy as np
+
+from ldbc_snb_grblas.grutil import descendant_counts
+from ldbc_snb_grblas.logger import lap
+from ldbc_snb_grblas.predicates import DateBetween, IsIn
+from ldbc_snb_grblas.runner import run, run_batch
+from ldbc_snb_grblas.util import parse_user_date, get_date_mask, ParameterError, top_k
 
 result_limit = 100
 
 
-def calc(data_dir, start_date, end_date):
+def parse_params(start_date, end_date):
     try:
-        start_date = parse_user_date(start_date)
-        end_date = parse_user_date(end_date)
+        return parse_user_date(start_date), parse_user_date(end_date)
     except ValueError as e:
-        # todo
-        print("Invalid date parameter: %s" % e)
-        return
+        raise ParameterError("Invalid date parameter: %s" % e)
 
-    # init timer
-    logger = Logger()
 
-    # load vertices
-    loader = Loader(data_dir)
+def load(loader, params=None):
+    # if the date range is known, only the messages created in it are read
+    messages_where = [DateBetween('creationDate', *params)] if params is not None else []
 
     persons = loader.load_vertex('person', column_names=['firstName', 'lastName'], is_dynamic=True)
-    posts = loader.load_vertex('post', column_names=['creationDate'], is_dynamic=True)
-    comments = loader.load_vertex('comment', column_names=['creationDate'], is_dynamic=True)
-
-    # print("Vertices loaded\t%s" % logger.get_total_time(), file=stderr)
-
-    post_hascreator_person = loader.load_edge(posts, 'hasCreator', persons, is_dynamic=True)
-    comment_replyof_post = loader.load_edge(comments, 'replyOf', posts, is_dynamic=True, to_id_header_override='ParentPost.id')
-    comment_replyof_comment = loader.load_edge(comments, 'replyOf', comments, is_dynamic=True, to_id_header_override='ParentComment.id')
-
-    # print("Edges loaded\t%s" % logger.get_total_time(), file=stderr)
-    logger.loading_finished()
+    posts = loader.load_vertex('post', date_column_names=['creationDate'], is_dynamic=True, where=messages_where)
+    comments = loader.load_vertex('comment', date_column_names=['creationDate'], is_dynamic=True,
+                                  where=messages_where)
+
+    lap('Vertices loaded')
+
+    # ...and only the edges between them
+    comments_where, posts_where, parent_comments_where, parent_posts_where = [], [], [], []
+    if messages_where:
+        comments_where = [IsIn('Comment.id', comments.mapping.ids)]
+        posts_where = [IsIn('Post.id', posts.mapping.ids)]
+        parent_comments_where = [IsIn('ParentComment.id', comments.mapping.ids)]
+        parent_posts_where = [IsIn('ParentPost.id', posts.mapping.ids)]
+
+    post_hascreator_person = loader.load_edge(posts, 'hasCreator', persons, is_dynamic=True, where=posts_where)
+    comment_replyof_post = loader.load_edge(comments, 'replyOf', posts, is_dynamic=True, to_id_header_override='ParentPost.id',
+                                            where=comments_where + parent_posts_where)
+    comment_replyof_comment = loader.load_edge(comments, 'replyOf', comments, is_dynamic=True, to_id_header_override='ParentComment.id',
+                                               where=comments_where + parent_comments_where)
+
+    lap('Edges loaded')
+
+    return SimpleNamespace(
+        persons=persons,
+        posts=posts,
+        comments=comments,
+        post_hascreator_person=post_hascreator_person,
+        comment_replyof_post=comment_replyof_post,
+        comment_replyof_comment=comment_replyof_comment,
+    )
+
+
+def compute(graph, start_date, end_date):
+    persons = graph.persons
+    posts = graph.posts
+    comments = graph.comments
+    post_hascreator_person = graph.post_hascreator_person
+    comment_replyof_post = graph.comment_replyof_post
+    comment_replyof_comment = graph.comment_replyof_comment
 
     # get masks
-    comments_mask = get_date_mask(comments, 0, start_date, end_date)
-    posts_mask = get_date_mask(posts, 0, start_date, end_date)
+    comments_mask = np.flatnonzero(get_date_mask(comments, 'creationDate', start_date, end_date))
+    posts_mask = np.flatnonzero(get_date_mask(posts, 'creationDate', start_date, end_date))
 
-    # print("Edge masks calculated\t%s" % logger.get_total_time(), file=stderr)
+    lap('Edge masks calculated')
 
     # calculate post (=thread) count for each person
     masked_post_hascreator_person = post_hascreator_person[posts_mask, :].new()
     thread_count = masked_post_hascreator_person.reduce_columns().new()
 
-    # print("Thread counts calculated\t%s" % logger.get_total_time(), file=stderr)
-
-    # calculate transitive reply tree for each post
-    replies = comment_replyof_post[comments_mask, posts_mask].new().T.new()
-    front = replies.dup()
-
-    masked_comment_replyof_comment = comment_replyof_comment[comments_mask, comments_mask].new()
-    while True:
-        front << front.mxm(masked_comment_replyof_comment.T)
-
-        if not front.nvals:
-            break
+    lap('Thread counts calculated', thread_count)
 
-        replies << replies.ewise_add(front)
-
-    # reduce to get number of replies per post
-    replies_per_post = replies.reduce_rows().new()
+    # calculate number of transitive replies per post
+    replies_per_post = descendant_counts(comment_replyof_post[comments_mask, posts_mask].new(),
+                                         comment_replyof_comment[comments_mask, comments_mask].new())
 
     # join hasCreator, to get replies per person
     replies_per_person = replies_per_post.vxm(masked_post_hascreator_person).new()
-    replies_per_person = dict(zip(*replies_per_person.to_values()))
 
-    # print("Replies calculated\t%s" % logger.get_total_time(), file=stderr)
+    lap('Replies calculated', replies_per_person)
 
-    # create list of (person_id, person_index, thread_count, message_count),
-    # where message count equals to thread count + transitive replies count
-    result = map(lambda x: (persons.index2id(x[0]), x[0], x[1], x[1] + replies_per_person.get(x[0], 0)),
-                 zip(*thread_count.to_values()))
+    # message count equals to thread count + transitive replies count
+    # (the persons with replies are a subset of the ones with threads)
+    person_indexes, thread_counts = thread_count.to_values()
+    reply_indexes, reply_counts = replies_per_person.to_values()
+    message_counts = thread_counts.astype(np.int64)
+    message_counts[np.searchsorted(person_indexes, reply_indexes)] += reply_counts
+    person_ids = persons.indices_to_ids(person_indexes)
 
-    # sort by replies dsc, person id asc
-    sorted_result = sorted(result, key=lambda x: (-x[3], x[0]))
-    # print("Data sorted\t%s" % logger.get_total_time(), file=stderr)
+    # top persons by message count dsc, person id asc
+    top = top_k(result_limit, [message_counts, person_ids], descending=[True])
+    lap('Data sorted')
 
     # get person data as dictiory to produce first and last names
     persons_data = persons.get_index_data_dict()
 
-    logger.calculation_finished()
-
-    for pid, pindex, threads, message_count in islice(sorted_result, result_limit):
+    rows = []
+    for pid, pindex, threads, message_count in zip(person_ids[top], person_indexes[top], thread_counts[top],
+                                                   message_counts[top]):
         first_name, last_name = persons_data[pindex]
-        print(f"{pid};{first_name};{last_name};{threads};{message_count}")
+        rows.append((pid, first_name, last_name, threads, message_count))
+
+    return rows
+
+
+def calc(data_dir, start_date, end_date):
+    return run(__name__, data_dir, (start_date, end_date))
+
 
-    # print("All done\t%s" % logger.get_total_time(), file=stderr)
+def calc_batch(data_dir, params_list):
+    return run_batch(__name__, data_dir, params_list)
@@ -3,87 +3,115 @@ LDBC SNB BI query 18. Friend recommendation
 https://ldbc.github.io/ldbc_snb_docs_snapshot/bi-read-18.pdf
 """
 
-from itertools import repeat, islice
+from itertools import repeat
+from types import SimpleNamespace
 
+from grblas import semiring
 from grblas.mask import StructuralMask
 from grblas.matrix import Matrix
-from grblas.vector import Vector
 
-from ldbc_snb_grblas.loader import Loader
-from ldbc_snb_grblas.logger import Logger
+from ldbc_snb_grblas.logger import lap
+from ldbc_snb_grblas.runner import run, run_batch
+from ldbc_snb_grblas.util import ParameterError, top_k
 
+result_separator = ' '
 
-def calc(data_dir, person_id, tag_name):
-    person_id = int(person_id)
 
-    # init timer
-    logger = Logger()
+def parse_params(person_id, tag_name):
+    try:
+        return int(person_id), tag_name
+    except ValueError as e:
+        raise ParameterError("Invalid person id parameter: %s" % e)
 
-    # load vertices
-    loader = Loader(data_dir)
 
+def load(loader, params=None):
     persons = loader.load_vertex('person', is_dynamic=True)
-    person_vector = Vector.from_values([persons.id2index(person_id)], [True], size=persons.length)
-
     tags = loader.load_vertex('tag', is_dynamic=False, column_names=['name'])
 
-    tag_index = tags.data.index([tag_name])
-    tag_vector = Vector.from_values([tag_index], [True], size=tags.length)
-
-    # print("Vertices loaded\t%s" % logger.get_total_time(), file=stderr)
+    lap('Vertices loaded')
 
     # load edges
-    person_knows_person = loader.load_edge(persons, 'knows', persons, is_dynamic=True, undirected=True)
+    person_knows_person = loader.load_edge(persons, 'knows', persons, is_dynamic=True, undirected=True,
+                                           from_id_header_override='Person1.id', to_id_header_override='Person2.id')
 
     person_hasinterest_tag = loader.load_edge(persons, 'hasInterest', tags, is_dynamic=True)
 
-    # print("Edges loaded\t%s" % logger.get_total_time(), file=stderr)
+    lap('Edges loaded')
+
+    return SimpleNamespace(
+        persons=persons,
+        tags=tags,
+        person_knows_person=person_knows_person,
+        person_hasinterest_tag=person_hasinterest_tag,
+    )
+
 
-    logger.loading_finished()
+def compute(graph, person_id, tag_name):
+    return compute_batch(graph, [(person_id, tag_name)])[0]
 
-    # direct friends of given person
-    friendsl1 = person_vector.vxm(person_knows_person).new()
 
-    # get second level friends of given person, who are interested in given tag. (They should not be in friendsl1!)
-    interested_persons = tag_vector.vxm(person_hasinterest_tag.T).new(mask=~StructuralMask(friendsl1))
+def compute_batch(graph, params_list):
+    """
+    Calculates the query for several (person_id, tag_name) bindings at once. The person and tag vectors of the
+    bindings are stacked into matrices (one row per binding), so every step is a single matrix-matrix operation.
+    """
+    persons = graph.persons
+    tags = graph.tags
+    person_knows_person = graph.person_knows_person
+    person_hasinterest_tag = graph.person_hasinterest_tag
 
-    # manually remove the parameter person as he is interested in the given tag and is a friend of his friends
-    del interested_persons[persons.id2index(person_id)]
+    person_indexes = []
+    tag_indexes = []
+    for person_id, tag_name in params_list:
+        person_index = persons.id2index(person_id, auto_create=False)
+        if person_index is None:
+            raise ParameterError("Person %d not found." % person_id)
 
-    friendsl2 = friendsl1.vxm(person_knows_person).new(mask=StructuralMask(interested_persons))
-    friendsl2_keys, _ = friendsl2.to_values()
+        try:
+            tag_index = tags.data.index([tag_name])
+        except ValueError:
+            raise ParameterError("Tag '%s' not found." % tag_name)
 
-    # calculate mutual friend count...
-    # result_matrix start out as selection matrix for level2 friends
-    result_matrix = Matrix.from_values(friendsl2_keys, friendsl2_keys,
-                                       values=repeat(1, friendsl2.nvals),
-                                       nrows=persons.length,
-                                       ncols=persons.length)
+        person_indexes.append(person_index)
+        tag_indexes.append(tag_index)
 
-    # get the corresponding friends for each level2 friend
-    result_matrix << result_matrix.mxm(person_knows_person)
+    binding_count = len(params_list)
+    person_matrix = Matrix.from_values(range(binding_count), person_indexes, repeat(True, binding_count),
+                                       nrows=binding_count, ncols=persons.length)
+    tag_matrix = Matrix.from_values(range(binding_count), tag_indexes, repeat(True, binding_count),
+                                    nrows=binding_count, ncols=tags.length)
 
-    # create a selection matrix for level1 friends
-    friendsl1_keys, _ = friendsl1.to_values()
-    friendsl1_matrix = Matrix.from_values(friendsl1_keys, friendsl1_keys,
-                                          values=repeat(1, friendsl1.nvals),
-                                          nrows=persons.length,
-                                          ncols=persons.length)
+    # direct friends of given persons
+    friendsl1 = person_matrix.mxm(person_knows_person, op=semiring.any_pair).new()
 
-    # filter for level1 friends (so we will have the mutual friends)
-    result_matrix << result_matrix.mxm(friendsl1_matrix)
+    # get second level friends of given persons, who are interested in given tags. They should not be in friendsl1,
+    # and the parameter person should be removed as well, as he is interested in the given tag and is a friend of
+    # his friends.
+    excluded = friendsl1.ewise_add(person_matrix).new()
+    interested_persons = tag_matrix.mxm(person_hasinterest_tag.T, op=semiring.any_pair).new(
+        mask=~StructuralMask(excluded))
 
-    # reduce rows to get count of mutual friends for each person and
-    # create (person_index, count) tuples
-    result_values = zip(*result_matrix.reduce_rows().new().to_values())
+    # count of mutual friends: number of paths from the parameter person to the level2 friend through level1 friends
+    mutual_friends = friendsl1.mxm(person_knows_person, op=semiring.plus_pair).new(
+        mask=StructuralMask(interested_persons))
 
-    # create final (person_id, count) tuples and sort them by count ASC, id DESC
-    result = sorted(map(lambda x: (persons.index2id(x[0]), x[1]), result_values), key=lambda x: (-x[1], x[0]))
+    results = []
+    for i in range(binding_count):
+        # create (person_index, count) tuples for this binding
+        friendsl2_indexes, counts = mutual_friends[i, :].new().to_values()
 
-    logger.calculation_finished()
+        # top (person_id, count) tuples by count DESC, id ASC
+        friendsl2_ids = persons.indices_to_ids(friendsl2_indexes)
+        top = top_k(20, [counts, friendsl2_ids], descending=[True])
+
+        results.append(list(zip(friendsl2_ids[top], counts[top])))
+
+    return results
+
+
+def calc(data_dir, person_id, tag_name):
+    return run(__name__, data_dir, (person_id, tag_name))
 
-    # print top results
-    for person_id, mutual_friend_count in islice(result, 20):
-        print(person_id, mutual_friend_count)
 
-    # print("All done\t%s" % logger.get_total_time(), file=stderr)
+def calc_batch(data_dir, params_list):
+    return run_batch(__name__, data_dir, params_list)
@@ -2,118 +2,139 @@
 LDBC SNB BI query 19. Interaction path between cities
 https://ldbc.github.io/ldbc_snb_docs_snapshot/bi-read-19.pdf
 """
-from itertools import repeat
+from types import SimpleNamespace
 
-from grblas import dtypes, semiring
+import numpy as np
+from grblas import dtypes
 from grblas.mask import StructuralMask
-from grblas.matrix import Matrix
-from grblas.ops import UnaryOp
 
-from ldbc_snb_grblas.loader import Loader
-from ldbc_snb_grblas.logger import Logger
+from ldbc_snb_grblas.grutil import reciprocal, set_diagonal, shortest_paths
+from ldbc_snb_grblas.loader import REPLY_OF_HEADERS, EdgeSpec
+from ldbc_snb_grblas.logger import lap
+from ldbc_snb_grblas.runner import run, run_batch
+from ldbc_snb_grblas.util import ParameterError, top_k
 
+result_separator = ' '
 
-def calc(data_dir, city1_id, city2_id):
-    city1_id = int(city1_id)
-    city2_id = int(city2_id)
 
-    # init timer
-    logger = Logger()
+def parse_params(city1_id, city2_id):
+    try:
+        return int(city1_id), int(city2_id)
+    except ValueError as e:
+        raise ParameterError("Invalid city id parameter: %s" % e)
 
-    # load vertices
-    loader = Loader(data_dir)
 
+def load(loader, params=None):
     persons = loader.load_empty_vertex('person')
     places = loader.load_empty_vertex('place')
-    comments = loader.load_empty_vertex('comment')
-    posts = loader.load_empty_vertex('post')
-
-    city1_index = places.id2index(city1_id)
-    city2_index = places.id2index(city2_id)
-
-    # print("Vertices loaded\t%s" % logger.get_total_time(), file=stderr)
+    # comments and posts in one index space, so the edges of both are loaded into the same matrices
+    messages = loader.load_empty_vertex('message')
+
+    lap('Vertices loaded')
+
+    # load edges (the files are parsed in parallel, but the mappings are created in this order, and every matrix is
+    # sized to the final lengths of the mappings)
+    person_knows_person, person_locatedin_city, message_hascreator_person, comment_replyof_message = loader.load_many([
+        EdgeSpec(persons, 'knows', persons, is_dynamic=True, undirected=True,
+                 from_id_header_override='Person1.id', to_id_header_override='Person2.id'),
+        EdgeSpec(persons, 'isLocatedIn', places, is_dynamic=True),
+        EdgeSpec(messages, 'hasCreator', persons, is_dynamic=True),
+        EdgeSpec(messages, 'replyOf', messages, is_dynamic=True, to_id_header_override=REPLY_OF_HEADERS),
+    ])
+
+    return SimpleNamespace(
+        persons=persons,
+        places=places,
+        person_knows_person=person_knows_person,
+        person_locatedin_city=person_locatedin_city,
+        message_hascreator_person=message_hascreator_person,
+        comment_replyof_message=comment_replyof_message,
+    )
+
+
+def _persons_in_city(graph, city_id):
+    """Returns the indexes of persons located in the given city."""
+    city_index = graph.places.id2index(city_id, auto_create=False)
+    if city_index is None:
+        return np.empty(0, dtype=np.uint64)
+
+    persons_in_city, _ = graph.person_locatedin_city[:, city_index].new().to_values()
+    return persons_in_city
+
+
+def _weight_matrix(graph):
+    """Calculates the (reciprocal) interaction weights between persons who know each other."""
+    persons = graph.persons
+    person_knows_person = graph.person_knows_person
+    message_hascreator_person = graph.message_hascreator_person
+    comment_replyof_message = graph.comment_replyof_message
+
+    # calculate weight matrix: the replies of the persons (columns) to the messages of the persons (rows)
+    person_replyof_message = message_hascreator_person.T.mxm(comment_replyof_message.T).new()
+    person_weight_person = person_replyof_message.mxm(message_hascreator_person).new(dtype=dtypes.FP32, mask=StructuralMask(person_knows_person))
 
-    # load edges
-    person_knows_person = loader.load_edge(persons, 'knows', persons, is_dynamic=True, undirected=True,
-                                           from_id_header_override='Person1.id', to_id_header_override='Person2.id')
-    person_locatedin_city = loader.load_edge(persons, 'isLocatedIn', places, is_dynamic=True,
-                                             rmask={city1_index, city2_index})
+    # make sure we have a square matrix. It can be different because not all person created replies or comments.
+    person_weight_person.resize(persons.length, persons.length)
 
-    persons_in_city1, _ = person_locatedin_city[:, city1_index].new().to_values()
-    persons_in_city2, _ = person_locatedin_city[:, city2_index].new().to_values()
+    # make weight matrix bidirectional
+    person_weight_person << person_weight_person.ewise_add(person_weight_person.T)
 
-    # create a matrix containing message-hascreator-person relation, which contains both posts and comments
-    # fixme: does it worth at all to create these message-hascreator and replyof-message matrices...?
-    # fixme: This could be solved by multiplying them separately.
-    comment_hascreator_person = loader.load_edge(comments, 'hasCreator', persons, is_dynamic=True)
-    post_hascreator_person = loader.load_edge(posts, 'hasCreator', persons, is_dynamic=True)
+    person_weight_person = reciprocal(person_weight_person)
 
-    # make sure to have the same person dimension length
-    person_knows_person.resize(persons.length, persons.length)
-    comment_hascreator_person.resize(comment_hascreator_person.nrows, persons.length)
-    post_hascreator_person.resize(post_hascreator_person.nrows, persons.length)
+    # set diagonal to 0, every person is at distance 0 from itself
+    return set_diagonal(person_weight_person, 0)
 
-    message_hascreator_person = comment_hascreator_person.dup()
-    message_hascreator_person.resize(comments.length + posts.length, persons.length)
-    message_hascreator_person[comments.length:comments.length + posts.length, :] = post_hascreator_person
 
-    # create a matrix containing comment-replyOf-message relation, which contains both posts and comments as parents
-    comment_replyof_comment = loader.load_edge(comments, 'replyOf', comments, is_dynamic=True, to_id_header_override='ParentComment.id')
-    comment_replyof_post = loader.load_edge(comments, 'replyOf', posts, is_dynamic=True, to_id_header_override='ParentPost.id')
-    comment_replyof_messge = comment_replyof_comment.dup()
-    comment_replyof_messge.resize(comments.length, comments.length + posts.length)
-    comment_replyof_messge[:, comments.length:comments.length + posts.length] = comment_replyof_post
+def compute(graph, city1_id, city2_id):
+    return compute_batch(graph, [(city1_id, city2_id)])[0]
 
-    logger.loading_finished()
 
-    # calculate weight matrix
-    person_replyof_message = message_hascreator_person.T.mxm(comment_replyof_messge.T).new()
-    person_weight_person = person_replyof_message.mxm(comment_hascreator_person).new(dtype=dtypes.FP32, mask=StructuralMask(person_knows_person))
+def compute_batch(graph, params_list):
+    """
+    Calculates the query for several (city1_id, city2_id) bindings at once. The weight matrix is built only once,
+    and the shortest paths from the persons of every city1 are calculated together, in one stacked path matrix.
+    """
+    persons = graph.persons
 
-    # make sure we have a square matrix. It can be different because not all person created replies or comments.
-    person_weight_person.resize(persons.length, persons.length)
+    bindings = [(_persons_in_city(graph, city1_id), _persons_in_city(graph, city2_id))
+                for city1_id, city2_id in params_list]
+    results = [[] for _ in bindings]
 
-    # make weight matrix bidirectional
-    person_weight_person << person_weight_person.ewise_add(person_weight_person.T)
+    # bindings with results, and the first row of their sources in the path matrix
+    active = [i for i, (persons_in_city1, persons_in_city2) in enumerate(bindings)
+              if len(persons_in_city1) and len(persons_in_city2)]
+    if not active:
+        return results
 
-    recipr = UnaryOp.register_anonymous(lambda x: 1/x)
-    person_weight_person << person_weight_person.apply(recipr)
+    first_rows = np.cumsum([0] + [len(bindings[i][0]) for i in active])
 
-    # calculate shortest path on person_weight_person using Floyd-Warshall alg.
-    # set diagonal to 0
-    for i in range(person_weight_person.ncols):
-        person_weight_person[i, i] << 0
+    person_weight_person = _weight_matrix(graph)
 
-    # Batched Bellman-Ford algorithm for finding shortest path
-    len_city1 = len(persons_in_city1)
-    path_matrix = Matrix.from_values(range(len_city1), persons_in_city1, repeat(0, len_city1),
-                                     ncols=persons.length, dtype=person_weight_person.dtype)
+    # shortest paths from the persons of every city1
+    sources = np.concatenate([bindings[i][0] for i in active])
+    path_matrix = shortest_paths(person_weight_person, sources)
 
-    prev_path_matrix = path_matrix.dup()
-    while True:
-        path_matrix << path_matrix.mxm(person_weight_person, op=semiring.min_plus)
+    for i, first_row, last_row in zip(active, first_rows[:-1], first_rows[1:]):
+        persons_in_city1, persons_in_city2 = bindings[i]
 
-        if path_matrix.isequal(prev_path_matrix):
-            # break if a fix point is reached
-            break
+        # extract only the sources of this binding and people in city 2
+        binding_results = path_matrix[int(first_row):int(last_row), list(persons_in_city2)].new()
 
-        prev_path_matrix = path_matrix.dup()
+        p1, p2, weights = binding_results.to_values()
+        person1_ids = persons.indices_to_ids(persons_in_city1[p1])
+        person2_ids = persons.indices_to_ids(persons_in_city2[p2])
 
-    # extract only people in city 2
-    results = path_matrix[:, list(persons_in_city2)].new()
+        # sort results: weight desc, person1 id asc, person2 id asc
+        lap('Result extracted, sorting...')
+        order = top_k(None, [weights, person1_ids, person2_ids], descending=[True])
+        results[i] = list(zip(person1_ids[order], person2_ids[order], weights[order]))
 
-    result_tuples = [
-        (persons.index2id(persons_in_city1[p1]), persons.index2id(persons_in_city2[p2]), w)
-        for p1, p2, w in zip(*results.to_values())
-    ]
+    return results
 
-    # sort and print results
-    # print("Result extracted, sorting...\t%s" % logger.get_total_time(), file=stderr)
-    result_tuples = sorted(result_tuples, key=lambda x: (-x[2], x[0], x[1]))
 
-    logger.calculation_finished()
+def calc(data_dir, city1_id, city2_id):
+    return run(__name__, data_dir, (city1_id, city2_id))
 
-    for pair in result_tuples:
-        print(*pair)
 
-    # print("All done!\t%s" % logger.get_total_time(), file=stderr)
+def calc_batch(data_dir, params_list):
+    return run_batch(__name__, data_dir, params_list)
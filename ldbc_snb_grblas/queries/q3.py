@@ -3,87 +3,117 @@ LDBC SNB BI query 3. Popular topics in a country
 https://ldbc.github.io/ldbc_snb_docs_snapshot/bi-read-03.pdf
 """
 
-from itertools import islice
+from types import SimpleNamespace
 
-from ldbc_snb_grblas.loader import Loader
-from ldbc_snb_grblas.logger import Logger
+from ldbc_snb_grblas.grutil import mask_matrix
+from ldbc_snb_grblas.logger import lap
+from ldbc_snb_grblas.predicates import Equals, IsIn
+from ldbc_snb_grblas.runner import run, run_batch
+from ldbc_snb_grblas.util import top_k
 
 
-def calc(data_dir, tag_class_name, country_name):
-    # init timer
-    logger = Logger()
+def parse_params(tag_class_name, country_name):
+    return tag_class_name, country_name
+
 
-    # load data sets
-    loader = Loader(data_dir)
+def load(loader, params=None):
+    # if the tag class is known, only that tag class is read...
+    tag_class_where = [Equals('name', params[0])] if params is not None else []
 
     forums = loader.load_vertex('forum', column_names=['title', 'creationDate'], is_dynamic=True)
-    tag_class = loader.load_vertex('tagclass', column_names=['name'], is_dynamic=False)
+    tag_class = loader.load_vertex('tagclass', column_names=['name'], is_dynamic=False, where=tag_class_where)
     places = loader.load_vertex('place', column_names=['name', 'type'], is_dynamic=False)
 
     tags = loader.load_empty_vertex('tag')
     persons = loader.load_empty_vertex('person')
     posts = loader.load_empty_vertex('post')
 
-    # print("Vertices loaded\t%s" % logger.get_total_time(), file=stderr)
+    lap('Vertices loaded')
 
-    # get id of given tag class
-    tag_class_index = tag_class.data.index([tag_class_name])
+    tag_class_ids_where = [IsIn('TagClass.id', tag_class.mapping.ids)] if tag_class_where else []
+    tag_hastype_tagclass = loader.load_edge(tags, 'hasType', tag_class, is_dynamic=False, where=tag_class_ids_where)
+    place_ispartof_place = loader.load_edge(places, 'isPartOf', places, is_dynamic=False)
+    person_islocatedin_city = loader.load_edge(persons, 'isLocatedIn', places, is_dynamic=True)
+    forum_hasmoderator_person = loader.load_edge(forums, 'hasModerator', persons, is_dynamic=True)
 
-    # load tags belonging to given tag class
-    tag_hastype_tagclass = loader.load_edge(tags, 'hasType', tag_class, is_dynamic=False,
-                                            rmask=[tag_class_index])
+    # ...with the posts having its tags
+    post_hastag_tag = loader.load_edge(posts, 'hasTag', tags, is_dynamic=True,
+                                       where=[IsIn('Tag.id', tags.mapping.ids)] if tag_class_where else [])
+    forum_containerof_post = loader.load_edge(forums, 'containerOf', posts, is_dynamic=True,
+                                              where=[IsIn('Post.id', posts.mapping.ids)] if tag_class_where else [])
+
+    return SimpleNamespace(
+        forums=forums,
+        tag_class=tag_class,
+        places=places,
+        persons=persons,
+        tag_hastype_tagclass=tag_hastype_tagclass,
+        place_ispartof_place=place_ispartof_place,
+        person_islocatedin_city=person_islocatedin_city,
+        forum_hasmoderator_person=forum_hasmoderator_person,
+        post_hastag_tag=post_hastag_tag,
+        forum_containerof_post=forum_containerof_post,
+    )
+
+
+def compute(graph, tag_class_name, country_name):
+    forums = graph.forums
+    persons = graph.persons
+
+    # get id of given tag class
+    tag_class_index = graph.tag_class.data.index([tag_class_name])
 
     # get id of given country
-    country_id = places.data.index([country_name, 'country'])
+    country_id = graph.places.data.index([country_name, 'country'])
 
     # get cities that are directly part of the given country
-    place_ispartof_place = loader.load_edge(places, 'isPartOf', places, is_dynamic=False)
-    cities_mask, _ = place_ispartof_place[:, country_id].new().to_values()
+    cities_mask, _ = graph.place_ispartof_place[:, country_id].new().to_values()
 
     # get persons located in given cities
-    person_islocatedin_city = loader.load_edge(persons, 'isLocatedIn', places, is_dynamic=True,
-                                               rmask=cities_mask)
+    person_islocatedin_city = mask_matrix(graph.person_islocatedin_city, cols=cities_mask)
 
     persons_mask, _ = person_islocatedin_city.reduce_rows().new().to_values()
-    forum_hasmoderator_person = loader.load_edge(forums, 'hasModerator', persons, is_dynamic=True,
-                                                 rmask=persons_mask)
+    forum_hasmoderator_person = mask_matrix(graph.forum_hasmoderator_person, cols=persons_mask)
 
     moderators = dict(zip(*forum_hasmoderator_person.to_values()[:2]))
 
     # tags that are directly connected to the tag_class parameter
-    tags_mask, _ = tag_hastype_tagclass[:, tag_class_index].new().to_values()
+    tags_mask, _ = graph.tag_hastype_tagclass[:, tag_class_index].new().to_values()
 
     # get posts with tags
-    post_hastag_tag = loader.load_edge(posts, 'hasTag', tags, is_dynamic=True,
-                                       rmask=tags_mask)
+    post_hastag_tag = mask_matrix(graph.post_hastag_tag, cols=tags_mask)
     posts_mask, _ = post_hastag_tag.reduce_rows().new().to_values()
 
     # forums that are located in the given country
     forums_mask, _ = forum_hasmoderator_person.reduce_rows().new().to_values()
 
     # get posts for forums that are connected to the given tag
-    forum_containerof_post = loader.load_edge(forums, 'containerOf', posts, is_dynamic=True,
-                                              lmask=forums_mask, rmask=posts_mask)
-
-    logger.loading_finished()
+    forum_containerof_post = mask_matrix(graph.forum_containerof_post, rows=forums_mask, cols=posts_mask)
 
     # reduce to gte post count
     posts_per_forum = forum_containerof_post.reduce_rows().new()
 
-    # print("Results calculated\t%s" % logger.get_total_time(), file=stderr)
+    lap('Results calculated', posts_per_forum)
 
-    # sort results
-    result = sorted(zip(*posts_per_forum.to_values()), key=lambda x: (-x[1], x[0]))
-    # print("Data sorted\t%s" % logger.get_total_time(), file=stderr)
+    # top 20 forums by post count desc, forum id asc
+    forum_indexes, post_counts = posts_per_forum.to_values()
+    forum_ids = forums.indices_to_ids(forum_indexes)
+    top = top_k(20, [post_counts, forum_ids], descending=[True])
+    lap('Data sorted')
 
-    logger.calculation_finished()
-
-    # print results
-    for forum_index, post_count in islice(result, 20):
-        forum_id = forums.index2id(forum_index)
+    rows = []
+    for forum_index, post_count, forum_id in zip(forum_indexes[top], post_counts[top], forum_ids[top]):
         forum_title = forums.data[forum_index][0]
         forum_date = forums.data[forum_index][1]
         person_id = persons.index2id(moderators[forum_index])
-        print(f"{forum_id};{forum_title};{forum_date};{person_id};{post_count}")
+        rows.append((forum_id, forum_title, forum_date, person_id, post_count))
+
+    return rows
+
+
+def calc(data_dir, tag_class_name, country_name):
+    return run(__name__, data_dir, (tag_class_name, country_name))
+
 
-    # print("All done\t%s" % logger.get_total_time(), file=stderr)
+def calc_batch(data_dir, params_list):
+    return run_batch(__name__, data_dir, params_list)
@@ -5,60 +5,99 @@ https://ldbc.github.io/ldbc_snb_docs_snapshot/bi-read-04.pdf
 todo: results with 0 points are not added as of yet.
 """
 
-from itertools import islice
+from types import SimpleNamespace
 
-from ldbc_snb_grblas.loader import Loader
-from ldbc_snb_grblas.logger import Logger
+from ldbc_snb_grblas.grutil import mask_matrix
+from ldbc_snb_grblas.logger import lap
+from ldbc_snb_grblas.predicates import IsIn
+from ldbc_snb_grblas.runner import run, run_batch
+from ldbc_snb_grblas.util import top_k
 
 
-def calc(data_dir, country_name):
-    # init timer
-    logger = Logger()
+def parse_params(country_name):
+    return country_name,
+
 
-    # load vertices
-    loader = Loader(data_dir)
+def load(loader, params=None):
     places = loader.load_vertex('place', column_names=['name', 'type'], is_dynamic=False)
-    persons = loader.load_empty_vertex('person')
+    persons = loader.load_vertex('person', column_names=['firstName', 'lastName', 'creationDate'], is_dynamic=True)
     forums = loader.load_empty_vertex('forum')
     posts = loader.load_empty_vertex('post')
 
-    # print("Vertices loaded\t%s" % logger.get_total_time(), file=stderr)
+    lap('Vertices loaded')
 
-    # get id of given country
-    country_index = places.data.index([country_name, 'country'])
+    place_ispartof_place = loader.load_edge(places, 'isPartOf', places, is_dynamic=False)
 
-    # load edges
-    place_ispartof_place = loader.load_edge(places, 'isPartOf', places, is_dynamic=False, rmask=(country_index,))
-    cities_mask, _ = place_ispartof_place[:, country_index].new().to_values()
+    # if the country is known, only the persons located in it, the forums with such members and the posts
+    # of these forums are read
+    cities_where = []
+    if params is not None:
+        country_index = places.data.index([params[0], 'country'])
+        cities_mask, _ = place_ispartof_place[:, country_index].new().to_values()
+        cities_where = [IsIn('Place.id', places.indices_to_ids(cities_mask))]
 
-    person_islocatedin_place = loader.load_edge(persons, 'isLocatedIn', places, is_dynamic=True, rmask=cities_mask)
-    members_mask, _ = person_islocatedin_place.reduce_rows().new().to_values()
-    forum_hasmember_person = loader.load_edge(forums, 'hasMember', persons, is_dynamic=True, rmask=members_mask)
+    person_islocatedin_place = loader.load_edge(persons, 'isLocatedIn', places, is_dynamic=True, where=cities_where)
+
+    members_where = []
+    if cities_where:
+        members_mask, _ = person_islocatedin_place.reduce_rows().new().to_values()
+        members_where = [IsIn('Person.id', persons.indices_to_ids(members_mask))]
+
+    forum_hasmember_person = loader.load_edge(forums, 'hasMember', persons, is_dynamic=True, where=members_where)
+    forum_containerof_post = loader.load_edge(forums, 'containerOf', posts, is_dynamic=True,
+                                              where=[IsIn('Forum.id', forums.mapping.ids)] if cities_where else [])
+    post_hascreator_person = loader.load_edge(posts, 'hasCreator', persons, is_dynamic=True,
+                                              where=[IsIn('Post.id', posts.mapping.ids)] if cities_where else [])
+
+    lap('Edges loaded')
+
+    return SimpleNamespace(
+        places=places,
+        persons=persons,
+        forums=forums,
+        place_ispartof_place=place_ispartof_place,
+        person_islocatedin_place=person_islocatedin_place,
+        forum_hasmember_person=forum_hasmember_person,
+        forum_containerof_post=forum_containerof_post,
+        post_hascreator_person=post_hascreator_person,
+    )
+
+
+def compute(graph, country_name):
+    persons = graph.persons
+    forums = graph.forums
 
-    # fixme: strictly not only loading was done until now, but some mask creations as well
-    # print("Edges loaded\t%s" % logger.get_total_time(), file=stderr)
+    # get id of given country
+    country_index = graph.places.data.index([country_name, 'country'])
+
+    cities_mask, _ = graph.place_ispartof_place[:, country_index].new().to_values()
 
-    logger.loading_finished()
+    person_islocatedin_place = mask_matrix(graph.person_islocatedin_place, cols=cities_mask)
+    members_mask, _ = person_islocatedin_place.reduce_rows().new().to_values()
+    forum_hasmember_person = mask_matrix(graph.forum_hasmember_person, cols=members_mask)
 
     # calculate members per forum
     members_count_per_forum = forum_hasmember_person.reduce_rows().new()
 
     # calculate top 100 forums
-    sorted_forums = sorted(zip(*members_count_per_forum.to_values()), key=lambda x: (-x[1], forums.index2id(x[0])))
-    top_forums_mask = {index for index, _ in islice(sorted_forums, 100)}
+    forum_indexes, member_counts = members_count_per_forum.to_values()
+    forum_ids = forums.indices_to_ids(forum_indexes)
+    top_forums_mask = forum_indexes[top_k(100, [member_counts, forum_ids], descending=[True])]
 
-    # print("Top forums calculated\t%s" % logger.get_total_time(), file=stderr)
+    lap('Top forums calculated')
 
     # calculate nr. of posts per person (not including people who don't have any posts)
-    forum_containerof_post = loader.load_edge(forums, 'containerOf', posts, is_dynamic=True, lmask=top_forums_mask)
+    forum_containerof_post = mask_matrix(graph.forum_containerof_post, rows=top_forums_mask)
     posts_mask, _ = forum_containerof_post.reduce_columns().new().to_values()
 
-    post_hascreator_person = loader.load_edge(posts, 'hasCreator', persons, is_dynamic=True, lmask=posts_mask)
+    post_hascreator_person = mask_matrix(graph.post_hascreator_person, rows=posts_mask)
 
     # create person->post_count dictionary
-    persons_index, posts_count = post_hascreator_person.reduce_columns().new().to_values()[:2]
-    result = zip(persons_index, posts_count)  # list of (person_index, post_count) 2-tuples
-    sorted_results = sorted(result, key=lambda x: (-x[1], persons.index2id(x[0])))
+    persons_index, posts_counts = post_hascreator_person.reduce_columns().new().to_values()[:2]
+    person_ids = persons.indices_to_ids(persons_index)
+
+    # top 100 persons by post count desc, person id asc
+    top = top_k(100, [posts_counts, person_ids], descending=[True])
 
     # if needed, get people who have 0 points as they have no posts
     if len(persons_index) < 100:
@@ -66,16 +105,19 @@ def calc(data_dir, country_name):
         # TODO add people with 0 points...
         pass
 
-    # load person attributes
-    persons_data = loader.load_vertex('person', column_names=['firstName', 'lastName', 'creationDate'],
-                                      is_dynamic=True)
-    persons_dict = persons_data.get_index_data_dict()
-
-    logger.calculation_finished()
+    persons_dict = persons.get_index_data_dict()
 
-    for person_index, posts_count in islice(sorted_results, 100):
-        person_id = persons.index2id(person_index)
+    rows = []
+    for person_index, posts_count, person_id in zip(persons_index[top], posts_counts[top], person_ids[top]):
         first_name, last_name, creation_date = persons_dict[person_index]
-        print(f"{person_id};{first_name};{last_name};{creation_date};{posts_count}")
+        rows.append((person_id, first_name, last_name, creation_date, posts_count))
+
+    return rows
+
+
+def calc(data_dir, country_name):
+    return run(__name__, data_dir, (country_name,))
+
 
-    # print("All done\t%s" % logger.get_total_time(), file=stderr)
+def calc_batch(data_dir, params_list):
+    return run_batch(__name__, data_dir, params_list)
@@ -2,37 +2,56 @@
 LDBC SNB BI query 7. Related topics
 https://ldbc.github.io/ldbc_snb_docs_snapshot/bi-read-07.pdf
 """
-from grblas import semiring
-from itertools import islice
+from types import SimpleNamespace
 
+import numpy as np
+from grblas import semiring
 from grblas.mask import StructuralMask
 
-from ldbc_snb_grblas.loader import Loader
-from ldbc_snb_grblas.logger import Logger
+from ldbc_snb_grblas.logger import lap
+from ldbc_snb_grblas.runner import run, run_batch
+from ldbc_snb_grblas.util import top_k
 
 result_limit = 100
 
 
-def calc(data_dir, tag_name):
-    # init timer
-    logger = Logger()
+def parse_params(tag_name):
+    return tag_name,
+
 
-    # load vertices
-    loader = Loader(data_dir)
+def load(loader, params=None):
     tags = loader.load_vertex('tag', column_names=['name'], is_dynamic=False)
     posts = loader.load_empty_vertex('post')
     comments = loader.load_empty_vertex('comment')
 
-    # print("Vertices loaded\t%s" % logger.get_total_time(), file=stderr)
+    lap('Vertices loaded')
 
     comment_hastag_tag = loader.load_edge(comments, 'hasTag', tags, is_dynamic=True)
     post_hastag_tag = loader.load_edge(posts, 'hasTag', tags, is_dynamic=True)
     comment_replyof_post = loader.load_edge(comments, 'replyOf', posts, is_dynamic=True, to_id_header_override='ParentPost.id')
     comment_replyof_comment = loader.load_edge(comments, 'replyOf', comments, is_dynamic=True, to_id_header_override='ParentComment.id')
 
-    # print("Edges loaded\t%s" % logger.get_total_time(), file=stderr)
+    lap('Edges loaded')
 
-    logger.loading_finished()
+    return SimpleNamespace(
+        tags=tags,
+        posts=posts,
+        comments=comments,
+        comment_hastag_tag=comment_hastag_tag,
+        post_hastag_tag=post_hastag_tag,
+        comment_replyof_post=comment_replyof_post,
+        comment_replyof_comment=comment_replyof_comment,
+    )
+
+
+def compute(graph, tag_name):
+    tags = graph.tags
+    posts = graph.posts
+    comments = graph.comments
+    comment_hastag_tag = graph.comment_hastag_tag
+    post_hastag_tag = graph.post_hastag_tag
+    comment_replyof_post = graph.comment_replyof_post
+    comment_replyof_comment = graph.comment_replyof_comment
 
     # get comments and posts with given tag
     tag_index = tags.data.index([tag_name])
@@ -60,22 +79,23 @@ def calc(data_dir, tag_name):
     message_replies.resize(comment_hastag_tag.nrows)
     reply_tags_count = message_replies.vxm(comment_hastag_tag).new().to_values()
 
-    # print("Counts calculated\t%s" % logger.get_total_time(), file=stderr)
+    lap('Counts calculated')
 
-    # todo: adding the name only for the top 100 could be useful, but the name is used for sorting
-    # todo: so additional logic would be needed
+    # top tags by count desc, name asc. Only the names of the tags that can be in the top 100 by count are needed.
+    tag_indexes, counts = reply_tags_count[:2]
+    tag_names = tags.data.column('name')
+    top = top_k(result_limit, [
+        counts,
+        lambda positions: np.array([tag_names[i] for i in tag_indexes[positions]], dtype=str),
+    ], descending=[True])
+    lap('Results sorted')
 
-    # map (tag_index, count) -> (tag_name, count)
-    result = map(lambda x: (tags.data[x[0]][0], x[1]), zip(*reply_tags_count))
-    # print("Tag name added\t%s" % logger.get_total_time(), file=stderr)
+    return [(tag_names[index], count) for index, count in zip(tag_indexes[top], counts[top])]
 
-    sorted_result = sorted(result, key=lambda x: (-x[1], x[0]))  # order: count asc, name desc
-    # print("Results sorted\t%s" % logger.get_total_time(), file=stderr)
 
-    logger.calculation_finished()
+def calc(data_dir, tag_name):
+    return run(__name__, data_dir, (tag_name,))
 
-    # print results...
-    for name, count in islice(sorted_result, result_limit):
-        print(f"{name};{count}")
 
-    # print("All done\t%s" % logger.get_total_time(), file=stderr)
+def calc_batch(data_dir, params_list):
+    return run_batch(__name__, data_dir, params_list)
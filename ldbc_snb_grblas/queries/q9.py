@@ -3,79 +3,105 @@ LDBC SNB BI query 9. Top thread initiators
 https://ldbc.github.io/ldbc_snb_docs_snapshot/bi-read-09.pdf
 """
 
-from itertools import islice
+from types import SimpleNamespace
 
-from ldbc_snb_grblas.loader import Loader
-from ldbc_snb_grblas.logger import Logger
-from ldbc_snb_grblas.util import parse_user_date, get_date_mask
+from ldbc_snb_grblas.grutil import descendant_counts, mask_matrix
+from ldbc_snb_grblas.logger import lap
+from ldbc_snb_grblas.predicates import DateBetween, IsIn
+from ldbc_snb_grblas.runner import run, run_batch
+from ldbc_snb_grblas.util import parse_user_date, get_date_mask, ParameterError, top_k
 
+result_separator = ' '
 
-def calc(data_dir, start_date, end_date):
+
+def parse_params(start_date, end_date):
     try:
-        start_date = parse_user_date(start_date)
-        end_date = parse_user_date(end_date)
+        return parse_user_date(start_date), parse_user_date(end_date)
     except ValueError as e:
-        # todo
-        print("Invalid date parameter: %s" % e)
-        return
+        raise ParameterError("Invalid date parameter: %s" % e)
 
-    # init timer
-    logger = Logger()
 
-    loader = Loader(data_dir)
-    persons = loader.load_vertex('person', is_dynamic=True, column_names=['firstName', 'lastName'])
-    comments = loader.load_vertex('comment', is_dynamic=True, column_names=['creationDate'])
-    posts = loader.load_vertex('post', is_dynamic=True, column_names=['creationDate'])
+def load(loader, params=None):
+    # if the date range is known, only the messages created in it are read
+    messages_where = [DateBetween('creationDate', *params)] if params is not None else []
 
-    # print("Vertices loaded\t%s" % logger.get_total_time(), file=stderr)
+    persons = loader.load_vertex('person', is_dynamic=True, column_names=['firstName', 'lastName'])
+    comments = loader.load_vertex('comment', is_dynamic=True, date_column_names=['creationDate'],
+                                  where=messages_where)
+    posts = loader.load_vertex('post', is_dynamic=True, date_column_names=['creationDate'], where=messages_where)
+
+    lap('Vertices loaded')
+
+    # ...and only the edges between them
+    comments_where, posts_where, parent_comments_where, parent_posts_where = [], [], [], []
+    if messages_where:
+        comments_where = [IsIn('Comment.id', comments.mapping.ids)]
+        posts_where = [IsIn('Post.id', posts.mapping.ids)]
+        parent_comments_where = [IsIn('ParentComment.id', comments.mapping.ids)]
+        parent_posts_where = [IsIn('ParentPost.id', posts.mapping.ids)]
+
+    post_hascreator_person = loader.load_edge(posts, 'hasCreator', persons, is_dynamic=True, where=posts_where)
+    comment_replyof_post = loader.load_edge(comments, 'replyOf', posts, is_dynamic=True,
+                                            to_id_header_override='ParentPost.id',
+                                            where=comments_where + parent_posts_where)
+    comment_replyof_comment = loader.load_edge(comments, 'replyOf', comments, is_dynamic=True,
+                                               to_id_header_override='ParentComment.id',
+                                               where=comments_where + parent_comments_where)
+
+    lap('Edges loaded')
+
+    return SimpleNamespace(
+        persons=persons,
+        comments=comments,
+        posts=posts,
+        post_hascreator_person=post_hascreator_person,
+        comment_replyof_post=comment_replyof_post,
+        comment_replyof_comment=comment_replyof_comment,
+    )
+
+
+def compute(graph, start_date, end_date):
+    persons = graph.persons
 
     # get masks
-    comments_mask = get_date_mask(comments, 0, start_date, end_date)
-    posts_mask = get_date_mask(posts, 0, start_date, end_date)
-
-    # print("Edge masks calculated\t%s" % logger.get_total_time(), file=stderr)
-
-    post_hascreator_person = loader.load_edge(posts, 'hasCreator', persons, is_dynamic=True, lmask=posts_mask)
-    comment_replyof_post = loader.load_edge(comments, 'replyOf', posts, is_dynamic=True, lmask=comments_mask,
-                                            rmask=posts_mask, to_id_header_override='ParentPost.id')
-    comment_replyof_comment = loader.load_edge(comments, 'replyOf', comments, is_dynamic=True, lmask=comments_mask,
-                                               rmask=comments_mask, to_id_header_override='ParentComment.id')
+    comments_mask = get_date_mask(graph.comments, 'creationDate', start_date, end_date)
+    posts_mask = get_date_mask(graph.posts, 'creationDate', start_date, end_date)
 
-    # print("Edges loaded\t%s" % logger.get_total_time(), file=stderr)
+    lap('Edge masks calculated')
 
-    logger.loading_finished()
+    post_hascreator_person = mask_matrix(graph.post_hascreator_person, rows=posts_mask)
+    comment_replyof_post = mask_matrix(graph.comment_replyof_post, rows=comments_mask, cols=posts_mask)
+    comment_replyof_comment = mask_matrix(graph.comment_replyof_comment, rows=comments_mask, cols=comments_mask)
 
     # get number of posts (initiated threads) per persons
     thread_count = post_hascreator_person.reduce_columns().new()
 
-    # get direct replies for each post as a person-comment matrix
-    m_person_comment = post_hascreator_person.T.mxm(comment_replyof_post.T).new()
+    # get the number of comments in the reply tree of each post, then per person
+    replies_per_post = descendant_counts(comment_replyof_post, comment_replyof_comment)
+    replies_per_person = replies_per_post.vxm(post_hascreator_person).new()
+    vec_person = thread_count.ewise_add(replies_per_person).new()
 
-    # calculate number of direct comments for persons
-    vec_person = thread_count.ewise_add(m_person_comment.reduce_rows().new()).new()
+    lap('Data calculated', vec_person)
 
-    # get all comments iteratively per person
-    while m_person_comment.nvals > 0:
-        # get next comments
-        m_person_comment << m_person_comment.mxm(comment_replyof_comment.T)
+    # top 100 persons by message count desc, person id asc
+    person_indexes, message_counts = vec_person.to_values()
+    person_ids = persons.indices_to_ids(person_indexes)
+    top = top_k(100, [message_counts, person_ids], descending=[True])
 
-        # accumulate results
-        vec_person << vec_person.ewise_add(m_person_comment.reduce_rows().new())
+    lap('Data sorted')
 
-    # print("Data calculated\t%s" % logger.get_total_time(), file=stderr)
+    rows = []
+    for person_index, message_count, person_id in zip(person_indexes[top], message_counts[top], person_ids[top]):
+        first_name = persons.data[person_index][0]
+        last_name = persons.data[person_index][1]
+        rows.append((person_id, first_name, last_name, thread_count[person_index].value, message_count))
 
-    # sort results by message_count
-    sorted_result = sorted(zip(*vec_person.to_values()), key=lambda x: (-x[1], persons.index2id(x[0])))  # fixme
+    return rows
 
-    # print("Data sorted\t%s" % logger.get_total_time(), file=stderr)
 
-    logger.calculation_finished()
+def calc(data_dir, start_date, end_date):
+    return run(__name__, data_dir, (start_date, end_date))
 
-    # print results
-    for person_index, message_count in islice(sorted_result, 100):
-        first_name = persons.data[person_index][0]
-        last_name = persons.data[person_index][1]
-        person_id = persons.index2id(person_index)
-        print(person_id, first_name, last_name, thread_count[person_index].value, message_count)
 
-    # print("All done\t%s" % logger.get_total_time(), file=stderr)
+def calc_batch(data_dir, params_list):
+    return run_batch(__name__, data_dir, params_list)
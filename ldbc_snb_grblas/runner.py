@@ -0,0 +1,186 @@
+"""
+Common driver of the query modules.
+
+Every query module in ldbc_snb_grblas.queries provides:
+  - parse_params(*params): converts the string parameters of the query, raises ParameterError if they are invalid.
+  - load(loader, params=None): loads every vertex and edge the query needs. Without 'params' the result must not
+                  depend on the parameters, so it can be reused for any number of compute calls. 'loader' is either
+                  a Loader or a Catalog, so the loaded matrices may be shared with other queries and must not be
+                  modified. When the data is loaded for a single binding, its parsed parameters are passed in
+                  'params' (only with a Loader), and the query may push filters down into the scan with them
+                  (see ldbc_snb_grblas.predicates), as long as compute gives the same result. Queries without
+                  such filters ignore 'params'.
+  - compute(graph, *params): calculates the result for the parsed parameters as a list of row tuples,
+                             without modifying 'graph'.
+  - compute_batch(graph, params_list) (optional): calculates the results of several parsed parameter bindings
+                                                  at once, returns a list of results like compute.
+  - result_separator (optional): separator of the values of a result row, ';' by default.
+"""
+
+import csv
+import importlib
+import sys
+from inspect import signature
+
+from ldbc_snb_grblas.loader import DEFAULT_DELIMITER, DEFAULT_QUOTE, Loader
+from ldbc_snb_grblas.logger import Logger, span
+from ldbc_snb_grblas.util import ParameterError
+
+
+class QueryNotFoundError(Exception):
+    pass
+
+
+def import_query(query_id):
+    """
+    Returns the module of the given query.
+    :param query_id: number of the query, e.g. 9 for ldbc_snb_grblas.queries.q9
+    :return:
+    """
+    try:
+        return importlib.import_module('.queries.q%d' % query_id, 'ldbc_snb_grblas')
+    except ModuleNotFoundError:
+        raise QueryNotFoundError("given query id (%d) not found." % query_id)
+
+
+def parse_params(query, params):
+    """Parses the string parameters of a query, raises ParameterError if they are invalid."""
+    try:
+        signature(query.parse_params).bind(*params)
+    except TypeError:
+        raise ParameterError("Invalid number of parameters for %s: %d" % (query.__name__, len(params)))
+
+    return query.parse_params(*params)
+
+
+def report_error(error):
+    """Prints an invalid parameter or an unknown query to stderr, the results are written to stdout."""
+    print(error, file=sys.stderr)
+
+
+def format_result(query, rows):
+    """Converts result rows of a query to output lines."""
+    separator = getattr(query, 'result_separator', ';')
+    return [separator.join(map(str, row)) for row in rows]
+
+
+def load(query, loader, params=None):
+    """
+    Loads the data of a query. With the (parsed) parameters of a single binding, the query may filter the data
+    while it is read.
+    """
+    return query.load(loader, params)
+
+
+def run(query, data_dir, params, *, cache_dir=None, binary_dir=None, file=None):
+    """
+    Loads the data for a query, calculates it with the given parameters and prints the result.
+
+    :param query: query module or its name.
+    :param data_dir: folder containing the input data.
+    :param params: list of (string) query parameters.
+    :param cache_dir: optional binary cache directory for the Loader.
+    :param binary_dir: optional converted dataset for the Loader (see ldbc_snb_grblas.convert).
+    :param file: output for the results, stdout by default.
+    :return: exit status, 1 if the parameters are invalid.
+    """
+    if isinstance(query, str):
+        query = importlib.import_module(query)
+
+    try:
+        params = parse_params(query, params)
+    except ParameterError as e:
+        report_error(e)
+        return 1
+
+    # init timer
+    logger = Logger()
+
+    with span('load', query=query.__name__):
+        graph = load(query, Loader(data_dir, cache_dir=cache_dir, binary_dir=binary_dir), params)
+    logger.loading_finished()
+
+    try:
+        with span('compute', query=query.__name__):
+            rows = query.compute(graph, *params)
+    except ParameterError as e:
+        report_error(e)
+        return 1
+
+    logger.calculation_finished()
+
+    for line in format_result(query, rows):
+        print(line, file=file)
+
+    return 0
+
+
+def read_params_file(params_file):
+    """
+    Reads a parameter file in the format of the LDBC SNB substitution parameters: a header line, then one binding
+    per line with the parameters separated by '|'.
+    :return: list of parameter lists
+    """
+    with open(params_file) as f:
+        reader = csv.reader(f, delimiter=DEFAULT_DELIMITER, quotechar=DEFAULT_QUOTE)
+        next(reader, None)  # header
+
+        return [row for row in reader if row]
+
+
+def compute_batch(query, graph, params_list):
+    """
+    Calculates a query for several (parsed) parameter bindings. Queries can provide a compute_batch function
+    that handles all bindings at once, otherwise compute is called for each binding.
+    :return: list of result rows for each binding.
+    """
+    if hasattr(query, 'compute_batch'):
+        return query.compute_batch(graph, params_list)
+
+    return [query.compute(graph, *params) for params in params_list]
+
+
+def run_batch(query, data_dir, params_list, *, cache_dir=None, binary_dir=None, file=None):
+    """
+    Loads the data for a query once, and calculates it for every parameter binding in 'params_list'. The results of
+    the bindings are printed in order, each one terminated by an empty line.
+
+    :param query: query module or its name.
+    :param data_dir: folder containing the input data.
+    :param params_list: list of (string) parameter lists.
+    :param cache_dir: optional binary cache directory for the Loader.
+    :param binary_dir: optional converted dataset for the Loader (see ldbc_snb_grblas.convert).
+    :param file: output for the results, stdout by default.
+    :return: exit status, 1 if the parameters are invalid.
+    """
+    if isinstance(query, str):
+        query = importlib.import_module(query)
+
+    try:
+        params_list = [parse_params(query, params) for params in params_list]
+    except ParameterError as e:
+        report_error(e)
+        return 1
+
+    # init timer
+    logger = Logger()
+
+    with span('load', query=query.__name__):
+        graph = load(query, Loader(data_dir, cache_dir=cache_dir, binary_dir=binary_dir))
+    logger.loading_finished()
+
+    try:
+        with span('compute', query=query.__name__, bindings=len(params_list)):
+            results = compute_batch(query, graph, params_list)
+    except ParameterError as e:
+        report_error(e)
+        return 1
+
+    logger.calculation_finished()
+
+    for rows in results:
+        for line in format_result(query, rows):
+            print(line, file=file)
+        print(file=file)
+
+    return 0
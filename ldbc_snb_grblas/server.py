@@ -0,0 +1,121 @@
+"""
+Resident query server.
+
+The data of a query is loaded only once, at its first request (or at startup when preloaded), and every later
+request of that query runs only the compute step against the already loaded matrices. Vertices and edges used by
+several queries are loaded only once as well (see Catalog).
+
+Line protocol (over stdin/stdout or a local TCP socket):
+    request:  <query id> <param> <param> ...     e.g. 9 2012-05-31 2012-06-30
+              Parameters containing spaces can be quoted.
+    response: the result lines followed by an empty line.
+              If the request fails, a single 'ERROR;<message>' line followed by an empty line.
+"""
+
+import logging
+import shlex
+import socketserver
+
+from ldbc_snb_grblas.catalog import Catalog
+from ldbc_snb_grblas.loader import Loader
+from ldbc_snb_grblas.logger import Logger, span
+from ldbc_snb_grblas.runner import QueryNotFoundError, format_result, import_query, parse_params
+from ldbc_snb_grblas.util import ParameterError
+
+logger = logging.getLogger(__name__)
+
+
+class _TCPServer(socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+class QueryServer:
+    def __init__(self, data_dir, *, cache_dir=None, binary_dir=None):
+        # the queries share every loaded vertex and edge through the catalog
+        self.catalog = Catalog(Loader(data_dir, cache_dir=cache_dir, binary_dir=binary_dir))
+        self._graphs = {}  # query module name -> loaded graph
+
+    def graph(self, query):
+        """Returns the loaded data of a query module, loads it if this is the first time it is needed."""
+        if query.__name__ not in self._graphs:
+            timer = Logger()
+            with span('load', query=query.__name__):
+                self._graphs[query.__name__] = self.catalog.load_query(query)
+            timer.loading_finished()
+
+        return self._graphs[query.__name__]
+
+    def preload(self, query_ids):
+        for query_id in query_ids:
+            self.graph(import_query(query_id))
+
+    def execute(self, query_id, params):
+        """
+        Calculates a query with the given (string) parameters.
+        :return: list of result lines.
+        """
+        query = import_query(query_id)
+        params = parse_params(query, params)
+        graph = self.graph(query)
+
+        timer = Logger()
+        with span('compute', query=query.__name__):
+            rows = query.compute(graph, *params)
+        timer.calculation_finished()
+
+        return format_result(query, rows)
+
+    def handle(self, line):
+        """
+        Processes one request line.
+        :return: list of response lines, without the terminating empty line.
+        """
+        try:
+            tokens = shlex.split(line)
+            if not tokens:
+                raise ParameterError("Empty request.")
+
+            try:
+                query_id = int(tokens[0])
+            except ValueError:
+                raise ParameterError("Invalid query id: '%s'" % tokens[0])
+
+            return self.execute(query_id, tokens[1:])
+        except (QueryNotFoundError, ParameterError) as e:
+            return [f"ERROR;{e}"]
+        except Exception as e:
+            # a failing request should not stop the server
+            logger.exception("Request '%s' failed." % line.strip())
+            return [f"ERROR;{type(e).__name__}: {e}"]
+
+    def serve_stream(self, infile, outfile):
+        """Answers requests read line by line from 'infile' until it is closed."""
+        for line in infile:
+            if not line.strip():
+                continue
+
+            for response_line in self.handle(line):
+                print(response_line, file=outfile)
+            print(file=outfile, flush=True)
+
+    def serve_socket(self, host, port):
+        """
+        Answers requests on a TCP socket. Clients are served one after another, as the loaded data is shared
+        and GraphBLAS objects are not safe to use from multiple threads.
+        """
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    line = line.decode()
+                    if not line.strip():
+                        continue
+
+                    response = server.handle(line) + ['']
+                    self.wfile.write(('\n'.join(response) + '\n').encode())
+                    self.wfile.flush()
+
+        with _TCPServer((host, port), Handler) as tcp_server:
+            logger.info("Listening on %s:%d" % (host, port))
+            tcp_server.serve_forever()
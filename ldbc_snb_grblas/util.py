@@ -1,6 +1,17 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
 import pytz
 from dateutil.parser import isoparse
 
+EPOCH = datetime(1970, 1, 1, tzinfo=pytz.utc)
+
+
+class ParameterError(ValueError):
+    """Raised when a query parameter is invalid."""
+    pass
+
 
 def parse_user_date(date_str):
     date = isoparse(date_str)
@@ -12,19 +23,110 @@ def parse_user_date(date_str):
     return date
 
 
-def get_date_mask(vertex_type, data_index, start_date, end_date):
+def to_epoch_millis(date):
+    """Converts a timezone aware datetime to milliseconds since the epoch, the format of the parsed date columns."""
+    return (date - EPOCH) // timedelta(milliseconds=1)
+
+
+def parse_dates(date_strs):
+    """
+    Parses a sequence of date strings (e.g. the 'creationDate' column of a vertex file) in one vectorized step.
+
+    :param date_strs: sequence of ISO 8601 date strings. Dates without timezone are treated as UTC.
+    :return: numpy int64 array of milliseconds since the epoch.
+    """
+    dates = pd.to_datetime(pd.Series(date_strs, dtype=object), utc=True)
+    return ((dates - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1)).to_numpy(dtype=np.int64)
+
+
+def get_date_mask(vertex_type, column_name, start_date, end_date):
     """
-    Creates a set containing the index of elements that has a creation date between start_date and end_date
-    :param vertex_type:
+    Creates a boolean mask of the elements that have a date between start_date and end_date (inclusive).
+    :param vertex_type: vertex type loaded with 'column_name' in its 'date_column_names'.
+    :param column_name: name of the date column, e.g. 'creationDate'.
     :param start_date:
     :param end_date:
-    :return:
+    :return: numpy bool array, True at the index of the matching elements.
     """
-    mask_indexes = set()
-    for i, data in enumerate(vertex_type.data):
-        creation_date_str = data[data_index]
-        creation_date = isoparse(creation_date_str)
-        if start_date <= creation_date <= end_date:
-            mask_indexes.add(i)
+    try:
+        dates = vertex_type.dates[column_name]
+    except KeyError:
+        raise ValueError(f"Date column '{column_name}' of {vertex_type.name} vertex is not loaded.")
+
+    return (dates >= to_epoch_millis(start_date)) & (dates <= to_epoch_millis(end_date))
+
+
+def _ascending_key(key, descending):
+    """Converts a sort key to an array that orders the elements as required in ascending order."""
+    key = np.asarray(key)
+
+    if not descending:
+        return key
+
+    if key.dtype.kind in 'iub':
+        # counts and ids fit into int64
+        return -key.astype(np.int64)
+
+    if key.dtype.kind == 'f':
+        return -key
+
+    # e.g. strings: descending order of the ranks
+    return -np.unique(key, return_inverse=True)[1]
+
+
+def top_k(k, keys, descending=()):
+    """
+    Returns the positions of the first k elements ordered by several keys, like sorting all of them and taking the
+    first k, but only the elements which can be among the first k by their first key are sorted.
+
+    E.g. the top 20 persons by score descending and id ascending: top_k(20, [scores, ids], descending=[True]).
+
+    :param k: number of elements to return, all of them (in order) if None.
+    :param keys: list of numpy arrays of the same length, the primary key first. The keys after the primary key
+                 can also be functions, which get the positions of the candidates and return their keys, so
+                 expensive keys (e.g. names) are only created for the elements that can be in the result.
+    :param descending: list of bools for the keys, True for descending order. The missing ones are ascending.
+    :return: numpy int64 array of at most k positions, in order.
+    """
+    descending = list(descending) + [False] * (len(keys) - len(descending))
+    primary = _ascending_key(keys[0], descending[0])
+
+    candidates = np.arange(len(primary))
+    if k is not None and k < len(candidates):
+        if k <= 0:
+            return candidates[:0]
+
+        # elements with a primary key after the kth smallest one can't be in the result, the ties are kept
+        threshold = np.partition(primary, k - 1)[k - 1]
+        candidates = np.flatnonzero(primary <= threshold)
+
+    candidate_keys = [primary[candidates]]
+    for key, desc in zip(keys[1:], descending[1:]):
+        key = key(candidates) if callable(key) else np.asarray(key)[candidates]
+        candidate_keys.append(_ascending_key(key, desc))
+
+    # lexsort uses the last key as primary key
+    order = np.lexsort(candidate_keys[::-1])
+
+    return candidates[order[:k]]
+
+
+def find_roots(parents):
+    """
+    Finds the root of every element of a forest by pointer jumping: in every round each element takes the parent of
+    its current parent, so the number of rounds is logarithmic in the depth of the trees.
+
+    :param parents: numpy int array, the index of the parent of every element, the roots are their own parents.
+    :return: numpy int64 array of the index of the root of every element. The elements of a cycle have one of them
+             as their root.
+    """
+    roots = np.asarray(parents, dtype=np.int64)
+
+    # a chain of n elements is resolved in log2(n) rounds
+    for _ in range(len(roots).bit_length() + 1):
+        next_roots = roots[roots]
+        if np.array_equal(next_roots, roots):
+            break
+        roots = next_roots
 
-    return mask_indexes
+    return roots
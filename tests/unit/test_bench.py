@@ -0,0 +1,34 @@
+import io
+
+from ldbc_snb_grblas.bench import compare, print_report, summarize
+
+
+def test_summarize():
+    stats = summarize([3.0, 1.0, 2.0, 10.0])
+
+    assert stats['count'] == 4
+    assert stats['min'] == 1.0
+    assert stats['median'] == stats['p50'] == 2.5
+    assert stats['mean'] == 4.0
+    assert 2.5 < stats['p90'] < stats['p99'] < 10.0
+
+
+def test_compare():
+    baseline = {'sf1': {'q9': {'load': summarize([1.0]), 'compute': summarize([0.5])}}}
+    results = {
+        'sf1': {
+            'q9': {'load': summarize([1.05]), 'compute': summarize([0.6])},
+            'q19': {'load': summarize([5.0]), 'compute': summarize([5.0])},  # not in the baseline
+        },
+    }
+
+    assert compare(results, baseline, 0.1) == [('sf1', 'q9', 'compute', 0.5, 0.6)]
+    assert compare(results, baseline, 0.25) == []
+
+    output = io.StringIO()
+    print_report(results, baseline, file=output)
+    lines = output.getvalue().splitlines()
+
+    assert len(lines) == 5
+    assert lines[2].startswith('sf1;q9;compute;1;0.600000;') and lines[2].endswith(';0.500000;+20.0%')
+    assert lines[3].endswith(';;')
@@ -0,0 +1,38 @@
+import os
+
+import numpy as np
+
+from ldbc_snb_grblas.cache import GraphCache
+
+
+def test_cache_store_and_load(tmp_path):
+    source = tmp_path / 'person_0_0.csv'
+    source.write_text('id\n1\n2\n')
+
+    cache = GraphCache(str(tmp_path / 'cache'))
+    key = cache.key(str(source), kind='vertex', column_names=[])
+
+    assert cache.load(key, str(source)) is None
+
+    cache.store(key, str(source), {'ids': np.array([1, 2])}, nrows=2)
+    meta, arrays = cache.load(key, str(source))
+
+    assert meta['nrows'] == 2
+    assert arrays['ids'].tolist() == [1, 2]
+
+    # different options result in a different entry
+    assert cache.key(str(source), kind='vertex', column_names=['name']) != key
+
+
+def test_cache_invalidation(tmp_path):
+    source = tmp_path / 'person_0_0.csv'
+    source.write_text('id\n1\n2\n')
+
+    cache = GraphCache(str(tmp_path / 'cache'))
+    key = cache.key(str(source))
+    cache.store(key, str(source), {'ids': np.array([1, 2])})
+
+    source.write_text('id\n1\n2\n3\n')
+    os.utime(source, ns=(0, 0))
+
+    assert cache.load(key, str(source)) is None
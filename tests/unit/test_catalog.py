@@ -0,0 +1,82 @@
+from ldbc_snb_grblas.catalog import Catalog
+from ldbc_snb_grblas.loader import EdgeSpec, Loader
+
+
+def _write_csv(directory, filename, lines):
+    directory.mkdir(exist_ok=True)
+    (directory / filename).write_text('\n'.join(lines) + '\n')
+
+
+def test_catalog_shares_vertices_and_edges(tmp_path):
+    _write_csv(tmp_path / 'dynamic', 'person_0_0.csv', [
+        'id|firstName|lastName',
+        '30|Jack|Smith',
+        '10|John|Doe',
+        '20|Jane|Doe',
+    ])
+    _write_csv(tmp_path / 'dynamic', 'person_knows_person_0_0.csv', [
+        'Person.id|Person.id',
+        '10|20',
+        '20|30',
+    ])
+
+    catalog = Catalog(Loader(str(tmp_path)))
+
+    persons = catalog.load_empty_vertex('person')
+    persons_with_names = catalog.load_vertex('person', ['firstName'], is_dynamic=True)
+
+    # every vertex type shares the mapping created from the vertex file
+    assert persons.mapping is persons_with_names.mapping
+    assert persons.id2index(10) == 1
+    assert persons_with_names.data[persons.id2index(10)] == ['John']
+
+    person_knows_person = catalog.load_edge(persons, 'knows', persons, is_dynamic=True)
+    assert catalog.load_edge(persons_with_names, 'knows', persons_with_names, is_dynamic=True) is person_knows_person
+    assert person_knows_person.nrows == person_knows_person.ncols == 3
+
+    masked = catalog.load_edge(persons, 'knows', persons, is_dynamic=True, lmask={persons.id2index(20)})
+    rows, columns, _ = masked.to_values()
+    assert [(persons.index2id(r), persons.index2id(c)) for r, c in zip(rows, columns)] == [(20, 30)]
+
+
+def test_catalog_keeps_handed_out_edges(tmp_path):
+    _write_csv(tmp_path / 'dynamic', 'person_0_0.csv', ['id|firstName', '10|John', '20|Jane'])
+    _write_csv(tmp_path / 'dynamic', 'person_knows_person_0_0.csv', ['Person.id|Person.id', '10|20'])
+    _write_csv(tmp_path / 'dynamic', 'person_hasInterest_tag_0_0.csv', ['Person.id|Tag.id', '30|1'])
+
+    catalog = Catalog(Loader(str(tmp_path)))
+    persons = catalog.load_empty_vertex('person')
+    tags = catalog.load_empty_vertex('tag')
+
+    person_knows_person = catalog.load_edge(persons, 'knows', persons, is_dynamic=True)
+    assert person_knows_person.nrows == person_knows_person.ncols == 2
+
+    # extends the shared person mapping
+    catalog.load_edge(persons, 'hasInterest', tags, is_dynamic=True)
+    assert persons.length == 3
+
+    resized = catalog.load_edge(persons, 'knows', persons, is_dynamic=True)
+    assert resized.nrows == resized.ncols == 3
+    assert resized.nvals == 1
+    assert catalog.load_edge(persons, 'knows', persons, is_dynamic=True) is resized
+
+    # the matrix handed out before keeps its shape
+    assert person_knows_person.nrows == person_knows_person.ncols == 2
+
+
+def test_catalog_load_many_keeps_handed_out_edges(tmp_path):
+    _write_csv(tmp_path / 'dynamic', 'person_0_0.csv', ['id|firstName', '10|John', '20|Jane'])
+    _write_csv(tmp_path / 'dynamic', 'person_knows_person_0_0.csv', ['Person.id|Person.id', '10|20'])
+    _write_csv(tmp_path / 'dynamic', 'person_hasInterest_tag_0_0.csv', ['Person.id|Tag.id', '30|1'])
+
+    catalog = Catalog(Loader(str(tmp_path)))
+    persons = catalog.load_empty_vertex('person')
+    tags = catalog.load_empty_vertex('tag')
+    person_knows_person = catalog.load_edge(persons, 'knows', persons, is_dynamic=True)
+
+    # the second load extends the person mapping, the first result is sized to it as well
+    knows, hasinterest = catalog.load_many([EdgeSpec(persons, 'knows', persons, is_dynamic=True),
+                                            EdgeSpec(persons, 'hasInterest', tags, is_dynamic=True)])
+    assert (knows.nrows, knows.ncols) == (3, 3)
+    assert (hasinterest.nrows, hasinterest.ncols) == (3, 1)
+    assert (person_knows_person.nrows, person_knows_person.ncols) == (2, 2)
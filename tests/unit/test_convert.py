@@ -0,0 +1,85 @@
+import pytest
+
+from ldbc_snb_grblas.convert import convert
+from ldbc_snb_grblas.loader import Loader
+from ldbc_snb_grblas.predicates import IsIn
+
+
+def _write_csv(directory, filename, lines):
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / filename).write_text('\n'.join(lines) + '\n')
+
+
+def _edges(m, from_vertex_type, to_vertex_type):
+    rows, columns, _ = m.to_values()
+    return sorted(zip(from_vertex_type.indices_to_ids(rows).tolist(), to_vertex_type.indices_to_ids(columns).tolist()))
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data_dir = tmp_path / 'data'
+    _write_csv(data_dir / 'dynamic', 'person_0_0.csv', ['id|firstName', '10|Ann', '20|Bob'])
+    _write_csv(data_dir / 'dynamic', 'person_knows_person_0_0.csv', ['Person1.id|Person2.id', '10|20', '30|10'])
+    _write_csv(data_dir / 'dynamic', 'person_knows_person_1_0.csv', ['Person1.id|Person2.id', '20|30'])
+    _write_csv(data_dir / 'dynamic', 'post_hasCreator_person_0_0.csv', ['Post.id|Person.id', '1|40', '2|10'])
+    _write_csv(data_dir / 'static', 'tag_0_0.csv', ['id|name', '5|x'])
+    return data_dir
+
+
+def test_convert(tmp_path, data_dir):
+    convert(str(data_dir), str(tmp_path / 'out'))
+
+    loader = Loader(str(data_dir), binary_dir=str(tmp_path / 'out'))
+    persons = loader.load_vertex('person', ['firstName'], is_dynamic=True)
+    posts = loader.load_empty_vertex('post')
+
+    person_knows_person = loader.load_edge(persons, 'knows', persons, is_dynamic=True,
+                                           from_id_header_override='Person1.id', to_id_header_override='Person2.id')
+    post_hascreator_person = loader.load_edge(posts, 'hasCreator', persons, is_dynamic=True)
+
+    # the mappings are extended with every converted id
+    assert persons.mapping.ids.tolist() == [10, 20, 30, 40]
+    assert persons.data == [['Ann'], ['Bob']]
+    assert person_knows_person.nrows == person_knows_person.ncols == 4
+    assert _edges(person_knows_person, persons, persons) == [(10, 20), (20, 30), (30, 10)]
+    assert _edges(post_hascreator_person, posts, persons) == [(1, 40), (2, 10)]
+
+    undirected = loader.load_edge(persons, 'knows', persons, is_dynamic=True, undirected=True,
+                                  from_id_header_override='Person1.id', to_id_header_override='Person2.id')
+    assert undirected.nvals == 6
+
+
+def test_convert_fallback(tmp_path, data_dir):
+    convert(str(data_dir), str(tmp_path / 'out'))
+    loader = Loader(str(data_dir), binary_dir=str(tmp_path / 'out'))
+
+    # with a predicate the csv file is parsed
+    persons = loader.load_vertex('person', is_dynamic=True)
+    masked = loader.load_edge(persons, 'knows', persons, is_dynamic=True, from_id_header_override='Person1.id',
+                              to_id_header_override='Person2.id', where=[IsIn('Person1.id', [10])])
+    assert persons.mapping.ids.tolist() == [10, 20]
+    assert _edges(masked, persons, persons) == [(10, 20)]
+
+    # the mapping is not a prefix of the converted one
+    persons = loader.load_vertex('person', is_dynamic=True, id_mask=[20])
+    person_knows_person = loader.load_edge(persons, 'knows', persons, is_dynamic=True,
+                                           from_id_header_override='Person1.id', to_id_header_override='Person2.id')
+    assert persons.mapping.ids.tolist() == [20, 10, 30]
+    assert person_knows_person.nrows == 3
+
+    # only one part file is read, which was not converted like this
+    loader = Loader(str(data_dir), '_0_0.csv', binary_dir=str(tmp_path / 'out'))
+    persons = loader.load_empty_vertex('person')
+    person_knows_person = loader.load_edge(persons, 'knows', persons, is_dynamic=True,
+                                           from_id_header_override='Person1.id', to_id_header_override='Person2.id')
+    assert _edges(person_knows_person, persons, persons) == [(10, 20), (30, 10)]
+
+
+def test_convert_keeps_unrelated_directory(tmp_path, data_dir):
+    (tmp_path / 'out').mkdir()
+    (tmp_path / 'out' / 'notes.txt').write_text('keep me')
+
+    with pytest.raises(FileExistsError):
+        convert(str(data_dir), str(tmp_path / 'out'))
+
+    assert (tmp_path / 'out' / 'notes.txt').read_text() == 'keep me'
@@ -0,0 +1,48 @@
+import filecmp
+
+import numpy as np
+
+from ldbc_snb_grblas.bench import DEFAULT_QUERIES, PARAMS_DIR, params_file_name
+from ldbc_snb_grblas.generator import generate
+from ldbc_snb_grblas.loader import Loader
+from ldbc_snb_grblas.runner import import_query, parse_params, read_params_file
+
+
+def test_generate(tmp_path):
+    counts = generate(str(tmp_path), 5000, seed=1, parts=2)
+    loader = Loader(str(tmp_path))
+
+    places = loader.load_vertex('place', ['name', 'type'], is_dynamic=False)
+    persons = loader.load_vertex('person', ['firstName', 'lastName'], is_dynamic=True,
+                                 date_column_names=['creationDate'])
+    comments = loader.load_vertex('comment', is_dynamic=True)
+
+    assert persons.length == counts['person']
+    assert places.data.column('type').find('country').size == 111
+
+    person_knows_person = loader.load_edge(persons, 'knows', persons, is_dynamic=True,
+                                           from_id_header_override='Person1.id', to_id_header_override='Person2.id')
+    assert person_knows_person.nvals == counts['person_knows_person']
+    assert persons.length == counts['person']
+
+    # every reply is to an earlier comment
+    comment_replyof_comment = loader.load_edge(comments, 'replyOf', comments, is_dynamic=True,
+                                               to_id_header_override='ParentComment.id')
+    rows, columns, _ = comment_replyof_comment.to_values()
+    assert comments.length == counts['comment']
+    assert np.all(comments.indices_to_ids(rows) > comments.indices_to_ids(columns))
+
+    for query_id in DEFAULT_QUERIES:
+        params_list = read_params_file(str(tmp_path / PARAMS_DIR / params_file_name(query_id)))
+        assert len(params_list) == 5
+        parse_params(import_query(query_id), params_list[0])
+
+
+def test_generate_is_deterministic(tmp_path):
+    generate(str(tmp_path / 'a'), 1000, seed=7)
+    generate(str(tmp_path / 'b'), 1000, seed=7)
+
+    comparison = filecmp.dircmp(str(tmp_path / 'a' / 'dynamic'), str(tmp_path / 'b' / 'dynamic'))
+    assert comparison.left_list == comparison.right_list
+    assert filecmp.cmpfiles(str(tmp_path / 'a' / 'dynamic'), str(tmp_path / 'b' / 'dynamic'), comparison.left_list,
+                            shallow=False)[0] == comparison.left_list
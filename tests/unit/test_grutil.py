@@ -1,6 +1,10 @@
+import pytest
 from grblas.matrix import Matrix
+from grblas.vector import Vector
 
-from ldbc_snb_grblas.grutil import merge_matrix
+from ldbc_snb_grblas.grutil import (TREE_ENGINE_ENV, concat_blocks, count_triangles, degree_ordered_lower_triangle,
+                                   descendant_counts, mask_matrix, merge_matrix, reachable, set_diagonal,
+                                   shortest_paths)
 
 
 def test_merge_matrix_col_wise():
@@ -30,6 +34,26 @@ def test_merge_matrix_col_wise():
     assert result.isequal(expected_result)
 
 
+def test_concat_blocks():
+    a = Matrix.from_values([0, 1], [1, 0], [1, 2], nrows=2, ncols=2)
+    b = Matrix.from_values([1], [0], [3], nrows=2, ncols=1)
+    d = Matrix.from_values([0], [0], [4], nrows=1, ncols=1)
+    expected_result = Matrix.from_values(
+        [0, 1, 1, 2],
+        [1, 0, 2, 2],
+        [1, 2, 3, 4],
+        nrows=3, ncols=3,
+    )
+
+    result = concat_blocks([[a, b], [None, d]])
+    assert result.isequal(expected_result, check_dtype=True)
+
+    with pytest.raises(ValueError):
+        concat_blocks([[a, d]])
+    with pytest.raises(ValueError):
+        concat_blocks([[a, None], [None, None]])
+
+
 def test_merge_matrix_row_wise():
     a = Matrix.from_values(
         [0, 0, 1, 2, 1],
@@ -55,3 +79,129 @@ def test_merge_matrix_row_wise():
     result = merge_matrix(a, b, row_wise=True, create_new=False)
     assert id(result) == id(a)  # 'result' and 'a' should be the same object
     assert result.isequal(expected_result)
+
+
+def test_mask_matrix():
+    a = Matrix.from_values(
+        [0, 0, 1, 2, 1],
+        [0, 1, 2, 1, 3],
+        [1, 2, 3, 4, 5],
+    )
+    expected_result = Matrix.from_values(
+        [0, 2],
+        [1, 1],
+        [2, 4],
+        nrows=3,
+        ncols=4,
+    )
+
+    result = mask_matrix(a, rows={0, 2}, cols=[1, 3])
+
+    assert result.isequal(expected_result)
+    assert mask_matrix(a).isequal(a)
+
+
+def test_shortest_paths():
+    # 0 -> 1 -> 2 is shorter than the direct 0 -> 2 edge, vertex 3 is not reachable
+    weights = Matrix.from_values(
+        [0, 1, 0, 3],
+        [1, 2, 2, 0],
+        [1.0, 2.0, 5.0, 1.0],
+        nrows=4,
+        ncols=4,
+    )
+    expected_result = Matrix.from_values(
+        [0, 0, 0, 1, 1],
+        [0, 1, 2, 1, 2],
+        [0.0, 1.0, 3.0, 0.0, 2.0],
+        nrows=2,
+        ncols=4,
+    )
+
+    result = shortest_paths(weights, [0, 1])
+
+    assert result.isequal(expected_result)
+
+
+def test_reachable():
+    # 0 -> 1 -> 2 -> 3 -> 1 (cycle), 1 -> 4, 5 is not reachable from 0 or 2
+    adjacency = Matrix.from_values(
+        [0, 1, 2, 3, 1],
+        [1, 2, 3, 1, 4],
+        [1, 1, 1, 1, 1],
+        nrows=6,
+        ncols=6,
+    )
+    frontier = Matrix.from_values([0, 1], [0, 2], [True, True], nrows=2, ncols=6)
+    expected_result = Matrix.from_values(
+        [0, 0, 0, 0, 0, 1, 1, 1, 1],
+        [0, 1, 2, 3, 4, 1, 2, 3, 4],
+        [1, 1, 1, 1, 1, 1, 1, 1, 1],
+        nrows=2,
+        ncols=6,
+    )
+
+    # only pushed, only pulled and mixed levels
+    for pull_ratio in (float('inf'), 0, 0.3):
+        result = reachable(frontier, adjacency, pull_ratio=pull_ratio)
+        assert result.isequal(expected_result)
+
+    assert reachable(frontier, adjacency, adjacency.T.new(), pull_ratio=0).isequal(expected_result)
+
+
+@pytest.mark.parametrize('engine', ['bfs', 'roots'])
+def test_descendant_counts(engine, monkeypatch):
+    # comments 0, 1 reply to post 0, 2 replies to 1, 3 to 2, 4 replies to post 2, comment 5 has no parent, post 1
+    # has no replies
+    comment_replyof_post = Matrix.from_values([0, 1, 4], [0, 0, 2], [1, 1, 1], nrows=6, ncols=3)
+    comment_replyof_comment = Matrix.from_values([2, 3], [1, 2], [1, 1], nrows=6, ncols=6)
+    expected_result = Vector.from_values([0, 2], [4, 1], size=3)
+
+    result = descendant_counts(comment_replyof_post, comment_replyof_comment, engine=engine)
+    assert result.isequal(expected_result)
+
+    monkeypatch.setenv(TREE_ENGINE_ENV, engine)
+    assert descendant_counts(comment_replyof_post, comment_replyof_comment).isequal(expected_result)
+
+    monkeypatch.setenv(TREE_ENGINE_ENV, 'unknown')
+    with pytest.raises(ValueError):
+        descendant_counts(comment_replyof_post, comment_replyof_comment)
+
+
+def test_set_diagonal():
+    a = Matrix.from_values(
+        [0, 0, 1, 2],
+        [0, 1, 2, 1],
+        [1, 2, 3, 4],
+        nrows=3,
+        ncols=3,
+    )
+    expected_result = Matrix.from_values(
+        [0, 0, 1, 1, 2, 2],
+        [0, 1, 1, 2, 1, 2],
+        [0, 2, 0, 3, 4, 0],
+        nrows=3,
+        ncols=3,
+    )
+
+    result = set_diagonal(a, 0)
+
+    assert id(result) == id(a)
+    assert result.isequal(expected_result)
+
+
+def test_count_triangles():
+    # triangles 0-1-2 and 1-2-3, 4 is isolated, 3-5 is not in a triangle
+    edges = [(0, 1), (0, 2), (1, 2), (1, 3), (2, 3), (3, 5)]
+    rows, cols = zip(*(edges + [(j, i) for i, j in edges]))
+    a = Matrix.from_values(rows, cols, [True] * len(rows), nrows=6, ncols=6)
+
+    lower = degree_ordered_lower_triangle(a)
+    assert lower.nvals == len(edges)
+
+    # relabeled as 1, 2, 3 -> 0, 1, 2 (degree 3), 0 -> 3, 5 -> 4, 4 -> 5, every edge in the row of its later vertex
+    lower_rows, lower_cols, _ = lower.to_values()
+    assert sorted(zip(lower_rows.tolist(), lower_cols.tolist())) == [(1, 0), (2, 0), (2, 1), (3, 0), (3, 1), (4, 2)]
+
+    assert count_triangles(a) == 2
+    assert count_triangles(Matrix.new(a.dtype, 6, 6)) == 0
@@ -0,0 +1,263 @@
+import numpy as np
+
+from ldbc_snb_grblas import loader as loader_module
+from ldbc_snb_grblas.loader import REPLY_OF_HEADERS, EdgeSpec, IdMapping, Loader, VertexSpec, VertexType
+from ldbc_snb_grblas.predicates import DateBetween, Equals, IsIn
+from ldbc_snb_grblas.util import get_date_mask, parse_user_date
+
+
+def _write_csv(directory, filename, lines):
+    directory.mkdir(exist_ok=True)
+    (directory / filename).write_text('\n'.join(lines) + '\n')
+
+
+def test_ids_to_indices_keeps_first_appearance_order(tmp_path):
+    persons = Loader(str(tmp_path)).load_empty_vertex('person')
+
+    indexes = persons.ids_to_indices(np.array([30, 10, 30, 20]))
+
+    assert indexes.tolist() == [0, 1, 0, 2]
+    assert [persons.index2id(i) for i in range(persons.length)] == [30, 10, 20]
+    assert persons.ids_to_indices(np.array([20, 40]), auto_create=False).tolist() == [2, -1]
+    assert persons.length == 3
+
+
+def test_load_edge(tmp_path):
+    _write_csv(tmp_path / 'dynamic', 'person_knows_person_0_0.csv', [
+        'Person.id|Person.id|creationDate',
+        '10|20|2010-01-01T00:00:00.000+0000',
+        '20|30|2010-01-01T00:00:00.000+0000',
+        '5|10|2010-01-01T00:00:00.000+0000',
+    ])
+
+    loader = Loader(str(tmp_path))
+    persons = loader.load_empty_vertex('person')
+    person_knows_person = loader.load_edge(persons, 'knows', persons, is_dynamic=True)
+
+    assert persons.length == 4
+    assert person_knows_person.nrows == person_knows_person.ncols == 4
+
+    rows, columns, _ = person_knows_person.to_values()
+    edges = {(persons.index2id(r), persons.index2id(c)) for r, c in zip(rows, columns)}
+    assert edges == {(10, 20), (20, 30), (5, 10)}
+
+    # with a mask only edges starting from already known and masked indexes are loaded
+    masked = loader.load_edge(persons, 'knows', persons, is_dynamic=True, lmask={persons.id2index(20)})
+    rows, columns, _ = masked.to_values()
+    assert [(persons.index2id(r), persons.index2id(c)) for r, c in zip(rows, columns)] == [(20, 30)]
+
+
+def test_load_vertex_date_columns(tmp_path):
+    _write_csv(tmp_path / 'dynamic', 'post_0_0.csv', [
+        'id|imageFile|creationDate|length',
+        '7||2012-05-31T10:00:00.000+0000|3',
+        '3||2012-07-01T00:00:00.000+0000|4',
+        '9||2012-06-30T00:00:00.000+0000|5',
+    ])
+
+    posts = Loader(str(tmp_path)).load_vertex('post', column_names=['length'], is_dynamic=True,
+                                             date_column_names=['creationDate'])
+
+    assert posts.data == [['3'], ['4'], ['5']]
+    assert posts.dates['creationDate'].tolist() == [1338458400000, 1341100800000, 1341014400000]
+
+    mask = get_date_mask(posts, 'creationDate', parse_user_date('2012-05-31'), parse_user_date('2012-06-30'))
+    assert mask.tolist() == [True, False, True]
+
+
+def test_load_with_predicates(tmp_path):
+    _write_csv(tmp_path / 'dynamic', 'post_0_0.csv', [
+        'id|imageFile|creationDate|language',
+        '7||2012-05-31T10:00:00.000+0000|en',
+        '3||2012-07-01T00:00:00.000+0000|en',
+        '9||2012-06-30T00:00:00.000+0000|de',
+    ])
+    _write_csv(tmp_path / 'dynamic', 'post_hasCreator_person_0_0.csv', [
+        'Post.id|Person.id',
+        '7|100',
+        '3|100',
+        '9|200',
+    ])
+
+    loader = Loader(str(tmp_path))
+    posts = loader.load_vertex('post', column_names=['language'], is_dynamic=True, where=[
+        DateBetween('creationDate', parse_user_date('2012-05-31'), parse_user_date('2012-06-30')),
+        Equals('language', 'en'),
+    ])
+
+    assert posts.mapping.ids.tolist() == [7]
+    assert posts.data == [['en']]
+
+    persons = loader.load_empty_vertex('person')
+    post_hascreator_person = loader.load_edge(posts, 'hasCreator', persons, is_dynamic=True,
+                                              where=[IsIn('Post.id', posts.mapping.ids)])
+
+    assert posts.length == 1
+    assert persons.mapping.ids.tolist() == [100]
+    assert post_hascreator_person.nvals == 1
+
+
+def test_load_many(tmp_path):
+    _write_csv(tmp_path / 'dynamic', 'person_0_0.csv', ['id|firstName', '10|Ann', '20|Bob'])
+    _write_csv(tmp_path / 'dynamic', 'person_knows_person_0_0.csv', ['Person.id|Person.id', '10|20', '30|10'])
+    _write_csv(tmp_path / 'dynamic', 'post_hasCreator_person_0_0.csv', ['Post.id|Person.id', '1|40', '2|10'])
+
+    def load(loader, parallel):
+        persons = loader.load_vertex('person', is_dynamic=True)
+        posts = loader.load_empty_vertex('post')
+        specs = [
+            VertexSpec('person', ['firstName'], is_dynamic=True),
+            EdgeSpec(persons, 'knows', persons, is_dynamic=True),
+            EdgeSpec(posts, 'hasCreator', persons, is_dynamic=True),
+        ]
+        results = loader.load_many(specs, workers=2) if parallel else [spec.load(loader) for spec in specs]
+        return persons, posts, results
+
+    persons, posts, (names, knows, hascreator) = load(Loader(str(tmp_path)), parallel=True)
+    expected_persons, expected_posts, (_, expected_knows, expected_hascreator) = load(Loader(str(tmp_path)),
+                                                                                     parallel=False)
+
+    assert names.data == [['Ann'], ['Bob']]
+    assert persons.mapping.ids.tolist() == expected_persons.mapping.ids.tolist() == [10, 20, 30, 40]
+    assert posts.mapping.ids.tolist() == expected_posts.mapping.ids.tolist()
+
+    # the matrices follow the mappings extended by the later loads of the same call
+    assert (knows.nrows, knows.ncols) == (4, 4)
+    expected_knows.resize(4, 4)
+    assert knows.isequal(expected_knows)
+    assert hascreator.isequal(expected_hascreator)
+
+
+def test_load_edge_chunk_parallel(tmp_path, monkeypatch):
+    rows = [(i * 7919 % 1000, i * 104729 % 1000) for i in range(1000)]
+    _write_csv(tmp_path / 'dynamic', 'comment_hasCreator_person_0_0.csv',
+               ['Comment.id|Person.id'] + ['%d|%d' % row for row in rows])
+
+    def load(workers):
+        loader = Loader(str(tmp_path), workers=workers)
+        comments = loader.load_empty_vertex('comment')
+        persons = loader.load_empty_vertex('person')
+        return comments, persons, loader.load_edge(comments, 'hasCreator', persons, is_dynamic=True)
+
+    expected_comments, expected_persons, expected = load(workers=1)
+
+    monkeypatch.setattr(loader_module, 'PARALLEL_SCAN_MIN_SIZE', 0)
+    comments, persons, m = load(workers=3)
+
+    assert comments.mapping.ids.tolist() == expected_comments.mapping.ids.tolist()
+    assert persons.mapping.ids.tolist() == expected_persons.mapping.ids.tolist()
+    assert m.isequal(expected)
+
+
+def test_load_multi_part_files(tmp_path):
+    _write_csv(tmp_path / 'dynamic', 'person_0_0.csv', ['id|firstName', '10|Ann'])
+    _write_csv(tmp_path / 'dynamic', 'person_1_0.csv', ['id|firstName', '30|Cid'])
+    _write_csv(tmp_path / 'dynamic', 'person_10_0.csv', ['id|firstName', '40|Dan'])
+    _write_csv(tmp_path / 'dynamic', 'person_2_0.csv', ['id|firstName', '20|Bob'])
+    _write_csv(tmp_path / 'dynamic', 'person_knows_person_0_0.csv', ['Person.id|Person.id', '10|20'])
+    _write_csv(tmp_path / 'dynamic', 'person_knows_person_1_0.csv', ['Person.id|Person.id', '30|50'])
+
+    loader = Loader(str(tmp_path))
+    persons = loader.load_vertex('person', ['firstName'], is_dynamic=True)
+
+    # parts are read in the order of the partitions
+    assert persons.mapping.ids.tolist() == [10, 30, 20, 40]
+    assert persons.data == [['Ann'], ['Cid'], ['Bob'], ['Dan']]
+
+    person_knows_person = loader.load_edge(persons, 'knows', persons, is_dynamic=True)
+    assert person_knows_person.nvals == 2
+    assert persons.mapping.ids.tolist() == [10, 30, 20, 40, 50]
+
+    # with an explicit suffix only that part is read
+    first_part = Loader(str(tmp_path), '_0_0.csv').load_vertex('person', is_dynamic=True)
+    assert first_part.mapping.ids.tolist() == [10]
+
+
+def test_load_composite_vertex(tmp_path):
+    _write_csv(tmp_path / 'dynamic', 'comment_0_0.csv', ['id|content', '3|a', '4|b'])
+    _write_csv(tmp_path / 'dynamic', 'post_0_0.csv', ['id|content', '1|c'])
+    _write_csv(tmp_path / 'dynamic', 'comment_replyOf_comment_0_0.csv', ['Comment.id|ParentComment.id', '4|3'])
+    _write_csv(tmp_path / 'dynamic', 'comment_replyOf_post_0_0.csv', ['Comment.id|ParentPost.id', '3|1'])
+    _write_csv(tmp_path / 'dynamic', 'comment_hasCreator_person_0_0.csv', ['Comment.id|Person.id', '3|10', '4|20'])
+    _write_csv(tmp_path / 'dynamic', 'post_hasCreator_person_0_0.csv', ['Post.id|Person.id', '1|10'])
+
+    loader = Loader(str(tmp_path))
+    messages = loader.load_vertex('message', ['content'], is_dynamic=True)
+    persons = loader.load_empty_vertex('person')
+
+    # comments first, then posts
+    assert messages.mapping.ids.tolist() == [3, 4, 1]
+    assert messages.data == [['a'], ['b'], ['c']]
+
+    message_replyof_message = loader.load_edge(messages, 'replyOf', messages, is_dynamic=True,
+                                               to_id_header_override=REPLY_OF_HEADERS)
+    rows, columns, _ = message_replyof_message.to_values()
+    assert sorted(zip(messages.indices_to_ids(rows).tolist(), messages.indices_to_ids(columns).tolist())) == \
+        [(3, 1), (4, 3)]
+
+    message_hascreator_person = loader.load_edge(messages, 'hasCreator', persons, is_dynamic=True)
+    rows, columns, _ = message_hascreator_person.to_values()
+    assert sorted(zip(messages.indices_to_ids(rows).tolist(), persons.indices_to_ids(columns).tolist())) == \
+        [(1, 10), (3, 10), (4, 20)]
+    assert messages.length == 3
+
+
+def test_load_edge_shared_mapping(tmp_path):
+    _write_csv(tmp_path / 'dynamic', 'comment_replyOf_comment_0_0.csv', ['Comment.id|ParentComment.id', '4|3', '5|4'])
+
+    # distinct vertex types with one mapping, like the ones of a Catalog
+    for _ in range(2):  # the second load is read from the cache
+        mapping = IdMapping()
+        comments, parents = VertexType('comment', mapping=mapping), VertexType('comment', mapping=mapping)
+        comment_replyof_comment = Loader(str(tmp_path), cache_dir=str(tmp_path / 'cache')).load_edge(
+            comments, 'replyOf', parents, is_dynamic=True, to_id_header_override='ParentComment.id')
+
+        assert mapping.ids.tolist() == [3, 4, 5]
+        assert comment_replyof_comment.nrows == comment_replyof_comment.ncols == 3
+
+
+def test_id_mapping():
+    mapping = IdMapping([50, 7, 31])
+
+    assert mapping.lookup(np.array([31, 50, 8])).tolist() == [2, 0, -1]
+    assert mapping.ids_to_indices(np.array([8, 7, 100, 8])).tolist() == [3, 1, 4, 3]
+    assert mapping.indices_to_ids(np.array([4, 0, 3])).tolist() == [100, 50, 8]
+    assert mapping.length == 5
+
+    # growing one by one should keep lookups valid
+    for oid in range(1000, 1100):
+        assert mapping.ids_to_indices([oid]).tolist() == [mapping.length - 1]
+
+    assert mapping.lookup(np.array([1050, 31])).tolist() == [55, 2]
+
+
+def test_id_mapping_merges_extended_ids():
+    rng = np.random.default_rng(0)
+    ids = rng.permutation(10000)[:3000]
+    mapping = IdMapping(ids[:100])
+    mapping.lookup(ids[:1])
+
+    # lookups between the extends use the merged arrays, which should match a full sort
+    for start in range(100, len(ids), 700):
+        mapping.extend(ids[start:start + 700])
+        assert mapping.lookup(ids).tolist() == list(range(min(start + 700, len(ids)))) + \
+            [-1] * max(len(ids) - start - 700, 0)
+
+    expected = IdMapping(ids)
+    expected._sort()
+    assert mapping._sorted_ids.tolist() == expected._sorted_ids.tolist()
+    assert mapping._sorted_indexes.tolist() == expected._sorted_indexes.tolist()
+
+
+def test_id_mapping_snapshot():
+    mapping = IdMapping([50, 7, 31])
+    snapshot = mapping.snapshot()
+
+    mapping.ids_to_indices(np.array([8, 100]))
+    assert snapshot.length == 3
+    assert snapshot.lookup(np.array([8, 31])).tolist() == [-1, 2]
+
+    # extending the snapshot doesn't write into the original mapping
+    assert snapshot.ids_to_indices(np.array([9])).tolist() == [3]
+    assert mapping.ids.tolist() == [50, 7, 31, 8, 100]
+    assert snapshot.ids.tolist() == [50, 7, 31, 9]
@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+
+from ldbc_snb_grblas.logger import Logger, disable_spans, enable_spans, lap, span, traced
+
+
+class _Result:
+    nvals = 3
+    nrows = 4
+    ncols = 5
+
+
+def test_spans_json():
+    output = io.StringIO()
+
+    @traced()
+    def stage():
+        return _Result()
+
+    enable_spans(output)
+    try:
+        with span('compute', query='q9') as s:
+            stage()
+            lap('first')
+            s.set(bindings=2)
+    finally:
+        disable_spans()
+
+    # spans are not recorded anymore
+    with span('ignored') as s:
+        s.record(_Result())
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert [(r['span'], r['parent']) for r in records] == [('stage', 'compute'), ('first', 'compute'),
+                                                           ('compute', None)]
+    assert records[0]['nvals'] == 3 and records[0]['nrows'] == 4 and records[0]['ncols'] == 5
+    assert records[2]['query'] == 'q9' and records[2]['bindings'] == 2
+    assert all(r['wall_s'] >= 0 and r['cpu_s'] >= 0 for r in records)
+
+
+def test_spans_csv():
+    output = io.StringIO()
+
+    enable_spans(output, 'csv')
+    try:
+        with span('load', query='q3') as s:
+            s.record(_Result())
+        with span('compute'):
+            pass
+    finally:
+        disable_spans()
+
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+
+    assert [row['span'] for row in rows] == ['load', 'compute']
+    assert rows[0]['nvals'] == '3'
+    assert json.loads(rows[0]['attributes']) == {'query': 'q3'}
+    assert rows[1]['attributes'] == ''
+
+
+def test_logger_total_time():
+    assert Logger().get_total_time() >= 0
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from ldbc_snb_grblas.properties import PropertyTable, StringColumn
+
+
+def test_string_column():
+    column = StringColumn.concat([StringColumn.from_values(np.array(['Ann', '', 'Bob'], dtype=object)),
+                                  StringColumn.from_values(['Zoë', 'Ann'])])
+
+    assert len(column) == 5
+    assert [column[i] for i in range(len(column))] == ['Ann', '', 'Bob', 'Zoë', 'Ann']
+    assert column[np.uint64(3)] == column[-2] == 'Zoë'
+    assert column.find('Ann').tolist() == [0, 4]
+    assert column.find('').tolist() == [1]
+    assert column.find('Bo').tolist() == []
+
+    with pytest.raises(IndexError):
+        column[5]
+
+
+def test_property_table():
+    table = PropertyTable(['name', 'type'], [StringColumn.from_values(['Hungary', 'Budapest', 'Hungary']),
+                                             StringColumn.from_values(['country', 'city', 'country'])])
+
+    assert table == [['Hungary', 'country'], ['Budapest', 'city'], ['Hungary', 'country']]
+    assert table.index(['Budapest', 'city']) == 1
+    assert table.index(['Hungary', 'country'], 1) == 2
+    assert table.column('type')[1] == 'city'
+
+    with pytest.raises(ValueError):
+        table.index(['Budapest', 'country'])
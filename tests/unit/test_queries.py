@@ -0,0 +1,67 @@
+import numba
+import pytest
+
+from ldbc_snb_grblas.bench import DEFAULT_QUERIES, PARAMS_DIR, params_file_name
+from ldbc_snb_grblas.catalog import Catalog
+from ldbc_snb_grblas.generator import generate
+from ldbc_snb_grblas.loader import Loader
+from ldbc_snb_grblas.runner import import_query, load, parse_params, read_params_file, run, run_batch
+
+
+@pytest.fixture(scope='module')
+def data_dir(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp('data')
+    generate(str(data_dir), 3000, seed=3, bindings=2)
+    return data_dir
+
+
+@pytest.mark.parametrize('query_id', DEFAULT_QUERIES)
+def test_query_needs_no_jit(data_dir, query_id, monkeypatch):
+    # grblas compiles user-defined operators with numba.cfunc, the queries must only use built-in ones
+    def jit(*args, **kwargs):
+        raise AssertionError("a user-defined operator was compiled")
+
+    monkeypatch.setattr(numba, 'cfunc', jit)
+
+    query = import_query(query_id)
+    params_list = read_params_file(str(data_dir / PARAMS_DIR / params_file_name(query_id)))
+
+    graph = load(query, Loader(str(data_dir)))
+    for params in params_list:
+        assert isinstance(query.compute(graph, *parse_params(query, params)), list)
+
+
+def test_invalid_params_exit_status(data_dir, capsys):
+    query = import_query(5)
+
+    assert run(query, str(data_dir), ['tag', 'extra']) == 1
+    assert run_batch(query, str(data_dir), [['tag'], []]) == 1
+
+    captured = capsys.readouterr()
+    assert captured.out == ''
+    assert captured.err.count('Invalid number of parameters') == 2
+
+
+def test_catalog_graphs_keep_their_lengths(tmp_path):
+    generate(str(tmp_path), 3000, seed=3, bindings=2)
+    # persons known by someone, but missing from the person file, q19 adds them to the shared mapping
+    (tmp_path / 'dynamic' / 'person_knows_person_9_0.csv').write_text(
+        'Person1.id|Person2.id|creationDate\n'
+        '1000000000001|1000000000002|2012-01-01T00:00:00.000+0000\n')
+
+    catalog = Catalog(Loader(str(tmp_path)))
+    q5, q19 = import_query(5), import_query(19)
+    params_list = [parse_params(q5, params)
+                   for params in read_params_file(str(tmp_path / PARAMS_DIR / params_file_name(5)))]
+
+    graph5 = catalog.load_query(q5)
+    expected = [q5.compute(graph5, *params) for params in params_list]
+    persons_length = graph5.persons.length
+
+    graph19 = catalog.load_query(q19)
+    assert graph19.persons.length == persons_length + 2
+    for params in read_params_file(str(tmp_path / PARAMS_DIR / params_file_name(19))):
+        q19.compute(graph19, *parse_params(q19, params))
+
+    assert graph5.persons.length == graph5.message_hascreator_person.ncols == persons_length
+    assert [q5.compute(graph5, *params) for params in params_list] == expected
@@ -0,0 +1,43 @@
+import numpy as np
+
+from ldbc_snb_grblas.util import find_roots, top_k
+
+
+def test_top_k():
+    rng = np.random.default_rng(42)
+    scores = rng.integers(0, 5, 1000).astype(np.uint64)
+    ids = rng.permutation(1000) * 7
+
+    expected = sorted(range(1000), key=lambda i: (-int(scores[i]), ids[i]))
+
+    assert top_k(20, [scores, ids], descending=[True]).tolist() == expected[:20]
+    assert top_k(None, [scores, ids], descending=[True]).tolist() == expected
+    assert top_k(2000, [scores, ids], descending=[True]).tolist() == expected
+    assert top_k(0, [scores, ids]).tolist() == []
+
+
+def test_top_k_key_function():
+    counts = np.array([3, 5, 5, 1, 5])
+    names = np.array(['d', 'c', 'a', 'e', 'b'])
+    requested = []
+
+    def name_key(positions):
+        requested.extend(positions.tolist())
+        return names[positions]
+
+    assert top_k(2, [counts, name_key], descending=[True]).tolist() == [2, 4]
+    # only the names of the elements with the top counts are needed
+    assert sorted(requested) == [1, 2, 4]
+
+    assert top_k(3, [counts, names], descending=[False, True]).tolist() == [3, 0, 1]
+
+
+def test_find_roots():
+    # a long chain 0 <- 1 <- ... <- 99, a small tree 100 <- 101, 100 <- 102 <- 103, and a cycle 104 <-> 105
+    parents = np.concatenate([[0], np.arange(99), [100, 100, 100, 102, 105, 104]])
+
+    roots = find_roots(parents)
+
+    assert roots[:100].tolist() == [0] * 100
+    assert roots[100:104].tolist() == [100] * 4
+    assert set(roots[104:].tolist()) <= {104, 105}